@@ -1,11 +1,26 @@
 import requests
 import os
+import threading
 import time
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Callable, Dict, List, Optional, Tuple
+from prompt_builder import build_prompt
+from generation_scheduler import scheduler, current_tenant, PRIORITY_LOW, PRIORITY_NORMAL
+from llm_backends import get_backend
+from metrics import observe_generation
+from tracing import add_span, set_attribute, span, traced
 
-OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
 DEFAULT_MODEL = "llama3"
 
+# Fast model used for the draft in race mode
+RACE_DRAFT_MODEL = os.getenv("RACE_DRAFT_MODEL", "phi3")
+# Best-of-N stops early once a candidate reaches this ATS score
+BEST_OF_N_TARGET_SCORE = int(os.getenv("BEST_OF_N_TARGET_SCORE", "90"))
+# Best-of-N cancels candidates running longer than this multiple of the fastest one
+BEST_OF_N_STRAGGLER_FACTOR = float(os.getenv("BEST_OF_N_STRAGGLER_FACTOR", "2.0"))
+# Most candidates one best-of-N request may start
+BEST_OF_N_MAX_CANDIDATES = int(os.getenv("BEST_OF_N_MAX_CANDIDATES", "5"))
+
 # Model configurations with metadata
 AVAILABLE_MODELS = {
     "llama3": {
@@ -13,6 +28,8 @@ AVAILABLE_MODELS = {
         "description": "Meta's flagship model - balanced quality and speed",
         "recommended_tokens": 1000,
         "temperature": 0.7,
+        "context_window": 4096,  # num_ctx sent to Ollama (prompt + output)
+        "chars_per_token": 4.0,  # Rough tokenizer density for prompt budgeting
         "use_case": "General purpose, best overall quality"
     },
     "mistral": {
@@ -20,6 +37,8 @@ AVAILABLE_MODELS = {
         "description": "Excellent for structured content generation",
         "recommended_tokens": 1200,
         "temperature": 0.7,
+        "context_window": 4096,
+        "chars_per_token": 3.6,
         "use_case": "Professional writing, structured output"
     },
     "phi3": {
@@ -27,6 +46,8 @@ AVAILABLE_MODELS = {
         "description": "Small but capable - very fast",
         "recommended_tokens": 800,
         "temperature": 0.6,
+        "context_window": 4096,
+        "chars_per_token": 3.6,
         "use_case": "Quick iterations, speed priority"
     },
     "qwen2.5": {
@@ -34,6 +55,8 @@ AVAILABLE_MODELS = {
         "description": "Strong reasoning and multilingual support",
         "recommended_tokens": 1000,
         "temperature": 0.7,
+        "context_window": 4096,
+        "chars_per_token": 4.0,
         "use_case": "Complex reasoning, multilingual resumes"
     },
     "tinyllama": {
@@ -41,6 +64,8 @@ AVAILABLE_MODELS = {
         "description": "Lightweight model for testing",
         "recommended_tokens": 600,
         "temperature": 0.7,
+        "context_window": 2048,
+        "chars_per_token": 3.6,
         "use_case": "Resource-constrained environments"
     }
 }
@@ -59,96 +84,376 @@ def get_available_models() -> List[Dict]:
 
 def test_model_availability(model_name: str) -> bool:
     """
-    Check if a model is available in Ollama.
+    Check if a model is available on the configured LLM backend.
     """
     try:
-        response = requests.get(f"{OLLAMA_URL}/api/tags", timeout=5)
-        if response.status_code == 200:
-            available = response.json().get("models", [])
-            return any(model_name in m.get("name", "") for m in available)
-        return False
+        return any(model_name in name for name in get_backend().list_models())
     except requests.exceptions.RequestException as e:
         print(f"Error checking model availability: {e}")
         return False
 
+
+@traced("llm.generate")
 def generate_tailored_resume(
     base_resume_text: str, 
     job_description: str,
-    model_name: Optional[str] = None
+    model_name: Optional[str] = None,
+    options: Optional[Dict] = None,
+    cancel_event: Optional[threading.Event] = None
 ) -> Tuple[str, Dict]:
     """
-    Generates a tailored resume using Ollama with specified model.
+    Generates a tailored resume with the specified model on the configured
+    LLM backend (Ollama by default).
     
     Args:
         base_resume_text: The candidate's base resume content
         job_description: The job posting description
         model_name: Optional model to use (defaults to llama3)
+        options: Optional generation options overriding the model defaults (e.g. seed)
+        cancel_event: Optional event; when set the generation is aborted
     
     Returns:
-        Tuple of (generated_resume_content, metadata_dict)
-        metadata includes: model_used, generation_time, tokens_used
+        Tuple of (generated_resume_content, metadata_dict); the content is
+        empty when the backend call failed (see submit_with_fallback)
+        metadata includes: model_used, generation_time, tokens_used, prompt_tokens,
+        prompt_budget, prompt_truncated, prompt_eval_time, eval_time, cancelled
     """
     # Use default model if not specified or invalid
-    if not model_name or model_name not in AVAILABLE_MODELS:
-        model_name = DEFAULT_MODEL
+    model_name = resolve_model(model_name)
     
     model_config = AVAILABLE_MODELS[model_name]
+    set_attribute("model", model_name)
+    set_attribute("backend", get_backend().name)
     
-    prompt = f"""
-    You are an expert resume writer. 
-    
-    JOB DESCRIPTION:
-    {job_description}
+    with span("prompt.build"):
+        prompt, prompt_stats = build_prompt(base_resume_text, job_description, model_config)
     
-    CANDIDATE RESUME:
-    {base_resume_text}
-    
-    TASK:
-    Rewrite the candidate's resume to specifically target the job description above.
-    - Highlight relevant skills and experience.
-    - Use keywords from the job description.
-    - Maintain a professional tone.
-    - Do not invent false information.
-    
-    OUTPUT:
-    Provide ONLY the markdown content of the new resume.
-    """
-    
-    payload = {
-        "model": model_name,
-        "prompt": prompt,
-        "stream": False,
-        "options": {
-            "num_predict": model_config["recommended_tokens"],
-            "temperature": model_config["temperature"]
-        }
+    generation_options = {
+        "num_predict": model_config["recommended_tokens"],
+        "temperature": model_config["temperature"],
+        "num_ctx": model_config["context_window"],
+        **(options or {})
     }
     
     metadata = {
         "model_used": model_name,
         "generation_time": 0.0,
-        "tokens_used": 0
+        "tokens_used": 0,
+        "prompt_tokens": prompt_stats["prompt_tokens_estimate"],
+        "prompt_budget": prompt_stats["prompt_budget"],
+        "prompt_truncated": prompt_stats["truncated"],
+        "prompt_eval_time": 0.0,
+        "eval_time": 0.0,
+        "cancelled": False
     }
     
     try:
         start_time = time.time()
-        response = requests.post(f"{OLLAMA_URL}/api/generate", json=payload, timeout=120)
+        content, result, cancelled = get_backend().generate(
+            model_name, prompt, generation_options, cancel_event
+        )
         end_time = time.time()
         
-        response.raise_for_status()
-        result = response.json()
-        
         metadata["generation_time"] = round(end_time - start_time, 2)
+        metadata["cancelled"] = cancelled
         metadata["tokens_used"] = result.get("eval_count", 0)
+        # Ollama omits prompt_eval_count when the whole prompt was cached
+        metadata["prompt_tokens"] = result.get("prompt_eval_count", metadata["prompt_tokens"])
+        # Durations are reported in nanoseconds; prefill vs decode
+        metadata["prompt_eval_time"] = round(result.get("prompt_eval_duration", 0) / 1e9, 3)
+        metadata["eval_time"] = round(result.get("eval_duration", 0) / 1e9, 3)
         
-        return result.get("response", ""), metadata
+        # Decode ends when the response does; prefill runs right before it
+        decode_start = end_time - metadata["eval_time"]
+        add_span("llm.prefill", decode_start - metadata["prompt_eval_time"], decode_start,
+                 tokens=metadata["prompt_tokens"])
+        add_span("llm.decode", decode_start, end_time, tokens=metadata["tokens_used"])
+        set_attribute("cancelled", cancelled)
+        
+        observe_generation(get_backend().name, metadata)
+        return content, metadata
         
     except requests.exceptions.RequestException as e:
-        print(f"Error communicating with Ollama using {model_name}: {e}")
+        print(f"Error communicating with LLM backend using {model_name}: {e}")
+        observe_generation(get_backend().name, metadata)
+        return "", metadata
+
+
+def resolve_model(model_name: Optional[str]) -> str:
+    """
+    Return model_name if it is a known model, otherwise the default model.
+    """
+    if not model_name or model_name not in AVAILABLE_MODELS:
+        return DEFAULT_MODEL
+    return model_name
+
+
+def submit_with_fallback(
+    base_resume_text: str,
+    job_description: str,
+    model_name: Optional[str] = None,
+    priority: int = PRIORITY_NORMAL,
+    tenant: Optional[int] = None
+) -> Future:
+    """
+    Queue a generation on the scheduler, retrying once on DEFAULT_MODEL if it
+    fails. The retry is queued as a new scheduler task after the failed one
+    has released its slot, so it waits its turn and respects
+    MAX_LOADED_MODELS instead of loading a second model inside that slot.
+    
+    Returns:
+        Future resolving to (generated_resume_content, metadata_dict)
+    """
+    model_name = resolve_model(model_name)
+    if tenant is None:
+        tenant = current_tenant.get()
+    result: Future = Future()
+    
+    def relay(future: Future):
+        if future.cancelled():
+            result.cancel()
+        elif future.exception() is not None:
+            result.set_exception(future.exception())
+        else:
+            result.set_result(future.result())
+    
+    def retry_on_default(future: Future):
+        # Runs on the scheduler's thread; only queues work, never generates
+        if future.cancelled() or future.exception() is not None or future.result()[0] or model_name == DEFAULT_MODEL:
+            relay(future)
+            return
+        print(f"Generation with {model_name} failed, queuing a retry on {DEFAULT_MODEL}")
+        scheduler.submit(
+            DEFAULT_MODEL,
+            generate_tailored_resume,
+            base_resume_text,
+            job_description,
+            model_name=DEFAULT_MODEL,
+            priority=priority,
+            tenant=tenant
+        ).add_done_callback(relay)
+    
+    scheduler.submit(
+        model_name,
+        generate_tailored_resume,
+        base_resume_text,
+        job_description,
+        model_name=model_name,
+        priority=priority,
+        tenant=tenant
+    ).add_done_callback(retry_on_default)
+    return result
+
+
+def generate_tailored_resumes_batch(
+    items: List[Dict],
+    priority: int = PRIORITY_LOW
+) -> Tuple[List[Tuple[str, Dict]], Dict]:
+    """
+    Generate several tailored resumes through the generation scheduler.
+    
+    Items are queued grouped by model (warm model first) and by resume, so
+    the scheduler runs same-model work back to back and Ollama can reuse the
+    evaluated prompt prefix.
+    
+    Args:
+        items: List of dicts with base_resume_text, job_description and
+               optional model_name
+        priority: Scheduler priority (batches default to low so interactive
+                  requests go first)
+    
+    Returns:
+        Tuple of (results in input order, batch_stats_dict)
+        batch_stats includes: requests, prompt_eval_time,
+        avg_prompt_eval_time, generation_time, wall_time
+    """
+    warm_model = scheduler.loaded_model
+    order = sorted(
+        range(len(items)),
+        key=lambda i: (
+            resolve_model(items[i].get("model_name")) != warm_model,
+            resolve_model(items[i].get("model_name")),
+            items[i].get("base_resume_text") or "",
+        )
+    )
+    
+    start_time = time.time()
+    futures = {}
+    for index in order:
+        item = items[index]
+        futures[index] = submit_with_fallback(
+            item.get("base_resume_text") or "",
+            item.get("job_description") or "",
+            model_name=item.get("model_name"),
+            priority=priority
+        )
+    
+    results = [futures[index].result() for index in range(len(items))]
+    
+    prompt_eval_time = sum(meta.get("prompt_eval_time", 0.0) for _, meta in results)
+    stats = {
+        "requests": len(items),
+        "prompt_eval_time": round(prompt_eval_time, 3),
+        "avg_prompt_eval_time": round(prompt_eval_time / len(items), 3) if items else 0.0,
+        "generation_time": round(sum(meta.get("generation_time", 0.0) for _, meta in results), 2),
+        "wall_time": round(time.time() - start_time, 2)
+    }
+    return results, stats
+
+
+class GenerationHandle:
+    """
+    A generation queued on the scheduler that can be cancelled while queued
+    or while Ollama is still streaming tokens.
+    """
+    
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self.cancel_event = threading.Event()
+        self.started_at: Optional[float] = None
+        self.future: Optional[Future] = None
+    
+    def cancel(self):
+        self.cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+
+
+def submit_generation(
+    base_resume_text: str,
+    job_description: str,
+    model_name: Optional[str] = None,
+    priority: int = PRIORITY_NORMAL,
+    options: Optional[Dict] = None,
+    draft: bool = False
+) -> GenerationHandle:
+    """
+    Queue a cancellable generation on the scheduler (no model fallback).
+    
+    draft queues it as a race draft, ahead of same-priority work.
+    """
+    handle = GenerationHandle(resolve_model(model_name))
+    
+    def run():
+        handle.started_at = time.monotonic()
+        return generate_tailored_resume(
+            base_resume_text,
+            job_description,
+            model_name=handle.model_name,
+            options=options,
+            cancel_event=handle.cancel_event
+        )
+    
+    handle.future = scheduler.submit(handle.model_name, run, priority=priority, draft=draft)
+    return handle
+
+
+def start_race(
+    base_resume_text: str,
+    job_description: str,
+    quality_model: Optional[str] = None,
+    draft_model: Optional[str] = None,
+    priority: int = PRIORITY_NORMAL
+) -> Tuple[GenerationHandle, Optional[GenerationHandle]]:
+    """
+    Start a fast draft model and the quality model on the same request.
+    
+    The draft is submitted as a scheduler draft, which sorts ahead of the
+    quality model even when that model is already loaded, so it comes back
+    first when only one generation runs at a time. Callers show the draft, then replace it
+    with the quality result (cancelling the draft if quality wins outright).
+    
+    Returns:
+        Tuple of (quality_handle, draft_handle or None if both models match)
+    """
+    quality_model = resolve_model(quality_model)
+    draft_model = resolve_model(draft_model or RACE_DRAFT_MODEL)
+    
+    draft = None
+    if draft_model != quality_model:
+        draft = submit_generation(base_resume_text, job_description, draft_model, priority, draft=True)
+    quality = submit_generation(base_resume_text, job_description, quality_model, priority)
+    return quality, draft
+
+
+def generate_best_of_n(
+    base_resume_text: str,
+    job_description: str,
+    models: List[str],
+    score_fn: Callable[[str], Dict],
+    priority: int = PRIORITY_NORMAL,
+    target_score: int = BEST_OF_N_TARGET_SCORE,
+    straggler_factor: float = BEST_OF_N_STRAGGLER_FACTOR
+) -> Tuple[str, Dict, List[Dict]]:
+    """
+    Generate several candidates and keep the one with the best ATS score.
+    
+    Losing work is cancelled early to free Ollama: everything left is
+    cancelled once a candidate reaches target_score, and a candidate that has
+    been running longer than straggler_factor times the fastest finished
+    candidate of the same model is cancelled as well.
+    
+    Args:
+        models: One entry per candidate; repeated models get different seeds
+        score_fn: Returns an ATS result dict with a "score" key
+    
+    Returns:
+        Tuple of (best_content, best_metadata, candidate_summaries)
+        best_metadata includes the winner's "ats" result
+    """
+    handles = []
+    for index, model_name in enumerate(models):
+        options = {"seed": index + 1} if models.count(model_name) > 1 else None
+        handles.append(submit_generation(
+            base_resume_text, job_description, model_name, priority, options
+        ))
+    
+    pending = {handle.future: handle for handle in handles}
+    candidates = []
+    best = None
+    fastest: Dict[str, float] = {}
+    
+    while pending:
+        done, _ = wait(list(pending), timeout=0.5, return_when=FIRST_COMPLETED)
         
-        # Try fallback to default model if different
-        if model_name != DEFAULT_MODEL:
-            print(f"Falling back to {DEFAULT_MODEL}")
-            return generate_tailored_resume(base_resume_text, job_description, DEFAULT_MODEL)
+        for future in done:
+            handle = pending.pop(future)
+            if future.cancelled():
+                candidates.append({"model": handle.model_name, "status": "cancelled"})
+                continue
+            try:
+                content, metadata = future.result()
+            except Exception as e:
+                print(f"Best-of-N candidate {handle.model_name} failed: {e}")
+                candidates.append({"model": handle.model_name, "status": "failed"})
+                continue
+            if metadata.get("cancelled") or not content:
+                candidates.append({"model": handle.model_name, "status": "cancelled"})
+                continue
+            
+            ats_result = score_fn(content)
+            metadata["ats"] = ats_result
+            candidates.append({
+                "model": handle.model_name,
+                "status": "completed",
+                "ats_score": ats_result.get("score", 0),
+                "generation_time": metadata["generation_time"]
+            })
+            if metadata["generation_time"] < fastest.get(handle.model_name, float("inf")):
+                fastest[handle.model_name] = metadata["generation_time"]
+            if best is None or ats_result.get("score", 0) > best[1]["ats"].get("score", 0):
+                best = (content, metadata)
         
-        return "", metadata
+        if best is not None and best[1]["ats"].get("score", 0) >= target_score:
+            for handle in pending.values():
+                handle.cancel()
+        elif fastest:
+            now = time.monotonic()
+            for handle in pending.values():
+                limit = fastest.get(handle.model_name)
+                if limit is not None and handle.started_at and now - handle.started_at > limit * straggler_factor:
+                    handle.cancel()
+    
+    if best is None:
+        return "", {"model_used": None, "cancelled": False}, candidates
+    return best[0], best[1], candidates
@@ -0,0 +1,112 @@
+"""
+Application Service
+
+Persistence steps shared by the generate endpoints and background
+pipelines: saving a generation (with ATS analysis and a revision) and
+rendering its PDF.
+
+Background work that follows a generation runs on postprocess_executor,
+not on the generation scheduler, so ATS scoring and PDF rendering never hold
+one of the scheduler's LLM slots.
+"""
+
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.orm import Session
+
+from ats_cache import base_resume_score, cached_ats_score, feedback_json
+from content_store import application_content, set_application_content
+from models import Application, Resume
+from revisions import record_revision
+from pdf_generator import generate_resume_pdf, remove_pdf
+
+PDF_DIR = os.getenv("PDF_DIR", "/app/data/pdfs")
+# Threads saving and rendering finished background generations
+POSTPROCESS_WORKERS = int(os.getenv("POSTPROCESS_WORKERS", "2"))
+
+postprocess_executor = ThreadPoolExecutor(max_workers=max(POSTPROCESS_WORKERS, 1), thread_name_prefix="postprocess")
+
+
+def save_generation(
+    db: Session,
+    resume_id: int,
+    job_id: int,
+    tailored_content: str,
+    metadata: dict,
+    status: str = "Generated",
+    ats_result: Optional[dict] = None
+) -> Application:
+    """
+    Create or update the application for a generation and run ATS analysis on it.
+    
+    Pass ats_result when the content has already been scored. The score is
+    compared against the base resume's to record ats_score_delta.
+    """
+    # Create or update application record
+    app = db.query(Application).filter(
+        Application.job_id == job_id,
+        Application.resume_id == resume_id
+    ).first()
+    
+    if not app:
+        owner = db.query(Resume.user_id).filter(Resume.id == resume_id).scalar()
+        app = Application(job_id=job_id, resume_id=resume_id, user_id=owner)
+        db.add(app)
+    
+    set_application_content(db, app, tailored_content)
+    app.status = status
+    app.model_used = metadata["model_used"]
+    app.model_generation_time = int(round(metadata["generation_time"]))
+    app.model_tokens_used = metadata["tokens_used"]
+    app.model_prompt_tokens = metadata["prompt_tokens"]
+    
+    db.commit()
+    
+    # Auto-run ATS analysis on generated content
+    ats_ok = True
+    try:
+        if ats_result is None:
+            ats_result = cached_ats_score(tailored_content, db)
+        app.ats_score = ats_result['score']
+        app.ats_grade = ats_result['grade']
+        app.ats_feedback = feedback_json(ats_result)
+        app.ats_analyzed_at = datetime.utcnow()
+        base_score = base_resume_score(db, resume_id)
+        app.ats_score_delta = app.ats_score - base_score if base_score is not None else None
+        db.commit()
+    except Exception as e:
+        ats_ok = False
+        print(f"Warning: ATS analysis failed: {e}")
+        # Continue even if ATS analysis fails
+    
+    # Keep this generation in the history instead of losing it to the next one
+    revision = record_revision(db, app, generations=metadata.get("generations", 1))
+    if not ats_ok:
+        # The application still holds the previous generation's ATS result
+        revision.ats_score = revision.ats_grade = revision.ats_feedback = revision.ats_analyzed_at = None
+        revision.ats_score_delta = None
+    db.commit()
+    
+    return app
+
+
+def render_application_pdf(db: Session, app: Application) -> str:
+    """Render the application's content to a new PDF, store its path and delete the previous one."""
+    os.makedirs(PDF_DIR, exist_ok=True)
+    
+    # Generate unique filename
+    filename = f"resume_{app.id}_{uuid.uuid4().hex[:8]}.pdf"
+    pdf_path = os.path.join(PDF_DIR, filename)
+    
+    generate_resume_pdf(application_content(db, app), pdf_path)
+    
+    previous = app.pdf_path
+    app.pdf_path = pdf_path
+    db.commit()
+    if previous and previous != pdf_path:
+        remove_pdf(previous)
+    return pdf_path
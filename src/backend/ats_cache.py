@@ -0,0 +1,207 @@
+"""
+ATS Result Cache
+
+ATS results keyed by the sha256 of the scored text (the same hash the
+content store uses), so identical text is only ever scored once: repeat
+analyze-ats calls, best-of-N candidates that converge on the same output,
+restored revisions and base resumes shared across tailored versions.
+
+Results live in the ats_results table with a small in-memory LRU in front.
+The key's version part names the scorer: ATS_CACHE_VERSION, the runtime in
+use (torch, onnx or fallback) and ATS_MODEL_NAME. Rule-based fallback scores
+and the two model runtimes therefore never share entries, and a process that
+fell back to rules doesn't leave results that outlive the fallback. Bump
+ATS_CACHE_VERSION when the scoring logic itself changes. A rule-based score
+produced because inference failed on a loaded model is not stored at all.
+
+Base resumes are scored in the background right after upload, so every
+tailored version can record ats_score_delta: how many points tailoring
+gained (or lost) against the resume it started from.
+
+Usage (from src/backend):
+    python ats_cache.py score-base-resumes   # score every unscored base resume now
+"""
+
+import argparse
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+import ats_service
+from ats_service import ATS_MODEL_NAME, get_ats_score, load_ats_model
+from content_store import content_hash
+from database import SessionLocal
+from metrics import record_cache_access
+from models import Application, AtsResult, Resume
+
+ATS_CACHE_VERSION = os.getenv("ATS_CACHE_VERSION", "1")
+ATS_MEMORY_CACHE_SIZE = int(os.getenv("ATS_MEMORY_CACHE_SIZE", "512"))
+
+_memory: "OrderedDict[Tuple[str, str], Dict]" = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def scorer_version() -> str:
+    """The version part of the cache key: ATS_CACHE_VERSION, runtime and model."""
+    load_ats_model()  # the runtime is only known once the model has loaded (or failed to)
+    return f"{ATS_CACHE_VERSION}:{ats_service.ats_runtime}:{ATS_MODEL_NAME}"
+
+
+def _remember(key: Tuple[str, str], result: Dict):
+    with _memory_lock:
+        _memory[key] = result
+        _memory.move_to_end(key)
+        while len(_memory) > ATS_MEMORY_CACHE_SIZE:
+            _memory.popitem(last=False)
+
+
+def _from_row(row: AtsResult) -> Dict:
+    feedback = json.loads(row.feedback or "{}")
+    return {
+        "score": row.score,
+        "grade": row.grade,
+        "suggestions": feedback.get("suggestions", []),
+        "strengths": feedback.get("strengths", []),
+        "missing_keywords": feedback.get("missing_keywords", []),
+        "method": row.method,
+        "analyzed_at": row.analyzed_at.isoformat() if row.analyzed_at else None,
+    }
+
+
+def feedback_json(result: Dict) -> str:
+    """The ats_feedback column value for a result."""
+    return json.dumps({
+        "suggestions": result.get("suggestions", []),
+        "strengths": result.get("strengths", []),
+        "missing_keywords": result.get("missing_keywords", [])
+    })
+
+
+def cached_ats_score(text: str, db: Optional[Session] = None, refresh: bool = False) -> Dict:
+    """
+    get_ats_score() through the cache. The result has "cached": True when no
+    scoring ran. A new result is added to db for the caller to commit; without
+    db a short-lived session is used and committed, so this can be passed as a
+    scoring callback to worker threads.
+    """
+    if db is None:
+        with SessionLocal() as session:
+            result = cached_ats_score(text, session, refresh)
+            session.commit()
+            return result
+
+    digest = content_hash(text or "")
+    version = scorer_version()
+    key = (digest, version)
+    if not refresh:
+        with _memory_lock:
+            result = _memory.get(key)
+            if result is not None:
+                _memory.move_to_end(key)
+        if result is None:
+            row = db.get(AtsResult, key)
+            result = _from_row(row) if row is not None else None
+            if result is not None:
+                _remember(key, result)
+        record_cache_access("ats", result is not None)
+        if result is not None:
+            return {**result, "cached": True}
+
+    result = get_ats_score(text)
+    if result.get("method") == "rule-based" and ats_service.ats_runtime != "fallback":
+        # Inference failed on a loaded model; score again next time
+        return {**result, "cached": False}
+    row = db.get(AtsResult, key)
+    if row is None:
+        row = AtsResult(content_hash=digest, version=version)
+    row.score = result["score"]
+    row.grade = result["grade"]
+    row.feedback = feedback_json(result)
+    row.method = result.get("method")
+    row.analyzed_at = datetime.fromisoformat(result["analyzed_at"])
+    try:
+        # Savepoint: another request may have scored the same text meanwhile
+        with db.begin_nested():
+            db.add(row)
+    except IntegrityError:
+        pass
+    _remember(key, result)
+    return {**result, "cached": False}
+
+
+def score_resume(db: Session, resume: Resume, refresh: bool = False) -> Optional[Dict]:
+    """Score a base resume (cached by its text) and store the result on it."""
+    if not resume.content_text:
+        return None
+    result = cached_ats_score(resume.content_text, db, refresh)
+    resume.ats_score = result["score"]
+    resume.ats_grade = result["grade"]
+    resume.ats_analyzed_at = datetime.utcnow()
+    db.commit()
+    return result
+
+
+def score_resume_background(resume_id: int):
+    """BackgroundTasks entry point for freshly uploaded resumes."""
+    db = SessionLocal()
+    try:
+        resume = db.query(Resume).filter(Resume.id == resume_id).first()
+        if resume is not None:
+            result = score_resume(db, resume)
+            if result is not None:
+                print(f"Base resume {resume_id} ATS score: {result['score']} ({result['grade']})")
+    except Exception as e:
+        print(f"Warning: base resume ATS scoring failed for {resume_id}: {e}")
+    finally:
+        db.close()
+
+
+def base_resume_score(db: Session, resume_id: Optional[int]) -> Optional[int]:
+    """The base resume's ATS score, scoring it now if the upload task hasn't yet."""
+    if resume_id is None:
+        return None
+    resume = db.query(Resume).filter(Resume.id == resume_id).first()
+    if resume is None or not resume.content_text:
+        return None
+    if resume.ats_score is None:
+        score_resume(db, resume)
+    return resume.ats_score
+
+
+def score_base_resumes(db: Session) -> int:
+    """Score every base resume without a score and backfill its applications' deltas."""
+    scored = 0
+    resumes = db.query(Resume).filter(Resume.ats_score.is_(None), Resume.content_text.isnot(None)).all()
+    for resume in resumes:
+        if score_resume(db, resume) is None:
+            continue
+        scored += 1
+        db.query(Application).filter(
+            Application.resume_id == resume.id,
+            Application.ats_score.isnot(None),
+            Application.ats_score_delta.is_(None)
+        ).update({Application.ats_score_delta: Application.ats_score - resume.ats_score}, synchronize_session=False)
+        db.commit()
+    return scored
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ATS result cache maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("score-base-resumes", help="Score unscored base resumes and backfill deltas")
+    args = parser.parse_args()
+
+    if args.command == "score-base-resumes":
+        with SessionLocal() as db:
+            scored = score_base_resumes(db)
+        print(f"✓ Scored {scored} base resumes and backfilled application deltas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""
+ONNX Runtime ATS Classifier
+
+Optional CPU serving path for the ATS resume checker: the HuggingFace model
+is exported once to ONNX, its weights quantized to int8 (dynamic
+quantization, activations stay float), and served with onnxruntime plus the
+standalone tokenizers library. Serving needs neither torch nor transformers,
+and nothing is downloaded at runtime: everything is read from ATS_ONNX_DIR.
+
+ats_service uses this runtime when ATS_RUNTIME is "onnx", or "auto" (the
+default) and an exported model is present. The classifier returns the same
+[{"label", "score"}] shape as the transformers pipeline, so scoring code is
+unchanged.
+
+Thread tuning: ATS_ONNX_THREADS sets intra-op threads (0 lets onnxruntime use
+one per physical core); keep it below the API's core count so a scoring call
+doesn't starve request handling. ATS_ONNX_INTER_THREADS stays at 1 since the
+graph runs sequentially.
+
+Export reads the model from the local model store when it was prefetched.
+
+Usage (from src/backend; export and parity need torch + transformers):
+    python ats_onnx.py export                # download, export, quantize to ATS_ONNX_DIR
+    python ats_onnx.py parity                # int8 ONNX vs torch agreement on corpus resumes
+    python ats_onnx.py bench --threads 1,2,4 # load time, memory and latency, torch vs ONNX
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+try:
+    import numpy as np
+    import onnxruntime as ort
+    from tokenizers import Tokenizer
+    ONNX_AVAILABLE = True
+except ImportError:
+    ONNX_AVAILABLE = False
+
+from ats_service import ATS_MODEL_NAME, grade_for_score
+from model_store import model_source
+
+ATS_ONNX_DIR = os.getenv("ATS_ONNX_DIR", "/app/data/models/ats-onnx")
+ATS_ONNX_THREADS = int(os.getenv("ATS_ONNX_THREADS", "0"))
+ATS_ONNX_INTER_THREADS = int(os.getenv("ATS_ONNX_INTER_THREADS", "1"))
+ATS_MAX_TOKENS = int(os.getenv("ATS_MAX_TOKENS", "512"))
+
+MODEL_FILE = "model_quantized.onnx"
+FP32_FILE = "model.onnx"
+MANIFEST_FILE = "export.json"
+# Characters scored per resume; matches the torch path in ats_service
+INPUT_CHARS = 512
+
+
+def _softmax(logits: "np.ndarray") -> "np.ndarray":
+    shifted = np.exp(logits - logits.max())
+    return shifted / shifted.sum()
+
+
+def _sigmoid(logits: "np.ndarray") -> "np.ndarray":
+    return 1.0 / (1.0 + np.exp(-logits))
+
+
+def is_exported(model_dir: str = ATS_ONNX_DIR) -> bool:
+    return all(
+        os.path.exists(os.path.join(model_dir, name))
+        for name in (MODEL_FILE, "tokenizer.json", "config.json")
+    )
+
+
+class OnnxTextClassifier:
+    """Drop-in for pipeline("text-classification") backed by an exported model directory."""
+
+    def __init__(
+        self,
+        model_dir: str = ATS_ONNX_DIR,
+        threads: int = ATS_ONNX_THREADS,
+        model_file: str = MODEL_FILE
+    ):
+        with open(os.path.join(model_dir, "config.json")) as f:
+            config = json.load(f)
+        self.id2label = {int(k): v for k, v in config.get("id2label", {}).items()}
+        # Same post-processing the pipeline picks for the model's head
+        self.use_sigmoid = config.get("problem_type") == "multi_label_classification" or len(self.id2label) == 1
+
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=ATS_MAX_TOKENS)
+        self.tokenizer.no_padding()
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = ATS_ONNX_INTER_THREADS
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, model_file), options, providers=["CPUExecutionProvider"]
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+    def __call__(self, text: str) -> List[Dict]:
+        encoding = self.tokenizer.encode(text)
+        feeds = {
+            "input_ids": np.array([encoding.ids], dtype=np.int64),
+            "attention_mask": np.array([encoding.attention_mask], dtype=np.int64),
+            "token_type_ids": np.array([encoding.type_ids], dtype=np.int64),
+        }
+        logits = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0][0]
+        scores = _sigmoid(logits) if self.use_sigmoid else _softmax(logits)
+        best = int(scores.argmax())
+        return [{"label": self.id2label.get(best, f"LABEL_{best}"), "score": float(scores[best])}]
+
+
+def load_onnx_classifier(model_dir: str = ATS_ONNX_DIR) -> Optional[OnnxTextClassifier]:
+    """The ONNX classifier, or None when onnxruntime or the exported model is missing."""
+    if not ONNX_AVAILABLE:
+        print("onnxruntime/tokenizers not installed - ONNX ATS runtime unavailable")
+        return None
+    if not is_exported(model_dir):
+        print(f"No exported ATS model in {model_dir} (run: python ats_onnx.py export)")
+        return None
+    try:
+        classifier = OnnxTextClassifier(model_dir)
+        print(f"ATS model loaded from {model_dir} (onnxruntime int8, {ATS_ONNX_THREADS or 'auto'} threads)")
+        return classifier
+    except Exception as e:
+        print(f"Error loading ONNX ATS model: {e}")
+        return None
+
+
+def export_model(model_dir: str = ATS_ONNX_DIR, model_name: str = ATS_MODEL_NAME, keep_fp32: bool = False) -> Dict:
+    """
+    Export model_name to ONNX and quantize it to int8 in model_dir.
+
+    Writes the quantized graph, tokenizer.json, config.json and a manifest.
+    The fp32 graph is only kept with keep_fp32 (useful for parity checks).
+    """
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+    source = model_source(model_name)
+    if source is None:
+        raise RuntimeError(f"{model_name} is not in the model store (run: python model_store.py prefetch)")
+    os.makedirs(model_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(source, use_fast=True)
+    if not tokenizer.is_fast:
+        raise RuntimeError(f"{model_name} has no fast tokenizer; tokenizer.json cannot be exported")
+    model = AutoModelForSequenceClassification.from_pretrained(source)
+    model.eval()
+
+    tokenizer.backend_tokenizer.save(os.path.join(model_dir, "tokenizer.json"))
+    model.config.to_json_file(os.path.join(model_dir, "config.json"))
+
+    sample = tokenizer("Experienced software engineer", return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    fp32_path = os.path.join(model_dir, FP32_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            fp32_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+    quantize_dynamic(fp32_path, os.path.join(model_dir, MODEL_FILE), weight_type=QuantType.QInt8)
+
+    manifest = {
+        "model_name": model_name,
+        "quantization": "dynamic int8 (QInt8 weights)",
+        "opset": 14,
+        "fp32_bytes": os.path.getsize(fp32_path),
+        "int8_bytes": os.path.getsize(os.path.join(model_dir, MODEL_FILE)),
+        "exported_at": datetime.utcnow().isoformat(),
+    }
+    if not keep_fp32:
+        os.remove(fp32_path)
+    with open(os.path.join(model_dir, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def _sample_texts(count: int) -> List[str]:
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks"))
+    from corpus import generate_resumes
+    return [text[:INPUT_CHARS] for text in generate_resumes(count)]
+
+
+def _torch_classifier(threads: int = 0):
+    import torch
+    from transformers import pipeline
+    if threads:
+        torch.set_num_threads(threads)
+    return pipeline("text-classification", model=model_source(ATS_MODEL_NAME) or ATS_MODEL_NAME, device=-1)
+
+
+def parity_check(texts: List[str], model_dir: str = ATS_ONNX_DIR) -> Dict:
+    """Compare int8 ONNX predictions against the torch pipeline on the same inputs."""
+    reference = _torch_classifier()
+    candidate = OnnxTextClassifier(model_dir)
+    label_matches = grade_matches = 0
+    confidence_diffs, score_diffs = [], []
+    for text in texts:
+        expected, actual = reference(text)[0], candidate(text)[0]
+        expected_score, actual_score = int(expected["score"] * 100), int(actual["score"] * 100)
+        label_matches += expected["label"] == actual["label"]
+        grade_matches += grade_for_score(expected_score) == grade_for_score(actual_score)
+        confidence_diffs.append(abs(expected["score"] - actual["score"]))
+        score_diffs.append(abs(expected_score - actual_score))
+    return {
+        "samples": len(texts),
+        "label_agreement": round(label_matches / len(texts), 4),
+        "grade_agreement": round(grade_matches / len(texts), 4),
+        "mean_confidence_diff": round(float(np.mean(confidence_diffs)), 5),
+        "max_confidence_diff": round(float(np.max(confidence_diffs)), 5),
+        "max_ats_score_diff": int(max(score_diffs)),
+    }
+
+
+def _rss_mb() -> Dict[str, float]:
+    """Current and peak resident memory of this process (Linux /proc, else getrusage peak)."""
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return {
+            "rss_mb": round(int(fields["VmRSS"].split()[0]) / 1024, 1),
+            "peak_rss_mb": round(int(fields["VmHWM"].split()[0]) / 1024, 1),
+        }
+    except (OSError, KeyError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        return {"rss_mb": round(peak, 1), "peak_rss_mb": round(peak, 1)}
+
+
+def _bench_worker(runtime: str, threads: int, iterations: int, model_dir: str) -> Dict:
+    """One runtime in a fresh process, so load cost and memory aren't shared."""
+    texts = _sample_texts(50)
+    start = time.perf_counter()
+    classifier = _torch_classifier(threads) if runtime == "torch" else OnnxTextClassifier(model_dir, threads)
+    load_seconds = time.perf_counter() - start
+    memory_after_load = _rss_mb()
+
+    classifier(texts[0])  # warm-up
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        classifier(texts[i % len(texts)])
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        "runtime": runtime,
+        "threads": threads or "auto",
+        "load_seconds": round(load_seconds, 3),
+        "rss_after_load_mb": memory_after_load["rss_mb"],
+        "peak_rss_mb": _rss_mb()["peak_rss_mb"],
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 2),
+        "p95_ms": round(samples[min(int(len(samples) * 0.95), len(samples) - 1)] * 1000, 2),
+        "per_sec": round(len(samples) / sum(samples), 2),
+    }
+
+
+def benchmark(runtimes: List[str], thread_counts: List[int], iterations: int, model_dir: str) -> List[Dict]:
+    results = []
+    for runtime in runtimes:
+        for threads in thread_counts:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "_bench-worker", "--runtime", runtime,
+                 "--threads", str(threads), "--iterations", str(iterations), "--model-dir", model_dir],
+                capture_output=True, text=True
+            )
+            if output.returncode != 0:
+                print(f"✗ {runtime} ({threads} threads) failed:\n{output.stderr[-2000:]}")
+                continue
+            results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export, verify and benchmark the ONNX ATS runtime")
+    parser.add_argument("--model-dir", default=ATS_ONNX_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Export and int8-quantize the ATS model")
+    export_parser.add_argument("--keep-fp32", action="store_true", help="Also keep the unquantized graph")
+
+    parity_parser = commands.add_parser("parity", help="Check int8 ONNX against the torch pipeline")
+    parity_parser.add_argument("--samples", type=int, default=200)
+    parity_parser.add_argument("--min-agreement", type=float, default=0.98,
+                               help="Minimum label and grade agreement (exit 1 below it)")
+    parity_parser.add_argument("--max-score-diff", type=int, default=3,
+                               help="Largest allowed ATS score difference (0-100 scale)")
+
+    bench_parser = commands.add_parser("bench", help="Load time, memory and latency: torch vs ONNX")
+    bench_parser.add_argument("--runtimes", default="torch,onnx")
+    bench_parser.add_argument("--threads", default="0", help="Comma-separated thread counts (0 = runtime default)")
+    bench_parser.add_argument("--iterations", type=int, default=100)
+
+    worker_parser = commands.add_parser("_bench-worker")
+    worker_parser.add_argument("--runtime", required=True)
+    worker_parser.add_argument("--threads", type=int, default=0)
+    worker_parser.add_argument("--iterations", type=int, default=100)
+    worker_parser.add_argument("--model-dir", default=ATS_ONNX_DIR)
+
+    args = parser.parse_args()
+
+    if args.command == "_bench-worker":
+        print(json.dumps(_bench_worker(args.runtime, args.threads, args.iterations, args.model_dir)))
+        return
+
+    if args.command == "export":
+        # Export into a scratch dir and swap it in, so a failed export never
+        # leaves a half-written model where the API would pick it up
+        scratch = tempfile.mkdtemp(prefix="ats-onnx-")
+        manifest = export_model(scratch, keep_fp32=args.keep_fp32)
+        if os.path.exists(args.model_dir):
+            shutil.rmtree(args.model_dir)
+        os.makedirs(os.path.dirname(os.path.abspath(args.model_dir)), exist_ok=True)
+        shutil.move(scratch, args.model_dir)
+        print(f"✓ Exported {manifest['model_name']} to {args.model_dir}")
+        print(f"  - fp32 {manifest['fp32_bytes'] / 1e6:.1f} MB -> int8 {manifest['int8_bytes'] / 1e6:.1f} MB")
+        return
+
+    if not is_exported(args.model_dir):
+        print(f"✗ No exported model in {args.model_dir}; run: python ats_onnx.py export")
+        sys.exit(1)
+
+    if args.command == "parity":
+        report = parity_check(_sample_texts(args.samples), args.model_dir)
+        print(json.dumps(report, indent=2))
+        ok = (
+            report["label_agreement"] >= args.min_agreement
+            and report["grade_agreement"] >= args.min_agreement
+            and report["max_ats_score_diff"] <= args.max_score_diff
+        )
+        print("✓ Parity check passed" if ok else "✗ Parity check failed")
+        sys.exit(0 if ok else 1)
+
+    if args.command == "bench":
+        results = benchmark(
+            [r.strip() for r in args.runtimes.split(",") if r.strip()],
+            [int(t) for t in args.threads.split(",")],
+            args.iterations,
+            args.model_dir
+        )
+        print(f"{'runtime':<8} {'threads':>7} {'load s':>8} {'rss MB':>8} {'peak MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'/s':>8}")
+        for r in results:
+            print(f"{r['runtime']:<8} {str(r['threads']):>7} {r['load_seconds']:>8} {r['rss_after_load_mb']:>8} "
+                  f"{r['peak_rss_mb']:>8} {r['p50_ms']:>8} {r['p95_ms']:>8} {r['per_sec']:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,48 +3,139 @@ ATS (Applicant Tracking System) Score Service
 
 Analyzes resumes for ATS compatibility using HuggingFace transformers.
 Provides scoring and actionable feedback for resume optimization.
-"""
 
-# Try to import transformers, but don't crash if not available
-try:
-    from transformers import pipeline
-    TRANSFORMERS_AVAILABLE = True
-except ImportError:
-    print("Warning: transformers not installed. Using rule-based ATS scoring only.")
-    TRANSFORMERS_AVAILABLE = False
+The classifier runs on torch, or on the int8 ONNX export from ats_onnx.py
+when one is present (ATS_RUNTIME=auto, the default). Torch weights come from
+the local model store (model_store.py) when prefetched, so loading never
+depends on the hub; with ATS_PRELOAD the model is loaded and warmed up at
+startup rather than inside the first request.
+"""
 
+import importlib.util
 import json
+import os
 import re
+import threading
+import time
 from typing import Dict, List
 from datetime import datetime
+from metrics import ATS_INFERENCE_SECONDS
+from model_store import MODEL_OFFLINE, is_stored, model_source
+from tracing import span, traced, set_attribute
+
+# Checked without importing: transformers (and torch) are only loaded when the
+# torch runtime is actually used, so an ONNX-only image doesn't need them
+TRANSFORMERS_AVAILABLE = importlib.util.find_spec("transformers") is not None
+if not TRANSFORMERS_AVAILABLE:
+    print("Warning: transformers not installed. ATS scoring needs the ONNX runtime or falls back to rules.")
+
+ATS_MODEL_NAME = os.getenv("ATS_MODEL_NAME", "KarthikeyanDev/ATS_RESUME_CHECKER")
+# torch, onnx, or auto: the int8 ONNX export when present (see ats_onnx.py), else torch
+ATS_RUNTIME = os.getenv("ATS_RUNTIME", "auto").lower()
+
+# Load (and warm up) the model at startup instead of on the first ATS request
+ATS_PRELOAD = os.getenv("ATS_PRELOAD", "true").lower() == "true"
 
 # Global model cache to avoid reloading
 _ats_model = None
+_load_lock = threading.Lock()
+# Runtime the cached model uses: torch, onnx or fallback
+ats_runtime = None
+_load_info = {"state": "not_loaded", "source": None, "error": None, "load_seconds": None, "loaded_at": None}
+
+def grade_for_score(score: int) -> str:
+    if score >= 90:
+        return "excellent"
+    elif score >= 75:
+        return "good"
+    elif score >= 60:
+        return "fair"
+    return "poor"
 
 def load_ats_model():
     """Load the ATS resume checker model. Cached after first load."""
     global _ats_model
     
-    if not TRANSFORMERS_AVAILABLE:
-        print("Transformers not available - using rule-based scoring")
-        return "fallback"
-    
     if _ats_model is None:
+        # One load even when preload and the first requests race for it
+        with _load_lock:
+            if _ats_model is None:
+                _ats_model = _load_model()
+    return _ats_model
+
+def _load_model():
+    global ats_runtime
+    _load_info.update(state="loading", error=None)
+    start_time = time.perf_counter()
+    model, runtime, source, error = None, "fallback", None, None
+    
+    if ATS_RUNTIME in ("onnx", "auto"):
+        from ats_onnx import ATS_ONNX_DIR, load_onnx_classifier
+        model = load_onnx_classifier()
+        if model is not None:
+            runtime, source = "onnx", ATS_ONNX_DIR
+        elif ATS_RUNTIME == "onnx":
+            print("ONNX ATS runtime requested but unavailable - trying torch")
+    
+    if model is None:
+        source = model_source(ATS_MODEL_NAME)
+        if not TRANSFORMERS_AVAILABLE:
+            error = "transformers not installed"
+        elif source is None:
+            error = f"{ATS_MODEL_NAME} is not in the model store and offline mode is on (run: python model_store.py prefetch)"
+        else:
+            try:
+                if MODEL_OFFLINE:
+                    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+                from transformers import pipeline
+                print(f"Loading ATS model from {source}...")
+                # Using text-classification pipeline with the ATS model
+                model = pipeline(
+                    "text-classification", 
+                    model=source,
+                    device=-1  # Use CPU (-1), change to 0 for GPU
+                )
+                runtime = "torch"
+                print("ATS model loaded successfully!")
+            except Exception as e:
+                error = f"Error loading ATS model: {e}"
+    
+    if model is None:
+        print(f"{error} - using rule-based scoring")
+        model, source = "fallback", None
+    
+    ats_runtime = runtime
+    _load_info.update(
+        state="ready" if runtime != "fallback" else "fallback",
+        source=source,
+        error=error,
+        load_seconds=round(time.perf_counter() - start_time, 3),
+        loaded_at=datetime.utcnow().isoformat()
+    )
+    return model
+
+def preload_ats_model():
+    """Load the model and run one warm-up inference so the first request doesn't pay for either."""
+    model = load_ats_model()
+    if model != "fallback":
+        start_time = time.perf_counter()
         try:
-            print("Loading ATS model... (This may take a moment on first use)")
-            # Using text-classification pipeline with the ATS model
-            _ats_model = pipeline(
-                "text-classification", 
-                model="KarthikeyanDev/ATS_RESUME_CHECKER",
-                device=-1  # Use CPU (-1), change to 0 for GPU
-            )
-            print("ATS model loaded successfully!")
+            model("Software engineer with Python, SQL and cloud experience. " * 8)
+            _load_info["warmup_seconds"] = round(time.perf_counter() - start_time, 3)
         except Exception as e:
-            print(f"Error loading ATS model: {e}")
-            print("Falling back to rule-based scoring")
-            _ats_model = "fallback"
-    
-    return _ats_model
+            print(f"Warning: ATS warm-up inference failed: {e}")
+
+def ats_status() -> Dict:
+    """Which scorer is active and where it was loaded from, for /health."""
+    return {
+        "model": ATS_MODEL_NAME,
+        "runtime_setting": ATS_RUNTIME,
+        "runtime": ats_runtime,
+        "offline": MODEL_OFFLINE,
+        "stored": is_stored(ATS_MODEL_NAME),
+        "preload": ATS_PRELOAD,
+        **_load_info,
+    }
 
 def calculate_rule_based_score(resume_text: str) -> Dict:
     """
@@ -129,6 +220,7 @@ def calculate_rule_based_score(resume_text: str) -> Dict:
         "method": "rule-based"
     }
 
+@traced("ats.score")
 def get_ats_score(resume_text: str) -> Dict:
     """
     Analyze resume and return ATS score with feedback.
@@ -157,7 +249,9 @@ def get_ats_score(resume_text: str) -> Dict:
             "analyzed_at": datetime.utcnow().isoformat()
         }
     
-    model = load_ats_model()
+    with span("ats.load_model"):
+        model = load_ats_model()
+    start_time = time.perf_counter()
     
     # Use rule-based scoring as fallback or if model load failed
     if model == "fallback":
@@ -188,16 +282,11 @@ def get_ats_score(resume_text: str) -> Dict:
             result = calculate_rule_based_score(resume_text)
     
     # Re-calculate grade based on final score
-    score = result['score']
-    if score >= 90:
-        result['grade'] = "excellent"
-    elif score >= 75:
-        result['grade'] = "good"
-    elif score >= 60:
-        result['grade'] = "fair"
-    else:
-        result['grade'] = "poor"
+    result['grade'] = grade_for_score(result['score'])
     
     result['analyzed_at'] = datetime.utcnow().isoformat()
     
+    ATS_INFERENCE_SECONDS.labels(method=result['method']).observe(time.perf_counter() - start_time)
+    set_attribute("method", result['method'])
+    set_attribute("runtime", ats_runtime)
     return result
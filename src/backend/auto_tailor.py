@@ -0,0 +1,169 @@
+"""
+Auto-Tailoring
+
+Post-ingest stage that turns newly ingested jobs into ready-to-send
+applications without anyone clicking generate.
+
+Every new JobPosting is first scored cheaply against the base resumes of
+users who turned auto-tailoring on (users.auto_tailor), by keyword overlap
+(the skills the ingest keyword hook stored on the job vs the skills found in
+the resume). Only the best matches above AUTO_TAILOR_MIN_SCORE are queued,
+at low priority, for LLM generation on the scheduler. ATS scoring and PDF
+rendering follow on the post-processing executor, so they don't hold the LLM
+slot interactive requests wait for.
+
+Each owner's generations are charged to their daily quota before queuing.
+Matches beyond what the quota has left are dropped, best-scoring first
+kept, so auto-tailoring never takes a user over their quota.
+"""
+
+import functools
+import os
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from ai_service import resolve_model, submit_with_fallback
+from application_service import postprocess_executor, save_generation, render_application_pdf
+from database import SessionLocal
+from generation_scheduler import PRIORITY_LOW
+from ingest import extract_keywords, post_ingest_hook
+from model_analytics import pick_model
+from models import JobPosting, Resume, User
+from tenancy import reserve_generations
+
+AUTO_TAILOR_ENABLED = os.getenv("AUTO_TAILOR_ENABLED", "false").lower() == "true"
+# Share of a job's keywords the resume must cover (0.0 - 1.0)
+AUTO_TAILOR_MIN_SCORE = float(os.getenv("AUTO_TAILOR_MIN_SCORE", "0.5"))
+# Most jobs queued per base resume for each ingested batch
+AUTO_TAILOR_TOP_N = int(os.getenv("AUTO_TAILOR_TOP_N", "5"))
+# Model used for auto-generated resumes (empty = default model, "auto" = leaderboard routing)
+AUTO_TAILOR_MODEL = os.getenv("AUTO_TAILOR_MODEL", "")
+AUTO_TAILOR_PDF = os.getenv("AUTO_TAILOR_PDF", "true").lower() == "true"
+
+# Resume keywords keyed by (resume id, content length) so edits are picked up
+_resume_keywords: Dict[Tuple[int, int], Set[str]] = {}
+
+
+def resume_keywords(resume: Resume) -> Set[str]:
+    key = (resume.id, len(resume.content_text or ""))
+    if key not in _resume_keywords:
+        _resume_keywords[key] = set(extract_keywords(resume.content_text or ""))
+    return _resume_keywords[key]
+
+
+def match_score(resume_skills: Set[str], job_keywords: str) -> float:
+    """Fraction of the job's keywords that appear in the resume."""
+    job_skills = {keyword for keyword in (job_keywords or "").split(",") if keyword}
+    if not job_skills:
+        return 0.0
+    return len(job_skills & resume_skills) / len(job_skills)
+
+
+def select_matches(resumes: List[Resume], jobs: List[JobPosting]) -> List[Dict]:
+    """Top AUTO_TAILOR_TOP_N jobs per resume scoring at least AUTO_TAILOR_MIN_SCORE."""
+    selected = []
+    for resume in resumes:
+        skills = resume_keywords(resume)
+        scored = [(match_score(skills, job.keywords), job) for job in jobs]
+        scored = [(score, job) for score, job in scored if score >= AUTO_TAILOR_MIN_SCORE]
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        for score, job in scored[:AUTO_TAILOR_TOP_N]:
+            selected.append({
+                "resume_id": resume.id,
+                "user_id": resume.user_id,
+                "job_id": job.id,
+                "score": round(score, 3),
+                "base_resume_text": resume.content_text,
+                "job_description": job.description,
+            })
+    return selected
+
+
+def finish_application(resume_id: int, job_id: int, tailored_content: str, metadata: Dict) -> None:
+    """ATS-score, save and render one generated application (runs on the post-processing executor)."""
+    db = SessionLocal()
+    try:
+        app = save_generation(db, resume_id, job_id, tailored_content, metadata)
+        if AUTO_TAILOR_PDF:
+            render_application_pdf(db, app)
+        print(f"Auto-tailor: application {app.id} ready (job {job_id}, ATS {app.ats_score})")
+    finally:
+        db.close()
+
+
+def charge_matches(matches: List[Dict]) -> List[Dict]:
+    """The matches each owner's remaining daily quota covers, charged to it."""
+    by_user: Dict[int, List[Dict]] = defaultdict(list)
+    for match in matches:
+        by_user[match["user_id"]].append(match)
+
+    allowed = []
+    db = SessionLocal()
+    try:
+        for user_id, user_matches in by_user.items():
+            user = db.get(User, user_id)
+            if user is None:
+                continue
+            granted = reserve_generations(db, user, len(user_matches), "auto-tailor")
+            if granted < len(user_matches):
+                print(f"Auto-tailor: user {user_id} has quota for {granted} of {len(user_matches)} matches, skipping the rest")
+            user_matches.sort(key=lambda match: match["score"], reverse=True)
+            allowed.extend(user_matches[:granted])
+    finally:
+        db.close()
+    return allowed
+
+
+def enqueue_matches(matches: List[Dict], model_name: str) -> None:
+    for match in charge_matches(matches):
+        future = submit_with_fallback(
+            match["base_resume_text"],
+            match["job_description"],
+            model_name=model_name,
+            priority=PRIORITY_LOW,
+            tenant=match["user_id"]  # fair share against the owner's other work
+        )
+        future.add_done_callback(functools.partial(_after_generation, match["resume_id"], match["job_id"]))
+
+
+def _after_generation(resume_id: int, job_id: int, future):
+    """Hand a finished generation to the post-processing executor (runs on the scheduler's thread)."""
+    if future.cancelled():
+        return
+    if future.exception() is not None:
+        print(f"Auto-tailor: generation failed for resume {resume_id}, job {job_id}: {future.exception()}")
+        return
+    tailored_content, metadata = future.result()
+    if not tailored_content:
+        print(f"Auto-tailor: generation failed for resume {resume_id}, job {job_id}")
+        return
+    postprocess_executor.submit(
+        finish_application, resume_id, job_id, tailored_content, metadata
+    ).add_done_callback(_log_failure)
+
+
+def _log_failure(future):
+    if not future.cancelled() and future.exception() is not None:
+        print(f"Auto-tailor: pipeline failed: {future.exception()}")
+
+
+@post_ingest_hook
+def auto_tailor_hook(db: Session, jobs: List[JobPosting]):
+    """Score the freshly inserted batch and queue the best matches once it commits."""
+    if not AUTO_TAILOR_ENABLED or not jobs:
+        return
+
+    resumes = db.query(Resume).join(User, User.id == Resume.user_id).filter(
+        User.auto_tailor == True, Resume.is_base == True, Resume.content_text != None
+    ).all()
+    matches = select_matches(resumes, jobs)
+    if not matches:
+        return
+
+    model_name = resolve_model(pick_model(db, AUTO_TAILOR_MODEL or None))
+    print(f"Auto-tailor: {len(jobs)} new jobs scored against {len(resumes)} opted-in base resumes, {len(matches)} matches for {model_name}")
+    # The worker opens its own session, so only queue once the jobs are committed
+    event.listen(db, "after_commit", lambda session: enqueue_matches(matches, model_name), once=True)
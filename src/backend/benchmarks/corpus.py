@@ -0,0 +1,143 @@
+"""
+Synthetic corpus generator for benchmarks.
+
+Produces deterministic (seeded) resumes, job postings and JobSpy-shaped
+DataFrames so benchmark runs are comparable across machines and commits.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+FIRST_NAMES = ["Alex", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Sam", "Jamie", "Avery", "Quinn"]
+LAST_NAMES = ["Smith", "Garcia", "Chen", "Patel", "Johnson", "Nguyen", "Kim", "Brown", "Silva", "Okafor"]
+TITLES = [
+    "Software Engineer", "Senior Backend Engineer", "Data Engineer", "DevOps Engineer",
+    "Frontend Developer", "Machine Learning Engineer", "Security Analyst", "Full Stack Developer",
+    "Site Reliability Engineer", "Cloud Architect",
+]
+COMPANIES = [
+    "Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises",
+    "Soylent", "Cyberdyne", "Tyrell", "Wonka Labs", "Vandelay Industries",
+]
+SKILLS = [
+    "python", "javascript", "typescript", "sql", "react", "docker", "kubernetes", "aws", "gcp",
+    "git", "api", "database", "agile", "terraform", "postgresql", "fastapi", "django", "redis",
+    "kafka", "spark", "pandas", "linux", "ci/cd", "graphql",
+]
+VERBS = ["Developed", "Managed", "Created", "Led", "Implemented", "Designed", "Achieved", "Improved", "Increased", "Reduced"]
+SITES = ["indeed", "linkedin", "zip_recruiter", "glassdoor"]
+
+BOILERPLATE = (
+    "We are an equal opportunity employer and all qualified applicants will receive consideration "
+    "for employment without regard to race, color, religion, sex, sexual orientation, gender identity, "
+    "national origin, disability or protected veteran status."
+)
+BENEFITS = "Benefits:\n- Medical, dental and vision insurance\n- 401(k) matching\n- Paid time off\n- Parental leave"
+
+
+def _bullets(rng: random.Random, count: int) -> List[str]:
+    lines = []
+    for _ in range(count):
+        verb = rng.choice(VERBS)
+        skill = rng.choice(SKILLS)
+        metric = rng.choice([f"{rng.randint(5, 80)}%", f"${rng.randint(10, 900)}K", f"{rng.randint(2, 50)}+"])
+        lines.append(f"- {verb} {skill} services used by {rng.randint(2, 40)} teams, improving throughput by {metric}")
+    return lines
+
+
+def generate_resume(rng: random.Random) -> str:
+    """A plain-text resume of roughly 150-400 words."""
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    skills = rng.sample(SKILLS, 8)
+    lines = [
+        name,
+        f"{name.lower().replace(' ', '.')}@example.com | +1 555 {rng.randint(100, 999)} {rng.randint(1000, 9999)} | linkedin.com/in/{name.lower().replace(' ', '')}",
+        "",
+        "SUMMARY",
+        f"{rng.choice(TITLES)} with {rng.randint(2, 15)} years of experience building {', '.join(skills[:3])} systems.",
+        "",
+        "EXPERIENCE",
+    ]
+    for _ in range(rng.randint(2, 4)):
+        lines.append(f"**{rng.choice(TITLES)}** - {rng.choice(COMPANIES)} ({rng.randint(2012, 2020)} - {rng.randint(2021, 2025)})")
+        lines.extend(_bullets(rng, rng.randint(4, 7)))
+        lines.append("")
+    lines.extend([
+        "EDUCATION",
+        f"B.S. Computer Science, State University ({rng.randint(2005, 2018)})",
+        "",
+        "SKILLS",
+        ", ".join(skills),
+    ])
+    return "\n".join(lines)
+
+
+def generate_job_posting(rng: random.Random) -> Dict:
+    """A job posting dict in the shape returned by job_search.search_jobs."""
+    title = rng.choice(TITLES)
+    company = rng.choice(COMPANIES)
+    skills = rng.sample(SKILLS, 6)
+    description = "\n".join([
+        f"{company} is hiring a {title} to join our platform team.",
+        "",
+        "Responsibilities",
+        *(f"- Build and operate {skill} services" for skill in skills[:3]),
+        "",
+        "Requirements",
+        f"- {rng.randint(2, 8)}+ years of experience with {', '.join(skills[3:])}",
+        "- Strong communication skills",
+        "",
+        BENEFITS,
+        "",
+        BOILERPLATE,
+    ])
+    job_id = rng.getrandbits(48)
+    return {
+        "title": title,
+        "company": company,
+        "location": rng.choice(["Remote", "New York, NY", "Austin, TX", "Seattle, WA"]),
+        "description": description,
+        "url": f"https://jobs.example.com/{job_id:x}",
+        "source": rng.choice(SITES),
+        "date_posted": datetime(2026, 1, 1) - timedelta(hours=rng.randint(0, 72)),
+        "job_type": "fulltime",
+        "salary": None,
+    }
+
+
+def generate_resumes(count: int, seed: int = 42) -> List[str]:
+    rng = random.Random(seed)
+    return [generate_resume(rng) for _ in range(count)]
+
+
+def generate_job_postings(count: int, seed: int = 42, duplicate_ratio: float = 0.2) -> List[Dict]:
+    """Job postings where roughly duplicate_ratio of them repeat an earlier posting."""
+    rng = random.Random(seed)
+    jobs: List[Dict] = []
+    for _ in range(count):
+        if jobs and rng.random() < duplicate_ratio:
+            jobs.append(dict(rng.choice(jobs)))
+        else:
+            jobs.append(generate_job_posting(rng))
+    return jobs
+
+
+def generate_jobs_dataframe(count: int, seed: int = 42, duplicate_ratio: float = 0.2):
+    """A DataFrame with the columns JobSpy's scrape_jobs returns."""
+    import pandas as pd
+
+    rows = []
+    for job in generate_job_postings(count, seed, duplicate_ratio):
+        rows.append({
+            "site": job["source"],
+            "job_url": job["url"],
+            "title": job["title"],
+            "company": job["company"],
+            "location": job["location"],
+            "date_posted": job["date_posted"],
+            "job_type": job["job_type"],
+            "interval": None,
+            "description": job["description"],
+        })
+    return pd.DataFrame(rows)
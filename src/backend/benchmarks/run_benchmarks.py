@@ -0,0 +1,507 @@
+"""
+Benchmark harness for the backend hot paths.
+
+Runs against an ephemeral SQLite database (or a throwaway Postgres given with
+--database-url) seeded from a synthetic corpus, with the stub LLM backend so
+no models are needed. Results are written as JSON and compared against a
+stored baseline; regressions in throughput or p95 latency exit non-zero.
+
+Usage:
+    cd src/backend
+    python benchmarks/run_benchmarks.py                    # run + compare
+    python benchmarks/run_benchmarks.py --update-baseline  # record baseline
+    python benchmarks/run_benchmarks.py --only ats_rule_based,list_jobs
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results", "latest.json")
+
+# name -> (function, description); functions take the context dict and
+# return (samples_in_seconds, items_per_sample) or, to report extra figures
+# such as payload sizes, (samples_in_seconds, items_per_sample, extra_dict)
+BENCHMARKS: Dict[str, tuple] = {}
+
+
+def benchmark(name: str, description: str):
+    def register(fn: Callable):
+        BENCHMARKS[name] = (fn, description)
+        return fn
+    return register
+
+
+def time_calls(fn: Callable, iterations: int) -> List[float]:
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def percentile(sorted_samples: List[float], p: float) -> float:
+    if not sorted_samples:
+        return 0.0
+    index = min(int(round(p * (len(sorted_samples) - 1))), len(sorted_samples) - 1)
+    return sorted_samples[index]
+
+
+def summarize(samples: List[float], items_per_sample: int = 1) -> Dict:
+    ordered = sorted(samples)
+    total = sum(samples)
+    return {
+        "iterations": len(samples),
+        "ops_per_sec": round(len(samples) / total, 3) if total else 0.0,
+        "items_per_sec": round(len(samples) * items_per_sample / total, 3) if total else 0.0,
+        "mean_ms": round(total / len(samples) * 1000, 3) if samples else 0.0,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+# ---------------------------------------------------------------------------
+# Benchmarks
+# ---------------------------------------------------------------------------
+
+@benchmark("ats_rule_based", "calculate_rule_based_score on corpus resumes")
+def bench_rule_based(ctx):
+    from ats_service import calculate_rule_based_score
+    resumes = ctx["resumes"]
+    return time_calls(lambda i: calculate_rule_based_score(resumes[i % len(resumes)]), ctx["iterations"] * 10), 1
+
+
+@benchmark("ats_score", "get_ats_score end to end (active ATS runtime)")
+def bench_ats_score(ctx):
+    from ats_service import get_ats_score
+    resumes = ctx["resumes"]
+    return time_calls(lambda i: get_ats_score(resumes[i % len(resumes)]), ctx["iterations"]), 1
+
+
+@benchmark("pdf_render", "generate_resume_pdf to a temp file")
+def bench_pdf(ctx):
+    from pdf_generator import generate_resume_pdf
+    resumes = ctx["resumes"]
+    out_dir = os.path.join(ctx["tmpdir"], "pdfs")
+    return time_calls(
+        lambda i: generate_resume_pdf(resumes[i % len(resumes)], os.path.join(out_dir, f"bench_{i}.pdf")),
+        ctx["iterations"]
+    ), 1
+
+
+@benchmark("extract_text", "extract_text_from_file over txt/docx/pdf uploads")
+def bench_extract_text(ctx):
+    from routers.resumes import extract_text_from_file
+    from pdf_generator import generate_resume_pdf
+
+    files = []
+    upload_dir = os.path.join(ctx["tmpdir"], "uploads")
+    os.makedirs(upload_dir, exist_ok=True)
+    for i, text in enumerate(ctx["resumes"][:10]):
+        txt_path = os.path.join(upload_dir, f"resume_{i}.txt")
+        with open(txt_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        files.append(txt_path)
+        files.append(generate_resume_pdf(text, os.path.join(upload_dir, f"resume_{i}.pdf")))
+        try:
+            from docx import Document
+            doc = Document()
+            for line in text.splitlines():
+                doc.add_paragraph(line)
+            docx_path = os.path.join(upload_dir, f"resume_{i}.docx")
+            doc.save(docx_path)
+            files.append(docx_path)
+        except ImportError:
+            pass
+
+    return time_calls(lambda i: extract_text_from_file(files[i % len(files)]), ctx["iterations"] * 3), 1
+
+
+@benchmark("deduplicate_jobs", "deduplicate_jobs over the job corpus")
+def bench_dedup(ctx):
+    from job_search import deduplicate_jobs
+    jobs = ctx["jobs"]
+    return time_calls(lambda i: deduplicate_jobs(jobs), ctx["iterations"]), len(jobs)
+
+
+def _patch_scraper(ctx, batch_size: int):
+    """Point JobSpy's scrape_jobs at synthetic DataFrames (new seed per call)."""
+    import job_search
+    from corpus import generate_jobs_dataframe
+
+    calls = {"n": 0}
+
+    def fake_scrape_jobs(**kwargs):
+        calls["n"] += 1
+        return generate_jobs_dataframe(batch_size, seed=ctx["seed"] * 1000 + calls["n"])
+
+    job_search.scrape_jobs = fake_scrape_jobs
+
+
+@benchmark("ingest_jobs_router", "POST /jobs/search bulk ingest (stubbed scraper)")
+def bench_ingest_jobs(ctx):
+    batch = ctx["ingest_batch"]
+    _patch_scraper(ctx, batch)
+    client = ctx["client"]
+    return time_calls(
+        lambda i: client.post("/jobs/search", json={"search_term": "engineer", "results_wanted": batch}),
+        max(ctx["iterations"] // 2, 1)
+    ), batch
+
+
+@benchmark("ingest_search_router", "POST /search/jobs bulk ingest (stubbed scraper)")
+def bench_ingest_search(ctx):
+    batch = ctx["ingest_batch"]
+    _patch_scraper(ctx, batch)
+    client = ctx["client"]
+    return time_calls(
+        lambda i: client.post("/search/jobs", params={"query": "engineer", "results_wanted": batch}),
+        max(ctx["iterations"] // 2, 1)
+    ), batch
+
+
+def _bench_list(ctx, path: str, page_size: int = 100):
+    client = ctx["client"]
+    pages = max(ctx["counts"].get(path, page_size) // page_size, 1)
+    return time_calls(
+        lambda i: client.get(path, params={"skip": (i % pages) * page_size, "limit": page_size}),
+        ctx["iterations"] * 2
+    ), page_size
+
+
+@benchmark("list_jobs", "GET /jobs/ (100 per page)")
+def bench_list_jobs(ctx):
+    return _bench_list(ctx, "/jobs/")
+
+
+@benchmark("list_resumes", "GET /resumes/ (100 per page)")
+def bench_list_resumes(ctx):
+    return _bench_list(ctx, "/resumes/")
+
+
+@benchmark("list_applications", "GET /applications/ (100 per page)")
+def bench_list_applications(ctx):
+    return _bench_list(ctx, "/applications/")
+
+
+def _application_payload(ctx, limit: int = 100, legacy: bool = False) -> List[Dict]:
+    """A page of applications in detail shape: content plus ATS feedback
+    (legacy=True: feedback as the double-encoded string the API used to send)."""
+    from content_store import application_content
+    from database import SessionLocal
+    from models import Application
+    from serialization import loads_or_none
+
+    db = SessionLocal()
+    try:
+        return [
+            {
+                "id": app.id,
+                "job_id": app.job_id,
+                "resume_id": app.resume_id,
+                "status": app.status,
+                "created_at": app.created_at,
+                "generated_content": application_content(db, app),
+                "model_used": app.model_used,
+                "model_generation_time": app.model_generation_time,
+                "model_tokens_used": app.model_tokens_used,
+                "ats_score": app.ats_score,
+                "ats_grade": app.ats_grade,
+                "ats_feedback": app.ats_feedback if legacy else loads_or_none(app.ats_feedback),
+            }
+            for app in db.query(Application).order_by(Application.id).limit(limit)
+        ]
+    finally:
+        db.close()
+
+
+@benchmark("serialize_applications", "Encode 100 applications with content (app encoder vs stdlib json)")
+def bench_serialize(ctx):
+    from fastapi.encoders import jsonable_encoder
+    from serialization import ORJSON_AVAILABLE, dumps
+
+    payload = _application_payload(ctx)
+    iterations = ctx["iterations"] * 2
+    stdlib = time_calls(lambda i: json.dumps(jsonable_encoder(payload)).encode(), iterations)
+    samples = time_calls(lambda i: dumps(payload), iterations)
+    stdlib_mean = sum(stdlib) / len(stdlib)
+    mean = sum(samples) / len(samples)
+    return samples, len(payload), {
+        "encoder": "orjson" if ORJSON_AVAILABLE else "json",
+        "stdlib_json_mean_ms": round(stdlib_mean * 1000, 3),
+        "speedup_vs_stdlib": round(stdlib_mean / mean, 2) if mean else None,
+    }
+
+
+@benchmark("payload_applications", "GET /applications/ compressed, with payload sizes vs the old list shape")
+def bench_payload(ctx):
+    from compression import BROTLI_AVAILABLE, compress
+
+    client = ctx["client"]
+    raw = client.get("/applications/", params={"limit": 100}, headers={"Accept-Encoding": "identity"}).content
+    legacy = json.dumps(_application_payload(ctx, legacy=True), default=str).encode()
+    sizes = {
+        "legacy_bytes": len(legacy),
+        "identity_bytes": len(raw),
+        "gzip_bytes": len(compress("gzip", raw)),
+    }
+    if BROTLI_AVAILABLE:
+        sizes["br_bytes"] = len(compress("br", raw))
+    sizes["reduction_vs_legacy"] = round(1 - min(v for k, v in sizes.items() if k != "legacy_bytes") / len(legacy), 3)
+
+    encoding = "br, gzip" if BROTLI_AVAILABLE else "gzip"
+    pages = max(ctx["counts"].get("/applications/", 100) // 100, 1)
+    samples = time_calls(
+        lambda i: client.get("/applications/", params={"skip": (i % pages) * 100, "limit": 100},
+                             headers={"Accept-Encoding": encoding}),
+        ctx["iterations"] * 2
+    )
+    return samples, 100, sizes
+
+
+@benchmark("generate_stub_llm", "POST /applications/generate with the stub LLM")
+def bench_generate(ctx):
+    client = ctx["client"]
+    resume_ids, job_ids = ctx["resume_ids"], ctx["job_ids"]
+    rng = random.Random(ctx["seed"])
+    return time_calls(
+        lambda i: client.post("/applications/generate", params={
+            "resume_id": rng.choice(resume_ids),
+            "job_id": rng.choice(job_ids),
+            "model": "phi3",
+        }),
+        ctx["iterations"]
+    ), 1
+
+
+# ---------------------------------------------------------------------------
+# Setup, comparison and CLI
+# ---------------------------------------------------------------------------
+
+def seed_database(ctx):
+    """Bulk-load the synthetic corpus so list endpoints page through real volume."""
+    from content_store import put
+    from database import SessionLocal
+    from models import Application, JobPosting, Resume
+    from tenancy import default_user
+
+    db = SessionLocal()
+    try:
+        # Owned by the default user, whom the benchmark's header-less requests act as
+        user_id = default_user(db).id
+        resumes = [
+            Resume(user_id=user_id, name=f"Resume {i}", file_path="", content_text=text, is_base=True)
+            for i, text in enumerate(ctx["resumes"])
+        ]
+        db.add_all(resumes)
+        jobs = [
+            JobPosting(
+                title=job["title"], company=job["company"], description=job["description"],
+                url=job["url"], source=job["source"]
+            )
+            for job in ctx["jobs"]
+        ]
+        db.add_all(jobs)
+        db.flush()
+
+        rng = random.Random(ctx["seed"])
+        applications = []
+        for i in range(ctx["applications"]):
+            resume = rng.choice(resumes)
+            applications.append(Application(
+                user_id=user_id,
+                job_id=rng.choice(jobs).id,
+                resume_id=resume.id,
+                status=rng.choice(["Draft", "Generated", "Applied", "Rejected"]),
+                content_hash=put(db, resume.content_text),
+                model_used=rng.choice(["llama3", "mistral", "phi3"]),
+                model_generation_time=rng.randint(10, 120),
+                model_tokens_used=rng.randint(300, 1200),
+                ats_score=rng.randint(40, 100),
+                ats_grade="good",
+                ats_feedback=json.dumps({"suggestions": ["Add metrics"], "strengths": [], "missing_keywords": []}),
+            ))
+        db.add_all(applications)
+        db.commit()
+
+        ctx["resume_ids"] = [r.id for r in resumes]
+        ctx["job_ids"] = [j.id for j in jobs]
+        ctx["counts"] = {
+            "/resumes/": len(resumes),
+            "/jobs/": len(jobs),
+            "/applications/": len(applications),
+        }
+    finally:
+        db.close()
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Return a list of regression messages (empty when everything is within tolerance)."""
+    regressions = []
+    print(f"\n{'benchmark':<24}{'ops/s':>12}{'base':>12}{'p95 ms':>12}{'base':>12}")
+    for name, current in results["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            print(f"{name:<24}{current['ops_per_sec']:>12}{'-':>12}{current['p95_ms']:>12}{'-':>12}")
+            continue
+        print(f"{name:<24}{current['ops_per_sec']:>12}{base['ops_per_sec']:>12}{current['p95_ms']:>12}{base['p95_ms']:>12}")
+        if base["ops_per_sec"] and current["ops_per_sec"] < base["ops_per_sec"] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {current['ops_per_sec']} ops/s < baseline {base['ops_per_sec']} (-{tolerance:.0%} allowed)"
+            )
+        if base["p95_ms"] and current["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(
+                f"{name}: p95 {current['p95_ms']} ms > baseline {base['p95_ms']} ms (+{tolerance:.0%} allowed)"
+            )
+    return regressions
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Backend benchmark suite")
+    parser.add_argument("--database-url", help="Throwaway database URL (default: temporary SQLite file)")
+    parser.add_argument("--drop-after", action="store_true", help="Drop all tables when done (Postgres runs)")
+    parser.add_argument("--resumes", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, default=5000)
+    parser.add_argument("--applications", type=int, default=5000)
+    parser.add_argument("--ingest-batch", type=int, default=200)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--ats-runtime", choices=["rule", "model", "torch", "onnx"], default="rule",
+                        help="Score with the rule-based fallback (default), the configured ATS model "
+                             "(ATS_RUNTIME), or force the torch / int8 ONNX runtime")
+    parser.add_argument("--only", help="Comma-separated benchmark names")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed regression fraction")
+    parser.add_argument("--list", action="store_true", help="List benchmarks and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (_, description) in BENCHMARKS.items():
+            print(f"{name:<24}{description}")
+        return 0
+
+    args.output = os.path.abspath(args.output)
+    args.baseline = os.path.abspath(args.baseline)
+    tmpdir = tempfile.mkdtemp(prefix="autojob-bench-")
+    database_url = args.database_url or f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    # Configure before the app modules read their settings at import time
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("LLM_BACKEND", "stub")
+    os.environ.setdefault("LLM_STUB_LATENCY_MS", "5")
+    os.environ.setdefault("LLM_STUB_PREFILL_TOKENS_PER_SEC", "100000")
+    os.environ.setdefault("LLM_STUB_TOKENS_PER_SEC", "100000")
+    if args.ats_runtime in ("torch", "onnx"):
+        os.environ["ATS_RUNTIME"] = args.ats_runtime
+    os.chdir(tmpdir)  # keep data/resumes and other relative paths out of the repo
+
+    from corpus import generate_job_postings, generate_resumes
+    from fastapi.testclient import TestClient
+    import ats_service
+    import migrate
+    from database import engine
+    from main import app
+
+    migrate.upgrade(engine)
+
+    if args.ats_runtime == "rule":
+        ats_service._ats_model = "fallback"
+
+    print(f"Generating corpus: {args.resumes} resumes, {args.jobs} jobs, {args.applications} applications")
+    ctx = {
+        "tmpdir": tmpdir,
+        "seed": args.seed,
+        "iterations": args.iterations,
+        "ingest_batch": args.ingest_batch,
+        "applications": args.applications,
+        "resumes": generate_resumes(args.resumes, args.seed),
+        "jobs": generate_job_postings(args.jobs, args.seed),
+        "client": TestClient(app),
+    }
+    seed_database(ctx)
+
+    selected = [n.strip() for n in args.only.split(",")] if args.only else list(BENCHMARKS)
+    results = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "git_commit": git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": database_url.split(":", 1)[0],
+            "llm_backend": os.environ["LLM_BACKEND"],
+            "ats_runtime": args.ats_runtime,
+            "corpus": {"resumes": args.resumes, "jobs": args.jobs, "applications": args.applications, "seed": args.seed},
+        },
+        "results": {},
+    }
+
+    for name in selected:
+        if name not in BENCHMARKS:
+            print(f"Unknown benchmark: {name}")
+            return 2
+        fn, description = BENCHMARKS[name]
+        print(f"Running {name}: {description}")
+        samples, items, *extra = fn(ctx)
+        results["results"][name] = {**summarize(samples, items), **(extra[0] if extra else {})}
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.drop_after:
+        from models import Base
+        Base.metadata.drop_all(bind=engine)
+        migrate.metadata.drop_all(bind=engine)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --update-baseline to record one.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nREGRESSIONS:")
+        for message in regressions:
+            print(f"  ✗ {message}")
+        return 1
+    print("\n✓ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,303 @@
+"""
+Content Store
+
+Compressed, content-addressed storage for generated resume text.
+
+Each distinct text is stored once in content_blobs, keyed by the sha256 of
+the uncompressed text, so identical generations share a row and
+applications.content_hash points at it. Blobs are compressed with zstd
+(zlib when the zstandard package is not installed); the codec is recorded
+per blob so both kinds stay readable.
+
+Tailored resumes are mostly the base resume rewritten, and a regeneration
+is mostly the previous revision, so a blob can be compressed with one of
+those texts as the compression dictionary (a raw content dictionary for
+zstd, zdict for zlib). Matching passages then cost a back-reference instead
+of their bytes. The base text is itself a blob and the delta records its
+hash, so editing the resume later never breaks decoding.
+
+List queries never touch the text: Application.generated_content is
+deferred and content is resolved only by application_content() on detail
+views, PDF rendering and ATS analysis.
+"""
+
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import exists, func
+from sqlalchemy.orm import aliased
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from models import Application, ApplicationRevision, ContentBlob, Resume
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+CONTENT_CODEC = os.getenv("CONTENT_CODEC", "zstd" if ZSTD_AVAILABLE else "zlib")
+CONTENT_ZSTD_LEVEL = int(os.getenv("CONTENT_ZSTD_LEVEL", "10"))
+# Compress content against the base resume / previous revision when that is smaller
+CONTENT_DELTA_ENABLED = os.getenv("CONTENT_DELTA_ENABLED", "true").lower() == "true"
+# Longest chain of deltas-of-deltas a read may have to decode
+CONTENT_MAX_CHAIN = int(os.getenv("CONTENT_MAX_CHAIN", "8"))
+# Decoded texts kept in memory (blobs are immutable, so entries never go stale)
+CONTENT_CACHE_SIZE = int(os.getenv("CONTENT_CACHE_SIZE", "256"))
+
+if CONTENT_CODEC == "zstd" and not ZSTD_AVAILABLE:
+    print("Warning: zstandard not installed. Storing content with zlib.")
+    CONTENT_CODEC = "zlib"
+
+_decoded: "OrderedDict[str, str]" = OrderedDict()
+_decoded_lock = threading.Lock()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _compress(codec: str, data: bytes, dictionary: Optional[bytes] = None) -> bytes:
+    if codec == "zstd":
+        dict_data = zstandard.ZstdCompressionDict(dictionary, dict_type=zstandard.DICT_TYPE_RAWCONTENT) if dictionary else None
+        return zstandard.ZstdCompressor(level=CONTENT_ZSTD_LEVEL, dict_data=dict_data).compress(data)
+    compressor = zlib.compressobj(9, zdict=dictionary) if dictionary else zlib.compressobj(9)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _decompress(codec: str, data: bytes, dictionary: Optional[bytes] = None) -> bytes:
+    if codec == "zstd":
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Content was stored with zstd but zstandard is not installed")
+        dict_data = zstandard.ZstdCompressionDict(dictionary, dict_type=zstandard.DICT_TYPE_RAWCONTENT) if dictionary else None
+        return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(data)
+    decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+def _remember(digest: str, text: str):
+    with _decoded_lock:
+        _decoded[digest] = text
+        _decoded.move_to_end(digest)
+        while len(_decoded) > CONTENT_CACHE_SIZE:
+            _decoded.popitem(last=False)
+
+
+def _chain_depth(db: Session, digest: str) -> int:
+    depth = 0
+    blob = db.get(ContentBlob, digest)
+    while blob is not None and blob.base_hash:
+        depth += 1
+        blob = db.get(ContentBlob, blob.base_hash)
+    return depth
+
+
+def put(db: Session, text: str, *base_texts: Optional[str]) -> str:
+    """
+    Store text (deduplicated by hash) and return its hash.
+
+    Each given base text (base resume, previous revision, ...) is tried as
+    the compression dictionary and the smallest result is kept. Bases whose
+    own delta chain is already CONTENT_MAX_CHAIN long are skipped so reads
+    stay cheap. The caller commits.
+    """
+    digest = content_hash(text)
+    if db.get(ContentBlob, digest) is not None:
+        return digest
+
+    data = text.encode("utf-8")
+    blob = ContentBlob(hash=digest, codec=CONTENT_CODEC, data=_compress(CONTENT_CODEC, data), size=len(data))
+
+    chosen_base = None
+    for base_text in base_texts if CONTENT_DELTA_ENABLED else ():
+        if not base_text or base_text == text:
+            continue
+        base_hash = content_hash(base_text)
+        if _chain_depth(db, base_hash) >= CONTENT_MAX_CHAIN:
+            continue
+        delta = _compress(CONTENT_CODEC, data, base_text.encode("utf-8"))
+        if len(delta) < len(blob.data):
+            blob.data, blob.base_hash, chosen_base = delta, base_hash, base_text
+    if chosen_base is not None:
+        put(db, chosen_base)
+
+    blob.stored_size = len(blob.data)
+    try:
+        # Savepoint: a concurrent writer may store the same text first
+        with db.begin_nested():
+            db.add(blob)
+    except IntegrityError:
+        pass
+    _remember(digest, text)
+    return digest
+
+
+def get(db: Session, digest: str) -> str:
+    """Decoded text for a hash (KeyError if it isn't stored)."""
+    with _decoded_lock:
+        if digest in _decoded:
+            _decoded.move_to_end(digest)
+            return _decoded[digest]
+
+    blob = db.get(ContentBlob, digest)
+    if blob is None:
+        raise KeyError(f"Content {digest} not found")
+    dictionary = get(db, blob.base_hash).encode("utf-8") if blob.base_hash else None
+    text = _decompress(blob.codec, blob.data, dictionary).decode("utf-8")
+    _remember(digest, text)
+    return text
+
+
+def get_many(db: Session, digests: Iterable[str]) -> Dict[str, str]:
+    """
+    get() for many hashes at once: blobs are fetched one delta level per
+    query instead of one query per hash (KeyError if any isn't stored).
+    """
+    texts: Dict[str, str] = {}
+    blobs: Dict[str, tuple] = {}
+    wanted = set(digests)
+    missing = set(wanted)
+    while missing:
+        with _decoded_lock:
+            for digest in list(missing):
+                if digest in _decoded:
+                    texts[digest] = _decoded[digest]
+                    missing.discard(digest)
+        if not missing:
+            break
+        rows = db.query(ContentBlob.hash, ContentBlob.codec, ContentBlob.data, ContentBlob.base_hash).filter(
+            ContentBlob.hash.in_(missing)
+        ).all()
+        for row in rows:
+            blobs[row.hash] = row
+        if len(rows) < len(missing):
+            raise KeyError(f"Content {next(iter(missing - blobs.keys()))} not found")
+        missing = {
+            row.base_hash for row in rows
+            if row.base_hash and row.base_hash not in blobs and row.base_hash not in texts
+        }
+
+    def decode(digest: str) -> str:
+        if digest not in texts:
+            _, codec, data, base_hash = blobs[digest]
+            dictionary = decode(base_hash).encode("utf-8") if base_hash else None
+            texts[digest] = _decompress(codec, data, dictionary).decode("utf-8")
+            _remember(digest, texts[digest])
+        return texts[digest]
+
+    return {digest: decode(digest) for digest in wanted}
+
+
+def application_content(db: Session, app: Application) -> Optional[str]:
+    """The application's tailored resume, from the store or the legacy column."""
+    if app.content_hash:
+        return get(db, app.content_hash)
+    return app.generated_content
+
+
+def set_application_content(db: Session, app: Application, text: Optional[str]):
+    """
+    Store text for the application, delta-compressed against its base resume
+    or the content it replaces, whichever is smaller.
+    """
+    if not text:
+        app.content_hash = None
+        app.generated_content = None
+        return
+    base_text = None
+    if app.resume_id is not None:
+        row = db.query(Resume.content_text).filter(Resume.id == app.resume_id).first()
+        base_text = row.content_text if row else None
+    previous_text = get(db, app.content_hash) if app.content_hash else None
+    app.content_hash = put(db, text, base_text, previous_text)
+    app.generated_content = None
+
+
+def migrate_inline_content(db: Session, batch_size: int = 200) -> int:
+    """Move legacy applications.generated_content into the store; returns rows moved."""
+    moved = 0
+    while True:
+        batch = db.query(Application.id, Application.resume_id, Application.generated_content).filter(
+            Application.content_hash == None,
+            Application.generated_content != None
+        ).order_by(Application.id).limit(batch_size).all()
+        if not batch:
+            return moved
+
+        base_texts = dict(db.query(Resume.id, Resume.content_text).filter(
+            Resume.id.in_({row.resume_id for row in batch if row.resume_id is not None})
+        ))
+        for app_id, resume_id, text in batch:
+            digest = put(db, text, base_texts.get(resume_id)) if text else None
+            db.query(Application).filter(Application.id == app_id).update(
+                {"content_hash": digest, "generated_content": None}, synchronize_session=False
+            )
+        db.commit()
+        moved += len(batch)
+        print(f"  - moved {moved} applications into the content store")
+
+
+def delete_unreferenced(db: Session, older_than: datetime, batch_size: int = 500) -> Dict:
+    """
+    Delete blobs that no application, revision or other blob (as a delta
+    base) points at, e.g. after applications were deleted. Blobs freed by
+    removing their dependent deltas go in a later round. Only blobs created
+    before older_than are considered, so content written by a transaction
+    still in flight is never taken.
+    """
+    dependent = aliased(ContentBlob)
+    deleted = freed = 0
+    while True:
+        batch = db.query(ContentBlob.hash, ContentBlob.stored_size).filter(
+            ContentBlob.created_at < older_than,
+            ~exists().where(Application.content_hash == ContentBlob.hash),
+            ~exists().where(ApplicationRevision.content_hash == ContentBlob.hash),
+            ~exists().where(dependent.base_hash == ContentBlob.hash),
+        ).limit(batch_size).all()
+        if not batch:
+            return {"blobs": deleted, "bytes": freed}
+        db.query(ContentBlob).filter(ContentBlob.hash.in_([row.hash for row in batch])).delete(synchronize_session=False)
+        db.commit()
+        deleted += len(batch)
+        freed += sum(row.stored_size or 0 for row in batch)
+
+
+def storage_report(db: Session) -> Dict:
+    """Bytes stored vs bytes the applications' content would take inline."""
+    blobs, stored_bytes, blob_bytes = db.query(
+        func.count(ContentBlob.hash),
+        func.coalesce(func.sum(ContentBlob.stored_size), 0),
+        func.coalesce(func.sum(ContentBlob.size), 0),
+    ).one()
+    delta_blobs = db.query(func.count(ContentBlob.hash)).filter(ContentBlob.base_hash != None).scalar() or 0
+
+    referencing, logical_bytes = db.query(
+        func.count(Application.id),
+        func.coalesce(func.sum(ContentBlob.size), 0),
+    ).join(ContentBlob, ContentBlob.hash == Application.content_hash).one()
+
+    inline_rows, inline_bytes = db.query(
+        func.count(Application.id),
+        func.coalesce(func.sum(func.length(Application.generated_content)), 0),
+    ).filter(Application.generated_content != None).one()
+
+    return {
+        "codec": CONTENT_CODEC,
+        "blobs": blobs,
+        "delta_blobs": delta_blobs,
+        "applications_in_store": referencing,
+        "applications_inline": inline_rows,
+        "logical_bytes": int(logical_bytes),
+        "unique_bytes": int(blob_bytes),
+        "stored_bytes": int(stored_bytes),
+        "inline_bytes": int(inline_bytes),
+        "dedup_ratio": round(logical_bytes / blob_bytes, 2) if blob_bytes else None,
+        "compression_ratio": round(blob_bytes / stored_bytes, 2) if stored_bytes else None,
+        "savings_ratio": round(1 - stored_bytes / logical_bytes, 3) if logical_bytes else None,
+    }
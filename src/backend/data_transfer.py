@@ -0,0 +1,431 @@
+"""
+Data Transfer
+
+Bulk export to Parquet and bulk import from it, for offline analysis and
+for seeding test environments, without paging through the list endpoints.
+
+Datasets:
+- users: id, email, created_at, quota and settings (no passwords)
+- resumes: resume text and scores (not the uploaded files)
+- jobs: job_postings
+- applications: application metadata with the job's title and company, and
+  optionally the tailored resume text (include_content)
+- ats_metrics: one row per generation (application_revisions): model,
+  timing, tokens and ATS score
+
+Exports read with yield_per (a server-side cursor on Postgres) and write
+one Parquet row group per EXPORT_BATCH_SIZE rows, handing each finished
+chunk to the caller, so memory stays flat however large the table is and
+the HTTP response starts before the query finishes.
+
+Imports (users, resumes, jobs and applications) read the file batch by
+batch and, on Postgres, COPY each batch into a temporary staging table,
+then insert everything in one statement that skips rows conflicting with
+ones already present (same id, email, url, ...) and moves the id sequence
+past the imported ids. Other databases fall back to batched INSERT OR
+IGNORE. Ids are kept, so import into a fresh database, in the order users,
+resumes, jobs, applications, so foreign keys resolve. With
+null_missing_refs (--null-missing-refs), references to rows that don't
+exist, e.g. users skipped because their email is taken, are set to NULL
+instead of failing the import; such rows become unowned. Imported resume
+text stays in the inline generated_content column, which is read the same
+way as stored content.
+
+Usage (from src/backend):
+    python data_transfer.py export jobs jobs.parquet [--since 2024-01-01]
+    python data_transfer.py export applications apps.parquet --include-content
+    python data_transfer.py import users users.parquet
+    python data_transfer.py import applications apps.parquet --null-missing-refs
+"""
+
+import argparse
+import io
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+from content_store import get_many as get_contents
+from database import SessionLocal, engine
+from http_cache import invalidate
+from models import Application, ApplicationRevision, Base, JobPosting, Resume, User
+from stats_service import mark_dirty
+from tenancy import visible_jobs
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "10000"))
+EXPORT_COMPRESSION = os.getenv("EXPORT_COMPRESSION", "zstd")
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "50000"))
+
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+# dataset -> [(column name, SQL expression, arrow type)]
+DATASETS = {
+    "users": [
+        ("id", User.id, "int64"),
+        ("email", User.email, "string"),
+        ("daily_generation_quota", User.daily_generation_quota, "int64"),
+        ("auto_tailor", User.auto_tailor, "bool"),
+        ("created_at", User.created_at, "timestamp"),
+    ],
+    "resumes": [
+        ("id", Resume.id, "int64"),
+        ("user_id", Resume.user_id, "int64"),
+        ("name", Resume.name, "string"),
+        ("content_text", Resume.content_text, "string"),
+        ("is_base", Resume.is_base, "bool"),
+        ("ats_score", Resume.ats_score, "int64"),
+        ("ats_grade", Resume.ats_grade, "string"),
+        ("ats_analyzed_at", Resume.ats_analyzed_at, "timestamp"),
+        ("created_at", Resume.created_at, "timestamp"),
+        ("updated_at", Resume.updated_at, "timestamp"),
+    ],
+    "jobs": [
+        ("id", JobPosting.id, "int64"),
+        ("user_id", JobPosting.user_id, "int64"),
+        ("title", JobPosting.title, "string"),
+        ("company", JobPosting.company, "string"),
+        ("description", JobPosting.description, "string"),
+        ("url", JobPosting.url, "string"),
+        ("source", JobPosting.source, "string"),
+        ("fingerprint", JobPosting.fingerprint, "string"),
+        ("keywords", JobPosting.keywords, "string"),
+        ("fetched_at", JobPosting.fetched_at, "timestamp"),
+    ],
+    "applications": [
+        ("id", Application.id, "int64"),
+        ("user_id", Application.user_id, "int64"),
+        ("job_id", Application.job_id, "int64"),
+        ("resume_id", Application.resume_id, "int64"),
+        ("job_title", JobPosting.title, "string"),
+        ("job_company", JobPosting.company, "string"),
+        ("status", Application.status, "string"),
+        ("model_used", Application.model_used, "string"),
+        ("model_generation_time", Application.model_generation_time, "int64"),
+        ("model_tokens_used", Application.model_tokens_used, "int64"),
+        ("model_prompt_tokens", Application.model_prompt_tokens, "int64"),
+        ("ats_score", Application.ats_score, "int64"),
+        ("ats_grade", Application.ats_grade, "string"),
+        ("ats_score_delta", Application.ats_score_delta, "int64"),
+        ("ats_feedback", Application.ats_feedback, "string"),
+        ("ats_analyzed_at", Application.ats_analyzed_at, "timestamp"),
+        ("created_at", Application.created_at, "timestamp"),
+        ("updated_at", Application.updated_at, "timestamp"),
+    ],
+    "ats_metrics": [
+        ("application_id", ApplicationRevision.application_id, "int64"),
+        ("revision", ApplicationRevision.revision, "int64"),
+        ("user_id", Application.user_id, "int64"),
+        ("source", ApplicationRevision.source, "string"),
+        ("generations", ApplicationRevision.generations, "int64"),
+        ("model_used", ApplicationRevision.model_used, "string"),
+        ("model_generation_time", ApplicationRevision.model_generation_time, "int64"),
+        ("model_tokens_used", ApplicationRevision.model_tokens_used, "int64"),
+        ("model_prompt_tokens", ApplicationRevision.model_prompt_tokens, "int64"),
+        ("ats_score", ApplicationRevision.ats_score, "int64"),
+        ("ats_grade", ApplicationRevision.ats_grade, "string"),
+        ("ats_score_delta", ApplicationRevision.ats_score_delta, "int64"),
+        ("created_at", ApplicationRevision.created_at, "timestamp"),
+    ],
+}
+
+# dataset -> (table, file column -> table column renames), in import order
+IMPORTABLE = {
+    "users": ("users", {}),
+    "resumes": ("resumes", {}),
+    "jobs": ("job_postings", {}),
+    "applications": ("applications", {"content": "generated_content"}),
+}
+
+
+def _arrow_type(name: str):
+    return {
+        "int64": pyarrow.int64(),
+        "bool": pyarrow.bool_(),
+        "string": pyarrow.string(),
+        "timestamp": pyarrow.timestamp("us"),
+    }[name]
+
+
+def arrow_schema(dataset: str, include_content: bool = False):
+    fields = [pyarrow.field(name, _arrow_type(kind)) for name, _, kind in DATASETS[dataset]]
+    if include_content:
+        fields.append(pyarrow.field("content", pyarrow.string()))
+    return pyarrow.schema(fields)
+
+
+def _export_query(dataset: str, user: Optional[User], since: Optional[datetime], include_content: bool):
+    columns = [expression for _, expression, _ in DATASETS[dataset]]
+    if dataset == "users":
+        query = select(*columns).order_by(User.id)
+        if user is not None:
+            query = query.where(User.id == user.id)
+        if since is not None:
+            query = query.where(User.created_at >= since)
+    elif dataset == "resumes":
+        query = select(*columns).order_by(Resume.id)
+        if user is not None:
+            query = query.where(Resume.user_id == user.id)
+        if since is not None:
+            query = query.where(Resume.created_at >= since)
+    elif dataset == "jobs":
+        query = select(*columns).order_by(JobPosting.id)
+        if user is not None:
+            query = query.where(visible_jobs(user))
+        if since is not None:
+            query = query.where(JobPosting.fetched_at >= since)
+    elif dataset == "applications":
+        if include_content:
+            columns += [Application.content_hash, Application.generated_content]
+        query = select(*columns).outerjoin(JobPosting, JobPosting.id == Application.job_id).order_by(Application.id)
+        if user is not None:
+            query = query.where(Application.user_id == user.id)
+        if since is not None:
+            query = query.where(Application.created_at >= since)
+    else:
+        query = select(*columns).join(Application, Application.id == ApplicationRevision.application_id).order_by(
+            ApplicationRevision.id
+        )
+        if user is not None:
+            query = query.where(Application.user_id == user.id)
+        if since is not None:
+            query = query.where(ApplicationRevision.created_at >= since)
+    return query.execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write target for ParquetWriter whose bytes are handed out as they are written."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+def iter_parquet(
+    db: Session,
+    dataset: str,
+    user: Optional[User] = None,
+    since: Optional[datetime] = None,
+    include_content: bool = False
+) -> Iterator[bytes]:
+    """Parquet file bytes for a dataset, one row group at a time (content only exists for applications)."""
+    include_content = include_content and dataset == "applications"
+    schema = arrow_schema(dataset, include_content)
+    width = len(DATASETS[dataset])
+    sink = _ChunkSink()
+    writer = pyarrow.parquet.ParquetWriter(sink, schema, compression=EXPORT_COMPRESSION)
+    try:
+        result = db.execute(_export_query(dataset, user, since, include_content))
+        for rows in result.partitions():
+            columns = [list(column) for column in zip(*rows)]
+            if include_content:
+                hashes, inline = columns[width], columns[width + 1]
+                texts = get_contents(db, {digest for digest in hashes if digest})
+                columns = columns[:width] + [[
+                    texts[digest] if digest else text
+                    for digest, text in zip(hashes, inline)
+                ]]
+            writer.write_table(pyarrow.Table.from_arrays(
+                [pyarrow.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def stream_parquet(dataset: str, user: Optional[User] = None, since: Optional[datetime] = None,
+                   include_content: bool = False) -> Iterator[bytes]:
+    """iter_parquet on its own session, for a StreamingResponse that outlives the request's."""
+    db = SessionLocal()
+    try:
+        yield from iter_parquet(db, dataset, user, since, include_content)
+    finally:
+        db.close()
+
+
+def export_parquet(path: str, dataset: str, since: Optional[datetime] = None, include_content: bool = False) -> int:
+    """Write a dataset to a Parquet file; returns its size in bytes."""
+    size = 0
+    with SessionLocal() as db, open(path, "wb") as f:
+        for chunk in iter_parquet(db, dataset, since=since, include_content=include_content):
+            f.write(chunk)
+            size += len(chunk)
+    return size
+
+
+def _copy_value(value) -> str:
+    """One field in COPY's text format."""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        return value.isoformat(sep=" ")
+    text = str(value)
+    return text.replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+def _references(table: str, columns: List[str]) -> List[tuple]:
+    """(column, referenced table, referenced column) for the table's foreign keys among columns."""
+    return [
+        (fk.parent.name, fk.column.table.name, fk.column.name)
+        for fk in Base.metadata.tables[table].foreign_keys if fk.parent.name in columns
+    ]
+
+
+def _copy_batches(conn: Connection, table: str, columns: List[str], batches, null_missing_refs: bool) -> int:
+    """COPY batches into a staging table, then insert the rows that conflict with nothing present."""
+    staging = f"import_{table}"
+    column_list = ", ".join(columns)
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(f"CREATE TEMP TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP")
+        for batch in batches:
+            values = [batch.column(i).to_pylist() for i in range(batch.num_columns)]
+            buffer = io.StringIO("".join(
+                "\t".join(_copy_value(value) for value in row) + "\n" for row in zip(*values)
+            ))
+            cursor.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN", buffer)
+        if null_missing_refs:
+            for column, ref_table, ref_column in _references(table, columns):
+                cursor.execute(
+                    f"UPDATE {staging} SET {column} = NULL WHERE {column} IS NOT NULL AND NOT EXISTS "
+                    f"(SELECT 1 FROM {ref_table} r WHERE r.{ref_column} = {staging}.{column})"
+                )
+        cursor.execute(
+            f"INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {staging} "
+            f"ON CONFLICT DO NOTHING"
+        )
+        inserted = cursor.rowcount
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), GREATEST((SELECT MAX(id) FROM {table}), 1))"
+        )
+        return inserted
+    finally:
+        cursor.close()
+
+
+def _insert_batches(conn: Connection, table: str, columns: List[str], batches, null_missing_refs: bool) -> int:
+    statement = Base.metadata.tables[table].insert().prefix_with("OR IGNORE")
+    references = _references(table, columns) if null_missing_refs else []
+    inserted = 0
+    for batch in batches:
+        values = [batch.column(i).to_pylist() for i in range(batch.num_columns)]
+        for column, ref_table, ref_column in references:
+            index = columns.index(column)
+            ref = Base.metadata.tables[ref_table].c[ref_column]
+            present = set(conn.execute(
+                select(ref).where(ref.in_({value for value in values[index] if value is not None}))
+            ).scalars())
+            values[index] = [value if value in present else None for value in values[index]]
+        inserted += conn.execute(statement, [dict(zip(columns, row)) for row in zip(*values)]).rowcount
+    return inserted
+
+
+def import_parquet(
+    path: str,
+    dataset: str,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    null_missing_refs: bool = False
+) -> Dict:
+    """
+    Load a Parquet file (e.g. from export_parquet) into the dataset's table.
+    null_missing_refs sets foreign keys to rows that don't exist to NULL.
+    """
+    if dataset not in IMPORTABLE:
+        raise ValueError(f"{dataset} cannot be imported; importable: {', '.join(IMPORTABLE)}")
+    table, renames = IMPORTABLE[dataset]
+    table_columns = set(Base.metadata.tables[table].columns.keys())
+    parquet_file = pyarrow.parquet.ParquetFile(path)
+    file_columns = [name for name in parquet_file.schema_arrow.names if renames.get(name, name) in table_columns]
+    if "id" not in file_columns:
+        raise ValueError(f"{path} has no id column")
+    columns = [renames.get(name, name) for name in file_columns]
+
+    started = time.monotonic()
+    batches = parquet_file.iter_batches(batch_size=batch_size, columns=file_columns)
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            inserted = _copy_batches(conn, table, columns, batches, null_missing_refs)
+        else:
+            inserted = _insert_batches(conn, table, columns, batches, null_missing_refs)
+
+    # COPY bypasses the session events that keep these up to date
+    invalidate(table)
+    mark_dirty(table)
+    rows = parquet_file.metadata.num_rows
+    return {
+        "dataset": dataset,
+        "rows": rows,
+        "inserted": inserted,
+        "skipped": rows - inserted,
+        "seconds": round(time.monotonic() - started, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export datasets to Parquet and import them back")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export_parser = commands.add_parser("export", help="Write a dataset to a Parquet file")
+    export_parser.add_argument("dataset", choices=list(DATASETS))
+    export_parser.add_argument("path")
+    export_parser.add_argument("--since", type=datetime.fromisoformat, default=None)
+    export_parser.add_argument("--include-content", action="store_true", help="applications: add the resume text")
+    import_parser = commands.add_parser("import", help="Load a Parquet file with COPY")
+    import_parser.add_argument("dataset", choices=list(IMPORTABLE))
+    import_parser.add_argument("path")
+    import_parser.add_argument(
+        "--null-missing-refs", action="store_true",
+        help="set references to users/resumes/jobs that don't exist to NULL instead of failing"
+    )
+    args = parser.parse_args()
+    if args.command == "export" and args.include_content and args.dataset != "applications":
+        parser.error("--include-content only applies to the applications dataset")
+
+    if not PARQUET_AVAILABLE:
+        print("✗ pyarrow is not installed")
+        raise SystemExit(1)
+
+    if args.command == "export":
+        started = time.monotonic()
+        size = export_parquet(args.path, args.dataset, args.since, args.include_content)
+        rows = pyarrow.parquet.ParquetFile(args.path).metadata.num_rows
+        print(f"✓ Exported {rows} {args.dataset} rows to {args.path} ({size / 1e6:.1f} MB) "
+              f"in {time.monotonic() - started:.1f}s")
+        return
+
+    if args.command == "import":
+        report = import_parquet(args.path, args.dataset, null_missing_refs=args.null_missing_refs)
+        print(f"✓ Imported {report['inserted']} of {report['rows']} {args.dataset} rows "
+              f"({report['skipped']} already present) in {report['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
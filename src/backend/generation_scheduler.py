@@ -0,0 +1,318 @@
+"""
+Generation Scheduler
+Queues LLM generations in front of Ollama with per-model concurrency limits,
+priority queues and a preference for the model that is already loaded, so
+concurrent users don't make Ollama swap models in and out of memory.
+
+Within a priority, users get a fair share of the queue (start-time fair
+queuing): each user's generations are tagged with a virtual start time that
+advances per generation, so a 50-job batch from one user interleaves with
+another user's single request instead of running ahead of it.
+
+Drafts (the fast half of a draft/quality race) go ahead of other work at
+the same priority, even when another model is already loaded.
+"""
+
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from metrics import GENERATION_QUEUE_WAIT_SECONDS
+from tracing import add_span, span
+
+# Lower value runs first; PRIORITY_HIGH is for internal callers only
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+# Total generations sent to Ollama at once (match OLLAMA_NUM_PARALLEL)
+MAX_CONCURRENT_GENERATIONS = int(os.getenv("MAX_CONCURRENT_GENERATIONS", "1"))
+# Distinct models allowed to run at once (match OLLAMA_MAX_LOADED_MODELS)
+MAX_LOADED_MODELS = int(os.getenv("MAX_LOADED_MODELS", "1"))
+# Consecutive dispatches to the loaded model before waiting models get a turn
+MAX_SAME_MODEL_STREAK = int(os.getenv("MAX_SAME_MODEL_STREAK", "8"))
+# Per-model concurrency, e.g. "phi3=2,tinyllama=2"; unlisted models get 1
+MODEL_CONCURRENCY = os.getenv("MODEL_CONCURRENCY", "")
+
+# Number of recent wait times kept for the queue statistics
+WAIT_SAMPLE_SIZE = 500
+
+# User the current request runs for; submit() tags work with it for fair sharing
+current_tenant: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("current_tenant", default=None)
+
+
+def client_priority(priority: int) -> int:
+    """Priority an API caller asked for, clamped so it never ranks above PRIORITY_NORMAL."""
+    return max(priority, PRIORITY_NORMAL)
+
+
+def _parse_model_limits(spec: str) -> Dict[str, int]:
+    limits = {}
+    for part in spec.split(","):
+        if "=" not in part:
+            continue
+        name, value = part.split("=", 1)
+        try:
+            limits[name.strip()] = max(int(value), 1)
+        except ValueError:
+            print(f"Ignoring invalid MODEL_CONCURRENCY entry: {part}")
+    return limits
+
+
+class _QueuedGeneration:
+    __slots__ = (
+        "model_name", "priority", "draft", "seq", "tenant", "start_tag",
+        "fn", "args", "kwargs", "future", "context", "enqueued_at"
+    )
+
+    def __init__(self, model_name, priority, draft, seq, tenant, start_tag, fn, args, kwargs):
+        self.model_name = model_name
+        self.priority = priority
+        self.draft = draft
+        self.seq = seq
+        self.tenant = tenant
+        self.start_tag = start_tag
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.context = contextvars.copy_context()
+        self.enqueued_at = time.monotonic()
+
+    def sort_key(self, warm: int = 0):
+        return (self.priority, 0 if self.draft else 1, warm, self.start_tag, self.seq)
+
+    def __lt__(self, other):
+        return self.sort_key() < other.sort_key()
+
+
+class GenerationScheduler:
+    """
+    Model-aware scheduler for blocking generation calls.
+
+    Work is queued per model and dispatched to a thread pool when a slot is
+    free. Among runnable queues the best priority wins; on ties drafts go
+    first, then the model that is currently loaded (so same-model work is
+    batched), then the user with the least service so far, then FIFO.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int = MAX_CONCURRENT_GENERATIONS,
+        model_limits: Optional[Dict[str, int]] = None,
+        max_loaded_models: int = MAX_LOADED_MODELS,
+        max_same_model_streak: int = MAX_SAME_MODEL_STREAK
+    ):
+        self.max_concurrent = max(max_concurrent, 1)
+        self.model_limits = model_limits or {}
+        self.max_loaded_models = max(max_loaded_models, 1)
+        self.max_same_model_streak = max(max_same_model_streak, 1)
+
+        self._lock = threading.Condition()
+        self._queues: Dict[str, list] = {}
+        self._running: Dict[str, int] = {}
+        self._running_by_tenant: Dict[Optional[int], int] = {}
+        self._seq = itertools.count()
+        # Fair queuing state: virtual time and each user's last finish tag
+        self._virtual_time = 0
+        self._finish_tags: Dict[Optional[int], int] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent, thread_name_prefix="generation"
+        )
+
+        self.loaded_model: Optional[str] = None
+        self._streak = 0
+        self._model_switches = 0
+        self._completed = 0
+        self._waits = deque(maxlen=WAIT_SAMPLE_SIZE)
+
+        self._dispatcher = threading.Thread(
+            target=self._dispatch_loop, name="generation-dispatcher", daemon=True
+        )
+        self._dispatcher.start()
+
+    def submit(
+        self,
+        model_name: str,
+        fn: Callable,
+        /,
+        *args,
+        priority: int = PRIORITY_NORMAL,
+        tenant: Optional[int] = None,
+        draft: bool = False,
+        **kwargs
+    ) -> Future:
+        """
+        Queue fn(*args, **kwargs) to run as a generation for model_name.
+
+        tenant is the user the work is for (defaults to current_tenant).
+        draft marks a race draft, which runs ahead of same-priority work.
+        Returns a Future; cancelling it before dispatch removes the work.
+        """
+        if tenant is None:
+            tenant = current_tenant.get()
+        with self._lock:
+            start_tag = max(self._virtual_time, self._finish_tags.get(tenant, 0))
+            self._finish_tags[tenant] = start_tag + 1
+            item = _QueuedGeneration(model_name, priority, draft, next(self._seq), tenant, start_tag, fn, args, kwargs)
+            heapq.heappush(self._queues.setdefault(model_name, []), item)
+            self._lock.notify_all()
+        return item.future
+
+    def run(
+        self,
+        model_name: str,
+        fn: Callable,
+        /,
+        *args,
+        priority: int = PRIORITY_NORMAL,
+        tenant: Optional[int] = None,
+        **kwargs
+    ):
+        """Submit and block until the generation finishes."""
+        return self.submit(model_name, fn, *args, priority=priority, tenant=tenant, **kwargs).result()
+
+    def _limit_for(self, model_name: str) -> int:
+        return self.model_limits.get(model_name, 1)
+
+    def _can_start(self, model_name: str) -> bool:
+        if sum(self._running.values()) >= self.max_concurrent:
+            return False
+        if self._running.get(model_name, 0) >= self._limit_for(model_name):
+            return False
+        active_models = {m for m, n in self._running.items() if n > 0}
+        if model_name not in active_models and len(active_models) >= self.max_loaded_models:
+            return False
+        return True
+
+    def _pick_next(self) -> Optional[_QueuedGeneration]:
+        others_waiting = any(
+            queue for model, queue in self._queues.items() if model != self.loaded_model
+        )
+        prefer_loaded = not (others_waiting and self._streak >= self.max_same_model_streak)
+
+        best_key = None
+        best_model = None
+        for model_name, queue in self._queues.items():
+            if not queue or not self._can_start(model_name):
+                continue
+            head = queue[0]
+            warm = 0 if (prefer_loaded and model_name == self.loaded_model) else 1
+            key = head.sort_key(warm)
+            if best_key is None or key < best_key:
+                best_key, best_model = key, model_name
+
+        if best_model is None:
+            return None
+        return heapq.heappop(self._queues[best_model])
+
+    def _dispatch_loop(self):
+        while True:
+            with self._lock:
+                item = self._pick_next()
+                while item is None:
+                    self._lock.wait()
+                    item = self._pick_next()
+
+                if not item.future.set_running_or_notify_cancel():
+                    continue
+
+                if item.model_name == self.loaded_model:
+                    self._streak += 1
+                else:
+                    if self.loaded_model is not None:
+                        self._model_switches += 1
+                    self.loaded_model = item.model_name
+                    self._streak = 1
+
+                self._running[item.model_name] = self._running.get(item.model_name, 0) + 1
+                self._running_by_tenant[item.tenant] = self._running_by_tenant.get(item.tenant, 0) + 1
+                self._virtual_time = max(self._virtual_time, item.start_tag)
+                waited = time.monotonic() - item.enqueued_at
+                self._waits.append(waited)
+                GENERATION_QUEUE_WAIT_SECONDS.labels(model=item.model_name).observe(waited)
+
+            self._executor.submit(self._execute, item)
+
+    def _execute(self, item: _QueuedGeneration):
+        try:
+            result = item.context.run(self._run_traced, item)
+            item.future.set_result(result)
+        except BaseException as e:
+            item.future.set_exception(e)
+        finally:
+            with self._lock:
+                self._running[item.model_name] -= 1
+                self._running_by_tenant[item.tenant] -= 1
+                self._completed += 1
+                self._lock.notify_all()
+
+    @staticmethod
+    def _run_traced(item: _QueuedGeneration):
+        now = time.time()
+        add_span("scheduler.queue_wait", now - (time.monotonic() - item.enqueued_at), now, model=item.model_name)
+        with span("scheduler.generation", model=item.model_name, priority=item.priority):
+            return item.fn(*item.args, **item.kwargs)
+
+    def stats(self) -> Dict:
+        """
+        Queue depth, running work and recent wait times, for sizing the box.
+        """
+        with self._lock:
+            waits = sorted(self._waits)
+            queued = {
+                model: len(queue) for model, queue in self._queues.items() if queue
+            }
+            running = {model: n for model, n in self._running.items() if n > 0}
+            queued_by_tenant: Dict[str, int] = {}
+            for queue in self._queues.values():
+                for item in queue:
+                    key = str(item.tenant) if item.tenant is not None else "system"
+                    queued_by_tenant[key] = queued_by_tenant.get(key, 0) + 1
+            running_by_tenant = {
+                str(tenant) if tenant is not None else "system": n
+                for tenant, n in self._running_by_tenant.items() if n > 0
+            }
+            oldest = min(
+                (queue[0].enqueued_at for queue in self._queues.values() if queue),
+                default=None
+            )
+
+            def percentile(p: float) -> float:
+                if not waits:
+                    return 0.0
+                return round(waits[min(int(len(waits) * p), len(waits) - 1)], 3)
+
+            return {
+                "queue_depth": sum(queued.values()),
+                "queued_by_model": queued,
+                "running": sum(running.values()),
+                "running_by_model": running,
+                "queued_by_user": queued_by_tenant,
+                "running_by_user": running_by_tenant,
+                "loaded_model": self.loaded_model,
+                "completed": self._completed,
+                "model_switches": self._model_switches,
+                "oldest_wait_seconds": round(time.monotonic() - oldest, 3) if oldest else 0.0,
+                "wait_seconds": {
+                    "samples": len(waits),
+                    "avg": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                    "p50": percentile(0.50),
+                    "p95": percentile(0.95),
+                    "max": round(waits[-1], 3) if waits else 0.0,
+                },
+                "limits": {
+                    "max_concurrent": self.max_concurrent,
+                    "max_loaded_models": self.max_loaded_models,
+                    "per_model": self.model_limits,
+                },
+            }
+
+
+# Shared scheduler for the API process
+scheduler = GenerationScheduler(model_limits=_parse_model_limits(MODEL_CONCURRENCY))
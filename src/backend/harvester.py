@@ -0,0 +1,279 @@
+"""
+Incremental Job Harvester
+
+Runs saved searches on a schedule and stores only postings we haven't seen.
+Each saved search keeps a watermark (start of its last successful run) and
+the set of URLs it has already fetched:
+
+- the watermark narrows JobSpy's hours_old window to the time since the last
+  run (plus a small overlap), so the boards return mostly new postings
+- the URL set drops repeats inside that overlap before fingerprinting and
+  DB dedup (see ingest), so run cost tracks new jobs rather than total results
+
+The watermark only moves when every board answered. After a partial run
+(some boards failed) the next run looks back from the old watermark again,
+so the failed boards' postings are still fetched and the URL set skips what
+the other boards already returned.
+
+A background thread picks up due searches, runs at most
+HARVEST_MAX_CONCURRENT at once and adds jitter to every next run time so
+searches don't hit the job boards in lockstep. Each API worker runs that
+thread, so a due search is claimed in the database before it runs: one
+conditional UPDATE pushes next_run_at out by HARVEST_LEASE_SECONDS, and
+only the process whose UPDATE matched the row runs it. If that process dies,
+the search becomes due again when the lease runs out.
+"""
+
+import math
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from ingest import ingest_search
+from models import HarvestRun, SavedSearch, SavedSearchSeenUrl
+
+HARVEST_ENABLED = os.getenv("HARVEST_ENABLED", "true").lower() == "true"
+# Seconds between checks for due searches
+HARVEST_POLL_SECONDS = int(os.getenv("HARVEST_POLL_SECONDS", "60"))
+# Saved searches scraped at the same time
+HARVEST_MAX_CONCURRENT = int(os.getenv("HARVEST_MAX_CONCURRENT", "2"))
+# Random +/- fraction of the interval added to each next run
+HARVEST_JITTER = float(os.getenv("HARVEST_JITTER", "0.1"))
+# How long a claimed search stays off other workers' due lists (longer than a run)
+HARVEST_LEASE_SECONDS = int(os.getenv("HARVEST_LEASE_SECONDS", "3600"))
+# Extra look-back beyond the watermark to catch late-indexed postings
+HARVEST_OVERLAP_HOURS = float(os.getenv("HARVEST_OVERLAP_HOURS", "2"))
+# Seen URLs older than this are pruned (postings rarely resurface after it)
+SEEN_URL_RETENTION_DAYS = int(os.getenv("SEEN_URL_RETENTION_DAYS", "30"))
+
+# Chunk size for IN (...) lookups against seen URLs
+URL_LOOKUP_CHUNK = 500
+
+
+def parse_sites(sites: Optional[str]) -> List[str]:
+    return [site.strip() for site in (sites or "").split(",") if site.strip()]
+
+
+def compute_hours_old(search: SavedSearch, now: datetime) -> int:
+    """Look-back window for the next run: time since the watermark plus overlap."""
+    max_hours = search.max_hours_old or 72
+    if search.watermark_at is None:
+        return max_hours
+    elapsed_hours = (now - search.watermark_at).total_seconds() / 3600
+    return max(1, min(max_hours, math.ceil(elapsed_hours + HARVEST_OVERLAP_HOURS)))
+
+
+def next_run_time(search: SavedSearch, now: datetime) -> datetime:
+    interval = (search.interval_minutes or 1440) * 60
+    jitter = interval * HARVEST_JITTER * random.uniform(-1, 1)
+    return now + timedelta(seconds=max(interval + jitter, 60))
+
+
+def _lookup_urls(db: Session, column, urls: List[str], *criteria) -> set:
+    found = set()
+    for i in range(0, len(urls), URL_LOOKUP_CHUNK):
+        chunk = urls[i:i + URL_LOOKUP_CHUNK]
+        found.update(row[0] for row in db.query(column).filter(column.in_(chunk), *criteria))
+    return found
+
+
+def run_saved_search(db: Session, search: SavedSearch) -> HarvestRun:
+    """
+    Run one saved search incrementally and record a HarvestRun.
+    """
+    started = datetime.utcnow()
+    start_time = time.perf_counter()
+    run = HarvestRun(saved_search_id=search.id, started_at=started, hours_old=compute_hours_old(search, started))
+    db.add(run)
+    db.commit()
+
+    remembered = set()
+
+    def exclude_seen(df: pd.DataFrame) -> pd.Series:
+        # Every URL new to this search is remembered, stored elsewhere or not
+        seen = _lookup_urls(
+            db, SavedSearchSeenUrl.url, df["url"].tolist(), SavedSearchSeenUrl.saved_search_id == search.id
+        )
+        mask = df["url"].isin(seen)
+        new_urls = set(df.loc[~mask, "url"]) - remembered
+        remembered.update(new_urls)
+        db.add_all(SavedSearchSeenUrl(saved_search_id=search.id, url=url, seen_at=started) for url in new_urls)
+        return mask
+
+    try:
+        result = ingest_search(
+            db,
+            search_term=search.search_term,
+            location=search.location,
+            results_wanted=search.results_wanted,
+            hours_old=run.hours_old,
+            sites=parse_sites(search.sites),
+            exclude=exclude_seen
+        )
+        run.fetched = result["fetched"]
+        run.already_seen = result["excluded"]
+        run.already_stored = result["duplicates"] + result["already_stored"]
+        run.inserted = result["inserted"]
+
+        db.query(SavedSearchSeenUrl).filter(
+            SavedSearchSeenUrl.saved_search_id == search.id,
+            SavedSearchSeenUrl.seen_at < started - timedelta(days=SEEN_URL_RETENTION_DAYS)
+        ).delete(synchronize_session=False)
+
+        if result["failed_sites"]:
+            # Keep the watermark so the next run covers what these boards missed
+            run.status = "partial"
+            run.error = f"Scrape failed for {', '.join(sorted(result['failed_sites']))}"
+        else:
+            search.watermark_at = started
+            run.status = "success"
+    except Exception as e:
+        db.rollback()
+        print(f"Error harvesting saved search {search.id}: {e}")
+        run.status = "error"
+        run.error = str(e)
+
+    finished = datetime.utcnow()
+    run.finished_at = finished
+    run.duration_seconds = round(time.perf_counter() - start_time, 2)
+    search.last_run_at = finished
+    search.next_run_at = next_run_time(search, finished)
+    db.commit()
+    db.refresh(run)
+
+    print(
+        f"Harvest '{search.name}': window {run.hours_old}h, fetched {run.fetched}, "
+        f"seen {run.already_seen}, stored {run.already_stored}, inserted {run.inserted} "
+        f"({run.duration_seconds}s)"
+    )
+    return run
+
+
+def run_stats(run: Optional[HarvestRun]) -> Optional[Dict]:
+    if run is None:
+        return None
+    return {
+        "id": run.id,
+        "status": run.status,
+        "started_at": run.started_at,
+        "finished_at": run.finished_at,
+        "duration_seconds": run.duration_seconds,
+        "hours_old": run.hours_old,
+        "fetched": run.fetched,
+        "already_seen": run.already_seen,
+        "already_stored": run.already_stored,
+        "inserted": run.inserted,
+        "error": run.error,
+    }
+
+
+class HarvestScheduler:
+    """
+    Background loop that runs due saved searches with bounded concurrency.
+    """
+
+    def __init__(self, max_concurrent: int = HARVEST_MAX_CONCURRENT, poll_seconds: int = HARVEST_POLL_SECONDS):
+        self.poll_seconds = max(poll_seconds, 1)
+        self._executor = ThreadPoolExecutor(max_workers=max(max_concurrent, 1), thread_name_prefix="harvest")
+        self._running = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="harvest-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def is_running(self, search_id: int) -> bool:
+        with self._lock:
+            return search_id in self._running
+
+    def _claim(self, search_id: int) -> bool:
+        with self._lock:
+            if search_id in self._running:
+                return False
+            self._running.add(search_id)
+            return True
+
+    def _run_claimed(self, search_id: int) -> Optional[HarvestRun]:
+        try:
+            db = SessionLocal()
+            try:
+                search = db.query(SavedSearch).filter(SavedSearch.id == search_id).first()
+                if search is None:
+                    return None
+                run = run_saved_search(db, search)
+                db.expunge(run)
+                return run
+            finally:
+                db.close()
+        finally:
+            with self._lock:
+                self._running.discard(search_id)
+
+    def run_now(self, search_id: int) -> Optional[HarvestRun]:
+        """Run a search in the calling thread; None if it is already running or queued."""
+        if not self._claim(search_id):
+            return None
+        return self._run_claimed(search_id)
+
+    def _loop(self):
+        # Spread the first checks of several replicas / restarts apart
+        self._stop.wait(random.uniform(0, self.poll_seconds))
+        while not self._stop.is_set():
+            try:
+                self._dispatch_due()
+            except Exception as e:
+                print(f"Error checking saved searches: {e}")
+            self._stop.wait(self.poll_seconds)
+
+    @staticmethod
+    def _lease(db: Session, search_id: int, now: datetime) -> bool:
+        """Claim a due search for this process; False if another worker got it first."""
+        claimed = db.query(SavedSearch).filter(
+            SavedSearch.id == search_id,
+            SavedSearch.enabled == True,
+            (SavedSearch.next_run_at == None) | (SavedSearch.next_run_at <= now)
+        ).update(
+            {SavedSearch.next_run_at: now + timedelta(seconds=HARVEST_LEASE_SECONDS)},
+            synchronize_session=False
+        )
+        db.commit()
+        return claimed == 1
+
+    def _dispatch_due(self):
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            due = db.query(SavedSearch.id).filter(
+                SavedSearch.enabled == True,
+                (SavedSearch.next_run_at == None) | (SavedSearch.next_run_at <= now)
+            ).order_by(SavedSearch.next_run_at).all()
+
+            for (search_id,) in due:
+                # Claimed at submit time so a backlog isn't queued twice
+                if not self._claim(search_id):
+                    continue
+                if self._lease(db, search_id, now):
+                    self._executor.submit(self._run_claimed, search_id)
+                else:
+                    with self._lock:
+                        self._running.discard(search_id)
+        finally:
+            db.close()
+
+
+# Shared harvester for the API process
+harvest_scheduler = HarvestScheduler()
@@ -0,0 +1,209 @@
+"""
+HTTP Caching
+
+Conditional GETs and an in-process response cache for the read endpoints
+the frontend re-fetches on every navigation.
+
+- Detail routes (/jobs/{id}, /resumes/{id}) derive a weak ETag and
+  Last-Modified from the row's id and updated_at. Only that column is read
+  first, so a revalidation that ends in 304 never loads the row itself.
+- List and model routes go through cached_json(): the serialized body is
+  kept in memory, keyed by route and query string, until a commit touches
+  one of its tables (tracked with session events) or RESPONSE_CACHE_TTL
+  passes, which bounds staleness from writes made by other processes.
+
+Responses carry "Cache-Control: private, no-cache" so browsers keep them but
+revalidate with If-None-Match / If-Modified-Since each time.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from metrics import record_cache_access
+from serialization import dumps
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+# Upper bound on how long a cached body is served without a local write
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "30"))
+# Most cached bodies kept (different pages / query strings count separately)
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+
+CACHE_CONTROL = "private, no-cache"
+
+# Commits seen per table; a cached body is valid while its snapshot matches
+_generations: Dict[str, int] = {}
+_cache: Dict[Tuple[str, str], "_Entry"] = {}
+_lock = threading.Lock()
+
+
+class _Entry:
+    __slots__ = ("content", "etag", "last_modified", "generations", "created")
+
+    def __init__(self, content: bytes, etag: str, last_modified: datetime, generations: Tuple[int, ...]):
+        self.content = content
+        self.etag = etag
+        self.last_modified = last_modified
+        self.generations = generations
+        self.created = time.monotonic()
+
+
+@event.listens_for(Session, "after_flush")
+def _track_tables(session, flush_context):
+    touched = session.info.setdefault("http_cache_touched", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        table = getattr(obj, "__tablename__", None)
+        if table:
+            touched.add(table)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_writes(orm_execute_state):
+    # query(...).update() / .delete() bypass the unit of work
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper is not None:
+        touched = orm_execute_state.session.info.setdefault("http_cache_touched", set())
+        touched.add(orm_execute_state.bind_mapper.local_table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate(session):
+    touched = session.info.pop("http_cache_touched", None)
+    if touched:
+        invalidate(*touched)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard(session):
+    session.info.pop("http_cache_touched", None)
+
+
+def invalidate(*tables: str):
+    """Expire cached bodies built from any of the given tables."""
+    with _lock:
+        for table in tables:
+            _generations[table] = _generations.get(table, 0) + 1
+
+
+def _snapshot(tables: Iterable[str]) -> Tuple[int, ...]:
+    return tuple(_generations.get(table, 0) for table in tables)
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.md5("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'W/"{digest}"'
+
+
+def row_etag(table: str, row_id: int, updated_at: Optional[datetime]) -> str:
+    return make_etag(table, row_id, updated_at.isoformat() if updated_at else "")
+
+
+def _http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" are the same validator
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def _validator_headers(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = _http_date(last_modified)
+    return headers
+
+
+def not_modified(request: Request, etag: str, last_modified: Optional[datetime] = None) -> Optional[Response]:
+    """
+    304 response if the request's validators still match, otherwise None.
+
+    If-None-Match wins over If-Modified-Since when both are sent (RFC 9110).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        fresh = _etag_matches(if_none_match, etag)
+    elif last_modified is not None and request.headers.get("if-modified-since"):
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"])
+        except (TypeError, ValueError):
+            return None
+        modified = last_modified if last_modified.tzinfo else last_modified.replace(tzinfo=timezone.utc)
+        # HTTP dates have second precision
+        fresh = modified.replace(microsecond=0) <= since
+    else:
+        fresh = False
+
+    if not fresh:
+        return None
+    return Response(status_code=304, headers=_validator_headers(etag, last_modified))
+
+
+def json_response(content: Any, etag: str, last_modified: Optional[datetime] = None) -> Response:
+    body = content if isinstance(content, bytes) else dumps(content)
+    return Response(
+        content=body,
+        media_type="application/json",
+        headers=_validator_headers(etag, last_modified)
+    )
+
+
+def conditional_json(
+    request: Request,
+    etag: str,
+    last_modified: Optional[datetime],
+    build: Callable[[], Any]
+) -> Response:
+    """304 if the client is current, otherwise build() serialized with validators."""
+    return not_modified(request, etag, last_modified) or json_response(build(), etag, last_modified)
+
+
+def cached_json(
+    request: Request,
+    name: str,
+    build: Callable[[], Any],
+    tables: Tuple[str, ...] = (),
+    ttl: Optional[int] = None
+) -> Response:
+    """
+    Serve build()'s JSON from the response cache, answering 304 when the
+    client's validators match. The entry is rebuilt once a commit touches one
+    of tables, or after ttl seconds (RESPONSE_CACHE_TTL by default).
+    """
+    ttl = RESPONSE_CACHE_TTL if ttl is None else ttl
+    key = (name, request.url.query)
+    with _lock:
+        generations = _snapshot(tables)
+        entry = _cache.get(key)
+    hit = (
+        RESPONSE_CACHE_ENABLED
+        and entry is not None
+        and entry.generations == generations
+        and time.monotonic() - entry.created < ttl
+    )
+    record_cache_access("response", hit)
+
+    if not hit:
+        body = dumps(build())
+        entry = _Entry(body, make_etag(name, hashlib.md5(body).hexdigest()), datetime.utcnow(), generations)
+        if RESPONSE_CACHE_ENABLED:
+            with _lock:
+                if len(_cache) >= RESPONSE_CACHE_MAX_ENTRIES:
+                    _cache.pop(min(_cache, key=lambda k: _cache[k].created))
+                _cache[key] = entry
+
+    return not_modified(request, entry.etag, entry.last_modified) or json_response(
+        entry.content, entry.etag, entry.last_modified
+    )
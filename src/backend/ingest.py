@@ -0,0 +1,260 @@
+"""
+Job Ingest Pipeline
+
+Single path for getting scraped postings into job_postings, used by
+POST /search/jobs, POST /jobs/search and the saved-search harvester.
+
+Stages are generators over DataFrames, so each job board's results flow
+through as soon as that board finishes:
+
+    scrape -> normalize -> [exclude] -> fingerprint -> dedup -> insert -> hooks
+
+- normalize: column-wise cleanup on the whole DataFrame (no iterrows)
+- fingerprint: md5 of normalized title|company, so reposts of the same job
+  under a new URL are caught
+- dedup: drops repeats within the run and rows whose URL or fingerprint is
+  already stored (chunked IN lookups)
+- insert: batched add_all + flush, one commit per batch
+- hooks: functions registered with @post_ingest_hook run on each inserted
+  batch before its commit (keyword extraction ships by default)
+"""
+
+import hashlib
+import os
+import re
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from job_search import DEFAULT_SITES, format_job_description, iter_site_frames
+from models import JobPosting
+from tracing import span
+
+# Rows inserted and committed together
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "200"))
+# Chunk size for IN (...) lookups against stored URLs/fingerprints
+LOOKUP_CHUNK = 500
+
+# Skills matched in descriptions by the keyword extraction hook
+KEYWORD_VOCABULARY = [
+    "python", "java", "javascript", "typescript", "go", "rust", "c++", "c#", "ruby", "php", "scala", "kotlin",
+    "swift", "sql", "nosql", "react", "angular", "vue", "node.js", "django", "flask", "fastapi", "spring",
+    "docker", "kubernetes", "terraform", "ansible", "aws", "azure", "gcp", "linux", "git", "ci/cd",
+    "api", "rest", "graphql", "microservices", "database", "postgresql", "mysql", "mongodb", "redis",
+    "kafka", "spark", "hadoop", "airflow", "pandas", "machine learning", "deep learning", "pytorch",
+    "tensorflow", "nlp", "llm", "data analysis", "etl", "agile", "scrum", "security", "devops",
+]
+_KEYWORD_PATTERNS = [
+    (keyword, re.compile(r"(?<![\w+#.])" + re.escape(keyword) + r"(?![\w+#])", re.IGNORECASE))
+    for keyword in KEYWORD_VOCABULARY
+]
+
+IngestHook = Callable[[Session, List[JobPosting]], None]
+POST_INGEST_HOOKS: List[IngestHook] = []
+
+
+def post_ingest_hook(fn: IngestHook) -> IngestHook:
+    """Register fn(db, jobs) to run on every inserted batch (jobs have ids)."""
+    POST_INGEST_HOOKS.append(fn)
+    return fn
+
+
+def new_stats() -> Dict:
+    return {"fetched": 0, "excluded": 0, "duplicates": 0, "already_stored": 0, "inserted": 0, "hook_errors": 0}
+
+
+def _normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def job_fingerprint(title: str, company: str) -> str:
+    """
+    md5 of lower-cased, whitespace-collapsed title|company.
+
+    Matches the SQL used to backfill existing rows:
+    md5(trim(regexp_replace(lower(title), '\\s+', ' ', 'g')) || '|' || ...)
+    """
+    return hashlib.md5(f"{_normalize_text(title)}|{_normalize_text(company)}".encode()).hexdigest()
+
+
+def extract_keywords(text: str) -> List[str]:
+    if not text:
+        return []
+    return [keyword for keyword, pattern in _KEYWORD_PATTERNS if pattern.search(text)]
+
+
+def _text_column(df: pd.DataFrame, column: str, default: str) -> pd.Series:
+    if column not in df:
+        return pd.Series(default, index=df.index, dtype=object)
+    values = df[column].astype(object).where(df[column].notna(), "").astype(str).str.strip()
+    return values.mask(values == "", default)
+
+
+def scrape_stage(sites: List[str], failed_sites: Optional[List[str]] = None, **search_kwargs) -> Iterator[pd.DataFrame]:
+    yield from iter_site_frames(sites, failed_sites, **search_kwargs)
+
+
+def normalize_stage(frames: Iterable[pd.DataFrame], stats: Dict) -> Iterator[pd.DataFrame]:
+    """Map JobSpy columns onto job_postings columns for a whole frame at a time."""
+    for df in frames:
+        stats["fetched"] += len(df)
+        normalized = pd.DataFrame({
+            "title": _text_column(df, "title", "N/A"),
+            "company": _text_column(df, "company", "N/A"),
+            "url": _text_column(df, "job_url", ""),
+            "source": _text_column(df, "site", "JobSpy"),
+            "description": _text_column(df, "description", "").map(format_job_description),
+        })
+        yield normalized[normalized["url"] != ""]
+
+
+def exclude_stage(
+    frames: Iterable[pd.DataFrame],
+    exclude: Callable[[pd.DataFrame], pd.Series],
+    stats: Dict
+) -> Iterator[pd.DataFrame]:
+    """Drop rows for which exclude(df) is True (e.g. URLs a saved search has seen)."""
+    for df in frames:
+        mask = exclude(df)
+        stats["excluded"] += int(mask.sum())
+        yield df[~mask]
+
+
+def fingerprint_stage(frames: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    for df in frames:
+        keys = (
+            df["title"].str.lower().str.split().str.join(" ")
+            + "|"
+            + df["company"].str.lower().str.split().str.join(" ")
+        )
+        yield df.assign(fingerprint=keys.map(lambda key: hashlib.md5(key.encode()).hexdigest()))
+
+
+def _lookup(db: Session, column, values: List[str]) -> set:
+    found = set()
+    for i in range(0, len(values), LOOKUP_CHUNK):
+        chunk = values[i:i + LOOKUP_CHUNK]
+        found.update(row[0] for row in db.query(column).filter(column.in_(chunk)))
+    return found
+
+
+def dedup_stage(frames: Iterable[pd.DataFrame], db: Session, stats: Dict) -> Iterator[pd.DataFrame]:
+    """Drop repeats within this run, then anything already stored by URL or fingerprint."""
+    seen_urls, seen_fingerprints = set(), set()
+    for df in frames:
+        before = len(df)
+        df = df.drop_duplicates("url").drop_duplicates("fingerprint")
+        df = df[~df["url"].isin(seen_urls) & ~df["fingerprint"].isin(seen_fingerprints)]
+        stats["duplicates"] += before - len(df)
+        if df.empty:
+            continue
+        seen_urls.update(df["url"])
+        seen_fingerprints.update(df["fingerprint"])
+
+        stored_urls = _lookup(db, JobPosting.url, df["url"].tolist())
+        stored_fingerprints = _lookup(db, JobPosting.fingerprint, df["fingerprint"].tolist())
+        stored = df["url"].isin(stored_urls) | df["fingerprint"].isin(stored_fingerprints)
+        stats["already_stored"] += int(stored.sum())
+        yield df[~stored]
+
+
+def _rebatch(frames: Iterable[pd.DataFrame], batch_size: int) -> Iterator[List[Dict]]:
+    pending: List[Dict] = []
+    for df in frames:
+        pending.extend(df.to_dict("records"))
+        while len(pending) >= batch_size:
+            yield pending[:batch_size]
+            pending = pending[batch_size:]
+    if pending:
+        yield pending
+
+
+def insert_stage(
+    frames: Iterable[pd.DataFrame],
+    db: Session,
+    stats: Dict,
+    batch_size: int = INGEST_BATCH_SIZE
+) -> Iterator[List[Dict]]:
+    """Insert in batches, run the post-ingest hooks, commit; yields id/title/company per batch."""
+    for records in _rebatch(frames, max(batch_size, 1)):
+        with span("ingest.insert", rows=len(records)):
+            jobs = [JobPosting(**record) for record in records]
+            db.add_all(jobs)
+            db.flush()
+            for hook in POST_INGEST_HOOKS:
+                try:
+                    with span("ingest.hook", hook=hook.__name__):
+                        hook(db, jobs)
+                except Exception as e:
+                    stats["hook_errors"] += 1
+                    print(f"Post-ingest hook {hook.__name__} failed: {e}")
+            # Read before commit expires the objects
+            summaries = [{"id": job.id, "title": job.title, "company": job.company} for job in jobs]
+            db.commit()
+        stats["inserted"] += len(summaries)
+        yield summaries
+
+
+def ingest_frames(
+    db: Session,
+    frames: Iterable[pd.DataFrame],
+    exclude: Optional[Callable[[pd.DataFrame], pd.Series]] = None,
+    batch_size: int = INGEST_BATCH_SIZE
+) -> Dict:
+    """
+    Run JobSpy-shaped DataFrames through the pipeline.
+
+    Returns stats (fetched, excluded, duplicates, already_stored, inserted,
+    hook_errors) plus "jobs": id/title/company of every inserted posting.
+    """
+    stats = new_stats()
+    stream = normalize_stage(frames, stats)
+    if exclude is not None:
+        stream = exclude_stage(stream, exclude, stats)
+    stream = fingerprint_stage(stream)
+    stream = dedup_stage(stream, db, stats)
+
+    inserted: List[Dict] = []
+    with span("ingest") as ingest_span:
+        for summaries in insert_stage(stream, db, stats, batch_size):
+            inserted.extend(summaries)
+        for key, value in stats.items():
+            ingest_span.set_attribute(key, value)
+    return {**stats, "jobs": inserted}
+
+
+def ingest_search(
+    db: Session,
+    search_term: str,
+    location: str = "Remote",
+    results_wanted: int = 10,
+    hours_old: int = 72,
+    sites: Optional[List[str]] = None,
+    exclude: Optional[Callable[[pd.DataFrame], pd.Series]] = None,
+    country_indeed: str = "USA"
+) -> Dict:
+    """
+    Scrape the given sites and ingest the results (see ingest_frames).
+    The result's "failed_sites" lists boards whose scrape raised.
+    """
+    failed_sites: List[str] = []
+    frames = scrape_stage(
+        sites or DEFAULT_SITES,
+        failed_sites,
+        search_term=search_term,
+        location=location,
+        results_wanted=results_wanted,
+        hours_old=hours_old,
+        country_indeed=country_indeed
+    )
+    result = ingest_frames(db, frames, exclude=exclude)
+    result["failed_sites"] = failed_sites
+    return result
+
+
+@post_ingest_hook
+def extract_keywords_hook(db: Session, jobs: List[JobPosting]):
+    """Store matched skills so matching/ranking doesn't rescan descriptions."""
+    for job in jobs:
+        job.keywords = ",".join(extract_keywords(f"{job.title} {job.description}"))
@@ -5,8 +5,71 @@ Fetches job postings from multiple sources (Indeed, LinkedIn, ZipRecruiter, etc.
 
 from jobspy import scrape_jobs
 import pandas as pd
-from typing import List, Dict, Optional
+import contextvars
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, List, Optional
 from datetime import datetime
+from metrics import SCRAPE_SECONDS, SCRAPE_RESULTS
+from tracing import span
+from prompt_builder import truncate_to_tokens
+
+
+DEFAULT_SITES = ["indeed", "linkedin", "zip_recruiter"]
+
+
+def _scrape_site(site: str, kwargs: Dict) -> Optional[pd.DataFrame]:
+    """One board's results; None if the scrape failed (an empty frame means no results)."""
+    start_time = time.perf_counter()
+    with span("scrape", site=site) as scrape_span:
+        try:
+            df = scrape_jobs(site_name=[site], **kwargs)
+        except Exception as e:
+            print(f"Error scraping {site}: {e}")
+            df = None
+        scrape_span.set_attribute("results", 0 if df is None else len(df))
+    SCRAPE_SECONDS.labels(site=site).observe(time.perf_counter() - start_time)
+    SCRAPE_RESULTS.labels(site=site).inc(0 if df is None else len(df))
+    return df
+
+
+def iter_site_frames(
+    site_names: List[str],
+    failed_sites: Optional[List[str]] = None,
+    **kwargs
+) -> Iterator[pd.DataFrame]:
+    """
+    Scrape each site in parallel, yielding each site's DataFrame as it finishes.
+    
+    One call per site lets us time every board separately, and a failing
+    board no longer loses the results from the others.
+    
+    Args:
+        site_names: JobSpy site names (e.g. "indeed", "linkedin")
+        failed_sites: Optional list that the names of boards whose scrape
+                      failed are appended to
+        **kwargs: Passed through to JobSpy's scrape_jobs
+    """
+    # Pool threads don't inherit context; copy it so scrape spans join the trace
+    with ThreadPoolExecutor(max_workers=max(len(site_names), 1)) as pool:
+        futures = {
+            pool.submit(contextvars.copy_context().run, _scrape_site, site, kwargs): site
+            for site in site_names
+        }
+        for future in as_completed(futures):
+            df = future.result()
+            if df is None:
+                if failed_sites is not None:
+                    failed_sites.append(futures[future])
+            elif not df.empty:
+                yield df
+
+
+def scrape_sites(site_names: List[str], **kwargs) -> pd.DataFrame:
+    """Scrape each site in parallel and combine the results."""
+    frames = list(iter_site_frames(site_names, **kwargs))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
 
 
 def search_jobs(
@@ -32,8 +95,8 @@ def search_jobs(
     
     try:
         # Use JobSpy to scrape jobs
-        jobs_df = scrape_jobs(
-            site_name=["indeed", "linkedin", "zip_recruiter"],
+        jobs_df = scrape_sites(
+            DEFAULT_SITES,
             search_term=search_term,
             location=location,
             results_wanted=results_wanted,
@@ -84,18 +147,23 @@ def deduplicate_jobs(jobs: List[Dict]) -> List[Dict]:
     return unique_jobs
 
 
-def format_job_description(description: str, max_length: int = 1000) -> str:
+def format_job_description(description: str, max_length: Optional[int] = None) -> str:
     """
-    Clean and truncate job description
+    Clean whitespace in a job description, keeping its line breaks.
+
+    The text is otherwise stored as posted: boilerplate is only stripped from
+    the copy that goes into a prompt (see prompt_builder), so nothing in the
+    stored description is lost. Cut at a word boundary when max_length is given.
     """
     if not description:
         return "No description available"
     
-    # Remove excessive whitespace
-    cleaned = " ".join(description.split())
+    # Remove excessive whitespace; at most one blank line between paragraphs
+    lines = [" ".join(line.split()) for line in description.strip().splitlines()]
+    cleaned = re.sub(r"\n{3,}", "\n\n", "\n".join(lines))
     
     # Truncate if too long
-    if len(cleaned) > max_length:
-        cleaned = cleaned[:max_length] + "..."
+    if max_length and len(cleaned) > max_length:
+        cleaned = truncate_to_tokens(cleaned, max_length, {"chars_per_token": 1.0})
     
     return cleaned
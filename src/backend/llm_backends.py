@@ -0,0 +1,457 @@
+"""
+LLM Backends
+Generation backends behind ai_service: Ollama, any OpenAI-compatible local
+server (llama.cpp, vLLM, LM Studio...) and a stub/replay backend that serves
+recorded responses with configurable latency, for load testing the API tier
+without real models.
+
+Every backend returns Ollama-style results (response, eval_count,
+prompt_eval_count and *_duration in nanoseconds) so callers don't care which
+one is active.
+
+Run a standalone Ollama-compatible stub server:
+    python llm_backends.py serve --port 11434
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "ollama")  # ollama | openai | stub
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434")
+# How long Ollama keeps a model (and its KV cache) loaded after a request
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "http://localhost:8080/v1")
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+# Map our model names to the server's, e.g. "llama3=Meta-Llama-3-8B-Instruct"
+OPENAI_MODEL_MAP = os.getenv("OPENAI_MODEL_MAP", "")
+
+# Stub backend: JSONL of recorded responses, plus simulated speed
+LLM_STUB_RECORDINGS = os.getenv("LLM_STUB_RECORDINGS", "")
+LLM_STUB_LATENCY_MS = float(os.getenv("LLM_STUB_LATENCY_MS", "50"))
+LLM_STUB_PREFILL_TOKENS_PER_SEC = float(os.getenv("LLM_STUB_PREFILL_TOKENS_PER_SEC", "400"))
+LLM_STUB_TOKENS_PER_SEC = float(os.getenv("LLM_STUB_TOKENS_PER_SEC", "25"))
+LLM_STUB_JITTER = float(os.getenv("LLM_STUB_JITTER", "0.0"))  # +/- fraction of latency
+
+# When set, every real response is appended here for later replay
+LLM_RECORD_PATH = os.getenv("LLM_RECORD_PATH", "")
+
+REQUEST_TIMEOUT = 120
+
+_record_lock = threading.Lock()
+
+
+def _parse_model_map(spec: str) -> Dict[str, str]:
+    mapping = {}
+    for part in spec.split(","):
+        if "=" in part:
+            name, target = part.split("=", 1)
+            mapping[name.strip()] = target.strip()
+    return mapping
+
+
+def _prompt_key(prompt: str) -> str:
+    return hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:16]
+
+
+def _record(model_name: str, prompt: str, text: str, result: Dict):
+    """Append a real response to LLM_RECORD_PATH for the stub backend."""
+    if not LLM_RECORD_PATH or not text:
+        return
+    entry = {
+        "model": model_name,
+        "prompt_key": _prompt_key(prompt),
+        "response": text,
+        "eval_count": result.get("eval_count", 0),
+        "prompt_eval_count": result.get("prompt_eval_count", 0),
+    }
+    try:
+        with _record_lock, open(LLM_RECORD_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry) + "\n")
+    except OSError as e:
+        print(f"Warning: could not record LLM response: {e}")
+
+
+class LLMBackend(ABC):
+    """Base class for generation backends."""
+
+    name = "base"
+
+    @abstractmethod
+    def generate(
+        self,
+        model_name: str,
+        prompt: str,
+        options: Dict,
+        cancel_event: Optional[threading.Event] = None
+    ) -> Tuple[str, Dict, bool]:
+        """
+        Generate a completion for prompt.
+
+        Returns:
+            Tuple of (response_text, ollama_style_result, cancelled)
+        """
+
+    @abstractmethod
+    def list_models(self) -> List[str]:
+        """Names of the models this backend can serve."""
+
+
+class OllamaBackend(LLMBackend):
+    """Ollama's native /api/generate."""
+
+    name = "ollama"
+
+    def __init__(self, base_url: str = OLLAMA_URL, keep_alive: str = OLLAMA_KEEP_ALIVE):
+        self.base_url = base_url
+        self.keep_alive = keep_alive
+
+    def generate(self, model_name, prompt, options, cancel_event=None):
+        payload = {
+            "model": model_name,
+            "prompt": prompt,
+            "stream": False,
+            "keep_alive": self.keep_alive,
+            "options": options,
+        }
+
+        # Without a cancel event a single blocking request is cheapest
+        if cancel_event is None:
+            response = requests.post(f"{self.base_url}/api/generate", json=payload, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            result = response.json()
+            _record(model_name, prompt, result.get("response", ""), result)
+            return result.get("response", ""), result, False
+
+        # Stream so the connection can be closed on cancel, which makes
+        # Ollama stop generating
+        chunks = []
+        result: Dict = {}
+        with requests.post(
+            f"{self.base_url}/api/generate",
+            json={**payload, "stream": True},
+            stream=True,
+            timeout=REQUEST_TIMEOUT
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if cancel_event.is_set():
+                    return "".join(chunks), result, True
+                if not line:
+                    continue
+                result = json.loads(line)
+                chunks.append(result.get("response", ""))
+                if result.get("done"):
+                    break
+        text = "".join(chunks)
+        _record(model_name, prompt, text, result)
+        return text, result, False
+
+    def list_models(self):
+        response = requests.get(f"{self.base_url}/api/tags", timeout=5)
+        response.raise_for_status()
+        return [m.get("name", "") for m in response.json().get("models", [])]
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    """Any server implementing the OpenAI /v1/chat/completions API."""
+
+    name = "openai"
+
+    def __init__(self, base_url: str = OPENAI_BASE_URL, api_key: str = OPENAI_API_KEY, model_map: Optional[Dict[str, str]] = None):
+        self.base_url = base_url.rstrip("/")
+        self.api_key = api_key
+        self.model_map = model_map if model_map is not None else _parse_model_map(OPENAI_MODEL_MAP)
+
+    def _headers(self) -> Dict:
+        return {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+
+    def generate(self, model_name, prompt, options, cancel_event=None):
+        payload = {
+            "model": self.model_map.get(model_name, model_name),
+            "messages": [{"role": "user", "content": prompt}],
+            "max_tokens": options.get("num_predict"),
+            "temperature": options.get("temperature"),
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+        if "seed" in options:
+            payload["seed"] = options["seed"]
+
+        start = time.perf_counter()
+        first_token_at = None
+        chunks = []
+        usage: Dict = {}
+        cancelled = False
+
+        with requests.post(
+            f"{self.base_url}/chat/completions",
+            json=payload,
+            headers=self._headers(),
+            stream=True,
+            timeout=REQUEST_TIMEOUT
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if cancel_event is not None and cancel_event.is_set():
+                    cancelled = True
+                    break
+                if not line or not line.startswith(b"data:"):
+                    continue
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    break
+                event = json.loads(data)
+                usage = event.get("usage") or usage
+                for choice in event.get("choices", []):
+                    delta = (choice.get("delta") or {}).get("content")
+                    if delta:
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                        chunks.append(delta)
+
+        end = time.perf_counter()
+        first_token_at = first_token_at or end
+        text = "".join(chunks)
+        # Time to first token stands in for prefill, the rest for decode
+        result = {
+            "response": text,
+            "done": not cancelled,
+            "eval_count": usage.get("completion_tokens", len(chunks)),
+            "prompt_eval_count": usage.get("prompt_tokens", 0),
+            "prompt_eval_duration": int((first_token_at - start) * 1e9),
+            "eval_duration": int((end - first_token_at) * 1e9),
+            "total_duration": int((end - start) * 1e9),
+        }
+        if not cancelled:
+            _record(model_name, prompt, text, result)
+        return text, result, cancelled
+
+    def list_models(self):
+        response = requests.get(f"{self.base_url}/models", headers=self._headers(), timeout=5)
+        response.raise_for_status()
+        served = {m.get("id", "") for m in response.json().get("data", [])}
+        reverse = {target: name for name, target in self.model_map.items()}
+        return [reverse.get(model_id, model_id) for model_id in served]
+
+
+class StubBackend(LLMBackend):
+    """
+    Deterministic stand-in for a real model server.
+
+    Replays responses from LLM_STUB_RECORDINGS (JSONL written via
+    LLM_RECORD_PATH, or by hand) and sleeps for a simulated prefill and
+    decode time, so queueing, caching and DB throughput can be benchmarked
+    on a plain box. Without recordings it echoes a resume-shaped text.
+    """
+
+    name = "stub"
+
+    def __init__(
+        self,
+        recordings_path: str = LLM_STUB_RECORDINGS,
+        latency_ms: float = LLM_STUB_LATENCY_MS,
+        prefill_tokens_per_sec: float = LLM_STUB_PREFILL_TOKENS_PER_SEC,
+        tokens_per_sec: float = LLM_STUB_TOKENS_PER_SEC,
+        jitter: float = LLM_STUB_JITTER
+    ):
+        self.latency = latency_ms / 1000.0
+        self.prefill_tokens_per_sec = max(prefill_tokens_per_sec, 1e-6)
+        self.tokens_per_sec = max(tokens_per_sec, 1e-6)
+        self.jitter = jitter
+        self.by_prompt: Dict[Tuple[str, str], Dict] = {}
+        self.by_model: Dict[str, List[Dict]] = {}
+        if recordings_path:
+            self._load(recordings_path)
+
+    def _load(self, path: str):
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    entry = json.loads(line)
+                    model_name = entry.get("model", "*")
+                    if entry.get("prompt_key"):
+                        self.by_prompt[(model_name, entry["prompt_key"])] = entry
+                    self.by_model.setdefault(model_name, []).append(entry)
+            print(f"Stub LLM backend loaded {sum(len(v) for v in self.by_model.values())} recordings")
+        except (OSError, ValueError) as e:
+            print(f"Warning: could not load stub recordings from {path}: {e}")
+
+    def _pick(self, model_name: str, prompt: str) -> Dict:
+        key = _prompt_key(prompt)
+        entry = self.by_prompt.get((model_name, key))
+        if entry:
+            return entry
+        pool = self.by_model.get(model_name) or self.by_model.get("*") or []
+        if pool:
+            return pool[int(key, 16) % len(pool)]
+        # Synthesize a response from the resume section of the prompt
+        resume = prompt.split("CANDIDATE RESUME:", 1)[-1].split("JOB DESCRIPTION:", 1)[0].strip()
+        text = f"# Tailored Resume ({model_name})\n\n{resume}\n"
+        return {"response": text}
+
+    def _stream(self, entry: Dict, prompt: str, options: Dict, cancel_event) -> Iterator[Tuple[str, Dict]]:
+        """Yield (token_text, result_so_far) at the simulated decode rate."""
+        text = entry.get("response", "")
+        limit = options.get("num_predict") or 0
+        words = text.split(" ")
+        if limit and len(words) > limit:
+            words = words[:limit]
+        prompt_tokens = entry.get("prompt_eval_count") or len(prompt) // 4
+        eval_count = entry.get("eval_count") or len(words)
+
+        scale = 1.0 + random.uniform(-self.jitter, self.jitter) if self.jitter else 1.0
+        prefill = (self.latency + prompt_tokens / self.prefill_tokens_per_sec) * scale
+        per_token = (eval_count / self.tokens_per_sec) * scale / max(len(words), 1)
+
+        start = time.perf_counter()
+        if cancel_event is not None and cancel_event.wait(prefill):
+            return
+        if cancel_event is None:
+            time.sleep(prefill)
+        decode_start = time.perf_counter()
+
+        for index, word in enumerate(words):
+            if cancel_event is not None and cancel_event.wait(per_token):
+                return
+            if cancel_event is None:
+                time.sleep(per_token)
+            done = index == len(words) - 1
+            now = time.perf_counter()
+            yield (word if index == 0 else " " + word), {
+                "done": done,
+                "eval_count": eval_count,
+                "prompt_eval_count": prompt_tokens,
+                "prompt_eval_duration": int((decode_start - start) * 1e9),
+                "eval_duration": int((now - decode_start) * 1e9),
+                "total_duration": int((now - start) * 1e9),
+            }
+
+    def generate(self, model_name, prompt, options, cancel_event=None):
+        entry = self._pick(model_name, prompt)
+        chunks = []
+        result: Dict = {}
+        for token, result in self._stream(entry, prompt, options, cancel_event):
+            chunks.append(token)
+        cancelled = bool(cancel_event is not None and cancel_event.is_set())
+        text = "".join(chunks)
+        return text, {**result, "response": text, "done": not cancelled}, cancelled
+
+    def list_models(self):
+        from ai_service import AVAILABLE_MODELS
+        return list(AVAILABLE_MODELS)
+
+
+BACKENDS = {
+    "ollama": OllamaBackend,
+    "openai": OpenAICompatibleBackend,
+    "stub": StubBackend,
+}
+
+_backend: Optional[LLMBackend] = None
+
+
+def get_backend() -> LLMBackend:
+    """The configured backend (LLM_BACKEND), created on first use."""
+    global _backend
+    if _backend is None:
+        backend_class = BACKENDS.get(LLM_BACKEND)
+        if backend_class is None:
+            print(f"Unknown LLM_BACKEND '{LLM_BACKEND}', using ollama")
+            backend_class = OllamaBackend
+        _backend = backend_class()
+    return _backend
+
+
+def set_backend(backend: LLMBackend):
+    """Swap the active backend (benchmarks, load tests)."""
+    global _backend
+    _backend = backend
+
+
+def serve_stub(host: str = "0.0.0.0", port: int = 11434):
+    """
+    Serve the stub backend over Ollama's HTTP API (/api/generate, /api/tags),
+    so a full stack can point OLLAMA_URL at it.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    backend = StubBackend()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send_json(self, body: Dict, status: int = 200):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == "/api/tags":
+                self._send_json({"models": [{"name": f"{m}:latest"} for m in backend.list_models()]})
+            else:
+                self._send_json({"error": "not found"}, 404)
+
+        def do_POST(self):
+            if self.path != "/api/generate":
+                self._send_json({"error": "not found"}, 404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            payload = json.loads(self.rfile.read(length) or b"{}")
+            model_name = payload.get("model", "")
+            prompt = payload.get("prompt", "")
+            options = payload.get("options") or {}
+
+            if not payload.get("stream", True):
+                text, result, _ = backend.generate(model_name, prompt, options)
+                self._send_json({"model": model_name, **result})
+                return
+
+            entry = backend._pick(model_name, prompt)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for token, result in backend._stream(entry, prompt, options, None):
+                    line = json.dumps({"model": model_name, "response": token, **result}).encode("utf-8") + b"\n"
+                    self.wfile.write(f"{len(line):X}\r\n".encode() + line + b"\r\n")
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                # Client cancelled; stop "generating" like Ollama does
+                pass
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    print(f"Stub LLM server listening on http://{host}:{port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="LLM backend utilities")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    serve_parser = subparsers.add_parser("serve", help="Run an Ollama-compatible stub server")
+    serve_parser.add_argument("--host", default="0.0.0.0")
+    serve_parser.add_argument("--port", type=int, default=11434)
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve_stub(args.host, args.port)
@@ -1,7 +1,14 @@
-from fastapi import FastAPI
+import threading
+import time
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from metrics import HTTP_REQUEST_SECONDS, instrument_engine
+from serialization import JSONResponseClass
+from compression import CompressionMiddleware
+import tracing
+import profiling
 
-app = FastAPI(title="Auto Job Resume API")
+app = FastAPI(title="Auto Job Resume API", default_response_class=JSONResponseClass)
 
 # CORS Configuration
 origins = ["*"]  # Allow all origins for development
@@ -14,18 +21,104 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Brotli / gzip for JSON and text bodies above COMPRESSION_MIN_SIZE
+app.add_middleware(CompressionMiddleware)
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    start_time = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template so /applications/{id} stays one series
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.labels(
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status)
+        ).observe(time.perf_counter() - start_time)
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    with tracing.span("http.request", method=request.method, path=request.url.path) as request_span:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route is not None:
+            request_span.name = f"{request.method} {route.path}"
+        request_span.set_attribute("status", response.status_code)
+        if request_span.trace_id:
+            response.headers["X-Trace-Id"] = request_span.trace_id
+        return response
+
+@app.middleware("http")
+async def profile_request(request: Request, call_next):
+    # Opt-in: "X-Profile: 1" plus a valid X-Profiling-Token samples this request
+    if not request.headers.get(profiling.PROFILE_HEADER) or not profiling.is_authorized(
+        request.headers.get(profiling.TOKEN_HEADER)
+    ):
+        return await call_next(request)
+    with profiling.RequestProfile(request.method, request.url.path) as profile:
+        response = await call_next(request)
+    response.headers["X-Profile-Id"] = profile.id
+    return response
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to Auto Job Resume API"}
 
-from routers import resumes, jobs, search, applications
-from models import Base
-from database import engine
+from routers import resumes, jobs, search, applications, metrics, debug, saved_searches, stats, health, users, data
+from database import engine, SessionLocal
+import migrate
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+# The schema is managed by `python migrate.py upgrade`, never at startup
+instrument_engine(engine)
+tracing.instrument_engine(engine)
+tracing.instrument_sessions(SessionLocal)
 
 app.include_router(resumes.router)
 app.include_router(jobs.router)
 app.include_router(search.router)
 app.include_router(applications.router)
+app.include_router(metrics.router)
+app.include_router(debug.router)
+app.include_router(saved_searches.router)
+app.include_router(stats.router)
+app.include_router(health.router)
+app.include_router(users.router)
+app.include_router(data.router)
+
+from harvester import harvest_scheduler, HARVEST_ENABLED
+from ats_service import ATS_PRELOAD, preload_ats_model
+from retention import RETENTION_ENABLED, retention_scheduler
+import auto_tailor  # registers the post-ingest auto-tailoring hook
+
+@app.on_event("startup")
+def check_migrations():
+    try:
+        schema = migrate.status(engine)
+    except Exception as e:
+        print(f"Warning: could not read migration status: {e}")
+        return
+    if not schema["up_to_date"]:
+        pending = ", ".join(m["version"] for m in schema["pending"])
+        print(f"Warning: database migrations pending ({pending}); run `python migrate.py upgrade`")
+
+@app.on_event("startup")
+def start_harvester():
+    if HARVEST_ENABLED:
+        harvest_scheduler.start()
+
+@app.on_event("startup")
+def start_retention():
+    if RETENTION_ENABLED:
+        retention_scheduler.start()
+
+@app.on_event("startup")
+def preload_ats():
+    # In the background so the API serves immediately; ATS requests that
+    # arrive meanwhile wait for this load instead of starting their own
+    if ATS_PRELOAD:
+        threading.Thread(target=preload_ats_model, name="ats-preload", daemon=True).start()
@@ -0,0 +1,202 @@
+"""
+Prometheus Metrics
+
+Histograms and counters for HTTP latency, LLM prefill/decode, ATS inference,
+PDF rendering, scraping and DB queries, plus gauges for connection pool,
+generation queue and cache hit ratios. Served at /metrics.
+
+prometheus_client is optional; without it every metric is a no-op.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+try:
+    from prometheus_client import Counter, Gauge, Histogram, generate_latest, CONTENT_TYPE_LATEST
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    print("Warning: prometheus_client not installed. Metrics are disabled.")
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _NoopMetric:
+    """Stands in for a metric when prometheus_client is missing."""
+
+    def labels(self, *args, **kwargs):
+        return self
+
+    def observe(self, value):
+        pass
+
+    def inc(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+
+def _histogram(name, documentation, labelnames=(), **kwargs):
+    if not PROMETHEUS_AVAILABLE:
+        return _NoopMetric()
+    return Histogram(name, documentation, labelnames, **kwargs)
+
+
+def _counter(name, documentation, labelnames=()):
+    if not PROMETHEUS_AVAILABLE:
+        return _NoopMetric()
+    return Counter(name, documentation, labelnames)
+
+
+def _gauge(name, documentation, labelnames=()):
+    if not PROMETHEUS_AVAILABLE:
+        return _NoopMetric()
+    return Gauge(name, documentation, labelnames)
+
+
+# Buckets sized for CPU-only inference (seconds to minutes)
+LLM_BUCKETS = (0.5, 1, 2.5, 5, 10, 20, 30, 45, 60, 90, 120, 180, 300)
+FAST_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+HTTP_REQUEST_SECONDS = _histogram(
+    "http_request_duration_seconds", "HTTP request latency", ("method", "route", "status"),
+    buckets=FAST_BUCKETS + (30, 60, 120)
+)
+
+LLM_GENERATION_SECONDS = _histogram(
+    "llm_generation_seconds", "Wall time of a generation request", ("model", "backend"), buckets=LLM_BUCKETS
+)
+LLM_PROMPT_EVAL_SECONDS = _histogram(
+    "llm_prompt_eval_seconds", "Prompt evaluation (prefill) time reported by the backend", ("model", "backend"),
+    buckets=LLM_BUCKETS
+)
+LLM_EVAL_SECONDS = _histogram(
+    "llm_eval_seconds", "Token generation (decode) time reported by the backend", ("model", "backend"),
+    buckets=LLM_BUCKETS
+)
+LLM_TOKENS_PER_SECOND = _histogram(
+    "llm_tokens_per_second", "Decode throughput", ("model", "backend"),
+    buckets=(1, 2, 5, 10, 15, 20, 30, 50, 100, 200)
+)
+LLM_PROMPT_TOKENS = _counter("llm_prompt_tokens_total", "Prompt tokens evaluated", ("model",))
+LLM_GENERATED_TOKENS = _counter("llm_generated_tokens_total", "Tokens generated", ("model",))
+LLM_GENERATIONS = _counter("llm_generations_total", "Generations by outcome", ("model", "outcome"))
+
+ATS_INFERENCE_SECONDS = _histogram(
+    "ats_inference_seconds", "ATS scoring time", ("method",), buckets=FAST_BUCKETS
+)
+PDF_RENDER_SECONDS = _histogram("pdf_render_seconds", "PDF render time", buckets=FAST_BUCKETS)
+SCRAPE_SECONDS = _histogram(
+    "scrape_seconds", "Job board scrape time per site", ("site",), buckets=(1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+)
+SCRAPE_RESULTS = _counter("scrape_results_total", "Postings returned per site", ("site",))
+
+DB_QUERY_SECONDS = _histogram("db_query_seconds", "DB statement execution time", ("operation",), buckets=FAST_BUCKETS)
+DB_POOL_CHECKED_OUT = _gauge("db_pool_checked_out", "Connections currently checked out")
+DB_POOL_SIZE = _gauge("db_pool_size", "Configured connection pool size")
+DB_POOL_OVERFLOW = _gauge("db_pool_overflow", "Connections open beyond the pool size")
+
+GENERATION_QUEUE_DEPTH = _gauge("generation_queue_depth", "Queued generations", ("model",))
+GENERATION_RUNNING = _gauge("generation_running", "Running generations", ("model",))
+GENERATION_QUEUE_WAIT_SECONDS = _histogram(
+    "generation_queue_wait_seconds", "Time a generation waited in the scheduler queue", ("model",),
+    buckets=(0.01, 0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600)
+)
+
+CACHE_REQUESTS = _counter("cache_requests_total", "Cache lookups", ("cache", "result"))
+CACHE_HIT_RATIO = _gauge("cache_hit_ratio", "Hit ratio since process start", ("cache",))
+
+_cache_counts: Dict[str, Dict[str, int]] = {}
+_queue_models = set()
+_pool_engine = None
+
+
+@contextmanager
+def timed(histogram, **labels):
+    """Observe the duration of the with-block on histogram."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metric = histogram.labels(**labels) if labels else histogram
+        metric.observe(time.perf_counter() - start)
+
+
+def observe_generation(backend: str, metadata: Dict):
+    """Record a finished generation from ai_service metadata."""
+    model = metadata.get("model_used") or "unknown"
+    if metadata.get("cancelled"):
+        LLM_GENERATIONS.labels(model=model, outcome="cancelled").inc()
+        return
+    if not metadata.get("tokens_used"):
+        LLM_GENERATIONS.labels(model=model, outcome="failed").inc()
+        return
+
+    LLM_GENERATIONS.labels(model=model, outcome="completed").inc()
+    LLM_GENERATION_SECONDS.labels(model=model, backend=backend).observe(metadata.get("generation_time", 0.0))
+    LLM_PROMPT_EVAL_SECONDS.labels(model=model, backend=backend).observe(metadata.get("prompt_eval_time", 0.0))
+    LLM_EVAL_SECONDS.labels(model=model, backend=backend).observe(metadata.get("eval_time", 0.0))
+    LLM_PROMPT_TOKENS.labels(model=model).inc(metadata.get("prompt_tokens", 0) or 0)
+    LLM_GENERATED_TOKENS.labels(model=model).inc(metadata.get("tokens_used", 0))
+    if metadata.get("eval_time"):
+        LLM_TOKENS_PER_SECOND.labels(model=model, backend=backend).observe(
+            metadata["tokens_used"] / metadata["eval_time"]
+        )
+
+
+def record_cache_access(cache: str, hit: bool):
+    """Count a lookup against one of the in-process caches."""
+    CACHE_REQUESTS.labels(cache=cache, result="hit" if hit else "miss").inc()
+    counts = _cache_counts.setdefault(cache, {"hit": 0, "miss": 0})
+    counts["hit" if hit else "miss"] += 1
+
+
+def instrument_engine(engine):
+    """Time every statement on engine and report its pool usage."""
+    from sqlalchemy import event
+
+    global _pool_engine
+    _pool_engine = engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("query_start_time")
+        if not starts:
+            return
+        words = statement.split(None, 1)
+        operation = words[0].upper() if words else "OTHER"
+        DB_QUERY_SECONDS.labels(operation=operation).observe(time.perf_counter() - starts.pop())
+
+
+def _refresh_gauges():
+    """Sample values that are cheaper to read at scrape time than to track."""
+    if _pool_engine is not None:
+        pool = _pool_engine.pool
+        for gauge, attr in ((DB_POOL_CHECKED_OUT, "checkedout"), (DB_POOL_SIZE, "size"), (DB_POOL_OVERFLOW, "overflow")):
+            if hasattr(pool, attr):
+                gauge.set(getattr(pool, attr)())
+
+    from generation_scheduler import scheduler
+    stats = scheduler.stats()
+    # Keep reporting models seen before so their gauges drop back to zero
+    _queue_models.update(stats["queued_by_model"], stats["running_by_model"])
+    for model in _queue_models:
+        GENERATION_QUEUE_DEPTH.labels(model=model).set(stats["queued_by_model"].get(model, 0))
+        GENERATION_RUNNING.labels(model=model).set(stats["running_by_model"].get(model, 0))
+
+    for cache, counts in _cache_counts.items():
+        total = counts["hit"] + counts["miss"]
+        CACHE_HIT_RATIO.labels(cache=cache).set(counts["hit"] / total if total else 0.0)
+
+
+def render_metrics() -> Optional[bytes]:
+    """Prometheus text exposition, or None when metrics are disabled."""
+    if not PROMETHEUS_AVAILABLE:
+        return None
+    _refresh_gauges()
+    return generate_latest()
@@ -0,0 +1,208 @@
+"""
+Create any table that doesn't exist yet, as the schema stood when migrations
+were introduced.
+
+A new database gets that whole schema here, and the later migrations bring
+it up to date. An existing database only gains the tables that the old
+ad-hoc scripts and create_all() never created; the migrations after this one
+bring its existing tables up to date.
+
+The tables are defined here rather than imported from models, so this
+migration creates the same schema whatever models.py looks like later.
+"""
+
+from sqlalchemy import (
+    Boolean,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+    Text,
+    UniqueConstraint,
+)
+
+metadata = MetaData()
+
+Table(
+    "users", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("email", String, unique=True, index=True),
+    Column("hashed_password", String),
+    Column("created_at", DateTime),
+    Column("daily_generation_quota", Integer, nullable=True),
+)
+
+Table(
+    "resumes", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id")),
+    Column("name", String),
+    Column("file_path", String),
+    Column("content_text", Text),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Column("is_base", Boolean),
+    Column("ats_score", Integer, nullable=True),
+    Column("ats_grade", String, nullable=True),
+    Column("ats_analyzed_at", DateTime, nullable=True),
+    Index("ix_resumes_user_created", "user_id", "created_at"),
+)
+
+Table(
+    "job_postings", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=True),
+    Column("title", String),
+    Column("company", String),
+    Column("description", Text),
+    Column("url", String),
+    Column("source", String),
+    Column("fetched_at", DateTime),
+    Column("updated_at", DateTime),
+    Column("fingerprint", String, nullable=True, index=True),
+    Column("keywords", Text, nullable=True),
+    Index("ix_job_postings_user_fetched", "user_id", "fetched_at"),
+)
+
+Table(
+    "content_blobs", metadata,
+    Column("hash", String, primary_key=True),
+    Column("codec", String),
+    Column("base_hash", String, ForeignKey("content_blobs.hash"), nullable=True),
+    Column("data", LargeBinary),
+    Column("size", Integer),
+    Column("stored_size", Integer),
+    Column("created_at", DateTime),
+)
+
+Table(
+    "applications", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id")),
+    Column("job_id", Integer, ForeignKey("job_postings.id")),
+    Column("resume_id", Integer, ForeignKey("resumes.id")),
+    Column("status", String),
+    Column("generated_content", Text),
+    Column("content_hash", String, ForeignKey("content_blobs.hash"), nullable=True, index=True),
+    Column("pdf_path", String, nullable=True),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Column("model_used", String, nullable=True),
+    Column("model_generation_time", Integer, nullable=True),
+    Column("model_tokens_used", Integer, nullable=True),
+    Column("model_prompt_tokens", Integer, nullable=True),
+    Column("ats_score", Integer, nullable=True),
+    Column("ats_grade", String, nullable=True),
+    Column("ats_feedback", Text, nullable=True),
+    Column("ats_analyzed_at", DateTime, nullable=True),
+    Column("ats_score_delta", Integer, nullable=True),
+    Index("ix_applications_user_created", "user_id", "created_at"),
+    Index("ix_applications_user_status", "user_id", "status"),
+)
+
+Table(
+    "application_revisions", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("application_id", Integer, ForeignKey("applications.id", ondelete="CASCADE"), index=True),
+    Column("revision", Integer),
+    Column("source", String),
+    Column("content_hash", String, ForeignKey("content_blobs.hash"), nullable=True),
+    Column("created_at", DateTime),
+    Column("model_used", String, nullable=True),
+    Column("model_generation_time", Integer, nullable=True),
+    Column("model_tokens_used", Integer, nullable=True),
+    Column("model_prompt_tokens", Integer, nullable=True),
+    Column("ats_score", Integer, nullable=True),
+    Column("ats_grade", String, nullable=True),
+    Column("ats_feedback", Text, nullable=True),
+    Column("ats_analyzed_at", DateTime, nullable=True),
+    Column("ats_score_delta", Integer, nullable=True),
+    UniqueConstraint("application_id", "revision"),
+)
+
+Table(
+    "ats_results", metadata,
+    Column("content_hash", String, primary_key=True),
+    Column("version", String, primary_key=True),
+    Column("score", Integer),
+    Column("grade", String),
+    Column("feedback", Text),
+    Column("method", String),
+    Column("analyzed_at", DateTime),
+)
+
+Table(
+    "saved_searches", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), index=True),
+    Column("name", String),
+    Column("search_term", String),
+    Column("location", String),
+    Column("sites", String),
+    Column("results_wanted", Integer),
+    Column("max_hours_old", Integer),
+    Column("interval_minutes", Integer),
+    Column("enabled", Boolean),
+    Column("created_at", DateTime),
+    Column("watermark_at", DateTime, nullable=True),
+    Column("last_run_at", DateTime, nullable=True),
+    Column("next_run_at", DateTime, nullable=True, index=True),
+)
+
+Table(
+    "saved_search_seen_urls", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("saved_search_id", Integer, ForeignKey("saved_searches.id", ondelete="CASCADE"), index=True),
+    Column("url", String),
+    Column("seen_at", DateTime, index=True),
+    UniqueConstraint("saved_search_id", "url"),
+)
+
+Table(
+    "harvest_runs", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("saved_search_id", Integer, ForeignKey("saved_searches.id", ondelete="CASCADE"), index=True),
+    Column("status", String),
+    Column("started_at", DateTime),
+    Column("finished_at", DateTime, nullable=True),
+    Column("hours_old", Integer),
+    Column("fetched", Integer),
+    Column("already_seen", Integer),
+    Column("already_stored", Integer),
+    Column("inserted", Integer),
+    Column("duration_seconds", Float, nullable=True),
+    Column("error", Text, nullable=True),
+)
+
+Table(
+    "stats_summary", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("dimension", String),
+    Column("key", String),
+    Column("count", Integer),
+    Column("timed_count", Integer),
+    Column("total_generation_time", Float),
+    Column("total_tokens", Float),
+    Column("total_prompt_tokens", Float),
+    Column("scored_count", Integer),
+    Column("total_ats_score", Float),
+    Column("updated_at", DateTime),
+    UniqueConstraint("dimension", "key"),
+)
+
+Table(
+    "stats_watermarks", metadata,
+    Column("name", String, primary_key=True),
+    Column("last_id", Integer),
+    Column("refreshed_at", DateTime),
+)
+
+
+def upgrade(ctx):
+    metadata.create_all(bind=ctx.conn)
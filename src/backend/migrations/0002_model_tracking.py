@@ -0,0 +1,14 @@
+"""
+Model tracking columns on applications.
+
+- model_used: name of the AI model used to generate the resume
+- model_generation_time: time taken to generate (in seconds)
+- model_tokens_used: number of tokens generated
+"""
+
+
+def upgrade(ctx):
+    ctx.add_column("applications", "model_used", "VARCHAR DEFAULT 'llama3'")
+    ctx.add_column("applications", "model_generation_time", "INTEGER")
+    ctx.add_column("applications", "model_tokens_used", "INTEGER")
+    ctx.backfill("applications", "model_used = 'llama3'", "model_used IS NULL")
@@ -0,0 +1,15 @@
+"""
+ATS score columns on applications.
+
+- ats_score: score from 0-100
+- ats_grade: excellent/good/fair/poor
+- ats_feedback: JSON string with suggestions and feedback
+- ats_analyzed_at: timestamp of analysis
+"""
+
+
+def upgrade(ctx):
+    ctx.add_column("applications", "ats_score", "INTEGER")
+    ctx.add_column("applications", "ats_grade", "VARCHAR")
+    ctx.add_column("applications", "ats_feedback", "TEXT")
+    ctx.add_column("applications", "ats_analyzed_at", "TIMESTAMP")
@@ -0,0 +1,7 @@
+"""
+Prompt token count on applications (prompt budgeting).
+"""
+
+
+def upgrade(ctx):
+    ctx.add_column("applications", "model_prompt_tokens", "INTEGER")
@@ -0,0 +1,48 @@
+"""
+Ingest dedup columns on job_postings.
+
+- fingerprint: md5 of normalized title|company (indexed), backfilled in batches
+- keywords: comma-separated skills extracted at ingest time
+"""
+
+TRANSACTIONAL = False
+
+# Must match ingest.job_fingerprint
+FINGERPRINT_SQL = """
+    md5(
+        trim(regexp_replace(lower(coalesce(title, '')), '\\s+', ' ', 'g'))
+        || '|' ||
+        trim(regexp_replace(lower(coalesce(company, '')), '\\s+', ' ', 'g'))
+    )
+"""
+
+
+def _backfill_in_python(ctx, batch_size: int = 1000) -> int:
+    """For databases without md5/regexp_replace (SQLite)."""
+    from ingest import job_fingerprint
+
+    total = 0
+    while True:
+        rows = ctx.execute(
+            "SELECT id, title, company FROM job_postings WHERE fingerprint IS NULL ORDER BY id LIMIT :n",
+            {"n": batch_size}
+        ).fetchall()
+        if not rows:
+            return total
+        for job_id, title, company in rows:
+            ctx.execute(
+                "UPDATE job_postings SET fingerprint = :fingerprint WHERE id = :id",
+                {"fingerprint": job_fingerprint(title, company), "id": job_id}
+            )
+        total += len(rows)
+
+
+def upgrade(ctx):
+    ctx.add_column("job_postings", "fingerprint", "VARCHAR")
+    ctx.add_column("job_postings", "keywords", "TEXT")
+    if ctx.is_postgres:
+        backfilled = ctx.backfill("job_postings", f"fingerprint = {FINGERPRINT_SQL}", "fingerprint IS NULL")
+    else:
+        backfilled = _backfill_in_python(ctx)
+    print(f"  - backfilled fingerprints for {backfilled} jobs")
+    ctx.create_index("ix_job_postings_fingerprint", "job_postings", ["fingerprint"])
@@ -0,0 +1,20 @@
+"""
+updated_at on resumes, job_postings and applications (ETag / Last-Modified).
+
+Backfilled from created_at / fetched_at for existing rows.
+"""
+
+TRANSACTIONAL = False
+
+# table -> column the backfill starts from
+TABLES = {
+    "resumes": "created_at",
+    "job_postings": "fetched_at",
+    "applications": "created_at",
+}
+
+
+def upgrade(ctx):
+    for table, source_column in TABLES.items():
+        ctx.add_column(table, "updated_at", "TIMESTAMP")
+        ctx.backfill(table, f"updated_at = COALESCE({source_column}, CURRENT_TIMESTAMP)", "updated_at IS NULL")
@@ -0,0 +1,42 @@
+"""
+Move generated resume content into the compressed content store.
+
+- create the content_blobs table
+- add applications.content_hash (indexed)
+- compress existing applications.generated_content into content_blobs
+  (deduplicated, delta against the base resume) and clear the inline copy,
+  committing every batch
+
+Afterwards VACUUM (FULL) applications to give the freed TOAST space back to
+the OS.
+"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, LargeBinary, MetaData, String, Table
+
+from content_store import migrate_inline_content, storage_report
+
+TRANSACTIONAL = False
+
+# Frozen here rather than imported from models; the data move reuses content_store
+content_blobs = Table(
+    "content_blobs", MetaData(),
+    Column("hash", String, primary_key=True),
+    Column("codec", String),
+    Column("base_hash", String, ForeignKey("content_blobs.hash"), nullable=True),
+    Column("data", LargeBinary),
+    Column("size", Integer),
+    Column("stored_size", Integer),
+    Column("created_at", DateTime),
+)
+
+
+def upgrade(ctx):
+    ctx.create_table(content_blobs)
+    ctx.add_column("applications", "content_hash", "VARCHAR REFERENCES content_blobs(hash)")
+    ctx.create_index("ix_applications_content_hash", "applications", ["content_hash"])
+
+    with ctx.session() as db:
+        moved = migrate_inline_content(db)
+        report = storage_report(db)
+    print(f"  - moved {moved} applications; {report['blobs']} blobs ({report['delta_blobs']} deltas), "
+          f"{report['logical_bytes']} bytes referenced -> {report['stored_bytes']} bytes stored")
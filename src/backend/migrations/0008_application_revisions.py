@@ -0,0 +1,50 @@
+"""
+Application revision history.
+
+- create the application_revisions table
+- record each existing application's current content as its revision 1
+"""
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table, Text, UniqueConstraint
+
+# Frozen here rather than imported from models
+metadata = MetaData()
+Table("applications", metadata, Column("id", Integer, primary_key=True))
+Table("content_blobs", metadata, Column("hash", String, primary_key=True))
+application_revisions = Table(
+    "application_revisions", metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("application_id", Integer, ForeignKey("applications.id", ondelete="CASCADE"), index=True),
+    Column("revision", Integer),
+    Column("source", String),
+    Column("content_hash", String, ForeignKey("content_blobs.hash"), nullable=True),
+    Column("created_at", DateTime),
+    Column("model_used", String, nullable=True),
+    Column("model_generation_time", Integer, nullable=True),
+    Column("model_tokens_used", Integer, nullable=True),
+    Column("model_prompt_tokens", Integer, nullable=True),
+    Column("ats_score", Integer, nullable=True),
+    Column("ats_grade", String, nullable=True),
+    Column("ats_feedback", Text, nullable=True),
+    Column("ats_analyzed_at", DateTime, nullable=True),
+    UniqueConstraint("application_id", "revision"),
+)
+
+
+def upgrade(ctx):
+    ctx.create_table(application_revisions)
+    backfilled = ctx.execute("""
+        INSERT INTO application_revisions (
+            application_id, revision, source, content_hash, created_at,
+            model_used, model_generation_time, model_tokens_used, model_prompt_tokens,
+            ats_score, ats_grade, ats_feedback, ats_analyzed_at
+        )
+        SELECT
+            a.id, 1, 'generate', a.content_hash, COALESCE(a.updated_at, a.created_at, CURRENT_TIMESTAMP),
+            a.model_used, a.model_generation_time, a.model_tokens_used, a.model_prompt_tokens,
+            a.ats_score, a.ats_grade, a.ats_feedback, a.ats_analyzed_at
+        FROM applications a
+        WHERE a.content_hash IS NOT NULL
+          AND NOT EXISTS (SELECT 1 FROM application_revisions r WHERE r.application_id = a.id)
+    """).rowcount
+    print(f"  - recorded {backfilled} existing applications as revision 1")
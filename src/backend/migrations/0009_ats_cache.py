@@ -0,0 +1,44 @@
+"""
+ATS result cache and base resume scores.
+
+- create the ats_results table
+- add ats_score, ats_grade, ats_analyzed_at to resumes
+- add ats_score_delta to applications and application_revisions, backfilled
+  for applications whose base resume already has a score
+
+Unscored base resumes are scored the first time a tailored version needs
+them, or all at once with `python ats_cache.py score-base-resumes`.
+"""
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, Text
+
+TRANSACTIONAL = False
+
+# Frozen here rather than imported from models
+ats_results = Table(
+    "ats_results", MetaData(),
+    Column("content_hash", String, primary_key=True),
+    Column("version", String, primary_key=True),
+    Column("score", Integer),
+    Column("grade", String),
+    Column("feedback", Text),
+    Column("method", String),
+    Column("analyzed_at", DateTime),
+)
+
+
+def upgrade(ctx):
+    ctx.create_table(ats_results)
+    ctx.add_column("resumes", "ats_score", "INTEGER")
+    ctx.add_column("resumes", "ats_grade", "VARCHAR")
+    ctx.add_column("resumes", "ats_analyzed_at", "TIMESTAMP")
+    ctx.add_column("applications", "ats_score_delta", "INTEGER")
+    ctx.add_column("application_revisions", "ats_score_delta", "INTEGER")
+
+    base_score = "(SELECT r.ats_score FROM resumes r WHERE r.id = applications.resume_id)"
+    backfilled = ctx.backfill(
+        "applications",
+        f"ats_score_delta = ats_score - {base_score}",
+        f"ats_score_delta IS NULL AND ats_score IS NOT NULL AND {base_score} IS NOT NULL"
+    )
+    print(f"  - backfilled ats_score_delta for {backfilled} applications")
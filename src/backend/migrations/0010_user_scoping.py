@@ -0,0 +1,48 @@
+"""
+Scope data per user.
+
+- add created_at and daily_generation_quota to users
+- add user_id to job_postings, applications and saved_searches
+- create the default user (DEFAULT_USER_EMAIL) and give it every existing
+  resume, application and saved search that has no owner
+- create the per-user composite indexes
+
+Existing job postings keep user_id NULL, i.e. shared with every user.
+"""
+
+import os
+
+TRANSACTIONAL = False
+
+DEFAULT_USER_EMAIL = os.getenv("DEFAULT_USER_EMAIL", "default@localhost")
+
+
+def upgrade(ctx):
+    ctx.add_column("users", "created_at", "TIMESTAMP")
+    ctx.add_column("users", "daily_generation_quota", "INTEGER")
+    for table in ("job_postings", "applications", "saved_searches"):
+        ctx.add_column(table, "user_id", "INTEGER REFERENCES users(id)")
+
+    ctx.execute("""
+        INSERT INTO users (email, created_at) VALUES (:email, CURRENT_TIMESTAMP)
+        ON CONFLICT (email) DO NOTHING
+    """, {"email": DEFAULT_USER_EMAIL})
+    default_id = ctx.execute(
+        "SELECT id FROM users WHERE email = :email", {"email": DEFAULT_USER_EMAIL}
+    ).scalar()
+    params = {"uid": default_id}
+    resumes = ctx.backfill("resumes", "user_id = :uid", "user_id IS NULL", params)
+    applications = ctx.backfill(
+        "applications",
+        "user_id = COALESCE((SELECT r.user_id FROM resumes r WHERE r.id = applications.resume_id), :uid)",
+        "user_id IS NULL",
+        params
+    )
+    searches = ctx.backfill("saved_searches", "user_id = :uid", "user_id IS NULL", params)
+    print(f"  - assigned {resumes} resumes, {applications} applications, {searches} saved searches to user {default_id}")
+
+    ctx.create_index("ix_resumes_user_created", "resumes", ["user_id", "created_at"])
+    ctx.create_index("ix_job_postings_user_fetched", "job_postings", ["user_id", "fetched_at"])
+    ctx.create_index("ix_applications_user_created", "applications", ["user_id", "created_at"])
+    ctx.create_index("ix_applications_user_status", "applications", ["user_id", "status"])
+    ctx.create_index("ix_saved_searches_user_id", "saved_searches", ["user_id"])
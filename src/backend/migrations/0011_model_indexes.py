@@ -0,0 +1,42 @@
+"""
+Build every index the models declared when migrations were introduced that
+existing tables are missing.
+
+create_all() only ever created indexes together with a new table, so
+databases older than an index= / Index() declaration never got it. The
+list is written out here rather than read from models, so this migration
+builds the same indexes whatever models.py looks like later.
+"""
+
+TRANSACTIONAL = False
+
+# (name, table, columns, unique)
+INDEXES = [
+    ("ix_stats_summary_id", "stats_summary", ["id"], False),
+    ("ix_users_email", "users", ["email"], True),
+    ("ix_users_id", "users", ["id"], False),
+    ("ix_job_postings_fingerprint", "job_postings", ["fingerprint"], False),
+    ("ix_job_postings_id", "job_postings", ["id"], False),
+    ("ix_job_postings_user_fetched", "job_postings", ["user_id", "fetched_at"], False),
+    ("ix_resumes_id", "resumes", ["id"], False),
+    ("ix_resumes_user_created", "resumes", ["user_id", "created_at"], False),
+    ("ix_saved_searches_id", "saved_searches", ["id"], False),
+    ("ix_saved_searches_next_run_at", "saved_searches", ["next_run_at"], False),
+    ("ix_saved_searches_user_id", "saved_searches", ["user_id"], False),
+    ("ix_applications_content_hash", "applications", ["content_hash"], False),
+    ("ix_applications_id", "applications", ["id"], False),
+    ("ix_applications_user_created", "applications", ["user_id", "created_at"], False),
+    ("ix_applications_user_status", "applications", ["user_id", "status"], False),
+    ("ix_harvest_runs_id", "harvest_runs", ["id"], False),
+    ("ix_harvest_runs_saved_search_id", "harvest_runs", ["saved_search_id"], False),
+    ("ix_saved_search_seen_urls_id", "saved_search_seen_urls", ["id"], False),
+    ("ix_saved_search_seen_urls_saved_search_id", "saved_search_seen_urls", ["saved_search_id"], False),
+    ("ix_saved_search_seen_urls_seen_at", "saved_search_seen_urls", ["seen_at"], False),
+    ("ix_application_revisions_application_id", "application_revisions", ["application_id"], False),
+    ("ix_application_revisions_id", "application_revisions", ["id"], False),
+]
+
+
+def upgrade(ctx):
+    for name, table, columns, unique in INDEXES:
+        ctx.create_index(name, table, columns, unique=unique)
@@ -0,0 +1,56 @@
+"""
+Archive tables for retention and the indexes its queries use.
+
+- create job_postings_archive and applications_archive
+- index job_postings.fetched_at (stale postings) and applications.job_id
+  (postings still referenced by an application)
+
+The archive tables are defined here rather than imported from models, so
+this migration creates the same tables whatever models.py looks like later.
+"""
+
+from sqlalchemy import Column, DateTime, Integer, LargeBinary, MetaData, String, Table
+
+TRANSACTIONAL = False
+
+metadata = MetaData()
+
+job_postings_archive = Table(
+    "job_postings_archive", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, nullable=True),
+    Column("title", String),
+    Column("company", String),
+    Column("url", String),
+    Column("source", String),
+    Column("fingerprint", String, nullable=True, index=True),
+    Column("description", LargeBinary),
+    Column("fetched_at", DateTime),
+    Column("archived_at", DateTime),
+)
+
+applications_archive = Table(
+    "applications_archive", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, nullable=True, index=True),
+    Column("job_id", Integer),
+    Column("job_title", String),
+    Column("job_company", String),
+    Column("resume_id", Integer),
+    Column("status", String),
+    Column("model_used", String, nullable=True),
+    Column("ats_score", Integer, nullable=True),
+    Column("ats_grade", String, nullable=True),
+    Column("revisions", Integer),
+    Column("content", LargeBinary, nullable=True),
+    Column("created_at", DateTime),
+    Column("updated_at", DateTime),
+    Column("archived_at", DateTime),
+)
+
+
+def upgrade(ctx):
+    ctx.create_table(job_postings_archive)
+    ctx.create_table(applications_archive)
+    ctx.create_index("ix_job_postings_fetched_at", "job_postings", ["fetched_at"])
+    ctx.create_index("ix_applications_job_id", "applications", ["job_id"])
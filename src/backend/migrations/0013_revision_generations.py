@@ -0,0 +1,10 @@
+"""
+Count the LLM generations behind each revision for the daily quota.
+
+- add application_revisions.generations (best-of-N revisions record every
+  candidate; existing rows count as one)
+"""
+
+
+def upgrade(ctx):
+    ctx.add_column("application_revisions", "generations", "INTEGER DEFAULT 1")
@@ -0,0 +1,12 @@
+"""
+Drop ATS cache rows keyed without the scorer.
+
+- ats_results.version is now ATS_CACHE_VERSION:runtime:model; rows with the
+  old bare version can't tell rule-based from model scores and are never
+  read again
+"""
+
+
+def upgrade(ctx):
+    deleted = ctx.execute("DELETE FROM ats_results WHERE version NOT LIKE '%:%'").rowcount
+    print(f"  - removed {deleted} ats_results rows without a scorer key")
@@ -0,0 +1,38 @@
+"""
+Charge the daily generation quota to a ledger instead of counting revisions.
+
+- create the generation_usage table (never deleted, so deleting a resume or
+  application no longer gives its generations back)
+- backfill today's usage from today's generated revisions
+
+The table is defined here rather than imported from models, so the migration
+keeps creating the same table whatever models.py looks like later.
+"""
+
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, MetaData, String, Table
+
+metadata = MetaData()
+Table("users", metadata, Column("id", Integer, primary_key=True))
+generation_usage = Table(
+    "generation_usage", metadata,
+    Column("id", Integer, primary_key=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("created_at", DateTime),
+    Column("generations", Integer),
+    Column("source", String),
+    Index("ix_generation_usage_user_created", "user_id", "created_at"),
+)
+
+
+def upgrade(ctx):
+    ctx.create_table(generation_usage)
+    midnight = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    backfilled = ctx.execute("""
+        INSERT INTO generation_usage (user_id, created_at, generations, source)
+        SELECT a.user_id, r.created_at, COALESCE(r.generations, 1), 'backfill'
+        FROM application_revisions r JOIN applications a ON a.id = r.application_id
+        WHERE r.source = 'generate' AND r.created_at >= :midnight AND a.user_id IS NOT NULL
+    """, {"midnight": midnight}).rowcount
+    print(f"  - backfilled {backfilled} generation_usage rows for today")
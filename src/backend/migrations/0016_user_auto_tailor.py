@@ -0,0 +1,9 @@
+"""
+Make auto-tailoring a per-user opt-in.
+
+- add users.auto_tailor (off for everyone, including existing users)
+"""
+
+
+def upgrade(ctx):
+    ctx.add_column("users", "auto_tailor", "BOOLEAN DEFAULT FALSE")
@@ -0,0 +1,215 @@
+"""
+Model Analytics & Routing
+
+Per-model leaderboard built from what every Application already records
+(model_used, model_generation_time, model_tokens_used, ats_score):
+throughput, latency percentiles and ATS score mean/median over a time window.
+
+On Postgres the percentiles are computed in SQL with percentile_cont ...
+WITHIN GROUP; other databases (SQLite for benchmarks) fetch just those
+columns and compute them in Python.
+
+pick_model() uses the leaderboard for model="auto": the best mean ATS score
+among models whose p90 latency fits the latency budget.
+"""
+
+import os
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ai_service import AVAILABLE_MODELS, DEFAULT_MODEL
+from models import Application
+
+AUTO_MODEL = "auto"
+# Default latency budget for model="auto" (seconds, compared with p90)
+ROUTING_LATENCY_BUDGET = float(os.getenv("ROUTING_LATENCY_BUDGET", "60"))
+# History used for routing decisions
+ROUTING_WINDOW = os.getenv("ROUTING_WINDOW", "7d")
+# Generations a model needs in the window before routing trusts its numbers
+ROUTING_MIN_SAMPLES = int(os.getenv("ROUTING_MIN_SAMPLES", "5"))
+# How long a computed leaderboard is reused by the router
+ROUTING_CACHE_SECONDS = int(os.getenv("ROUTING_CACHE_SECONDS", "300"))
+
+WINDOW_UNITS = {"h": "hours", "d": "days", "w": "weeks"}
+LATENCY_PERCENTILES = (0.5, 0.9, 0.95)
+
+_cache: Dict[str, tuple] = {}
+_cache_lock = threading.Lock()
+
+
+def parse_window(window: Optional[str]) -> Optional[datetime]:
+    """'24h' / '7d' / '4w' -> start of the window; 'all' or empty -> None."""
+    if not window or window == "all":
+        return None
+    match = re.fullmatch(r"(\d+)([hdw])", window.strip().lower())
+    if not match:
+        raise ValueError(f"Invalid window '{window}', expected e.g. 24h, 7d, 4w or all")
+    amount, unit = int(match.group(1)), WINDOW_UNITS[match.group(2)]
+    return datetime.utcnow() - timedelta(**{unit: amount})
+
+
+def _percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    """Linear interpolation, same as percentile_cont."""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * p
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _base_query(db: Session, since: Optional[datetime], *columns):
+    query = db.query(*columns).filter(
+        Application.model_used != None,
+        Application.model_generation_time != None
+    )
+    if since is not None:
+        query = query.filter(Application.created_at >= since)
+    return query
+
+
+def _stats_sql(db: Session, since: Optional[datetime]) -> List[Dict]:
+    latency = Application.model_generation_time
+    rows = _base_query(
+        db, since,
+        Application.model_used,
+        func.count(Application.id),
+        func.sum(Application.model_tokens_used),
+        func.sum(latency),
+        *(func.percentile_cont(p).within_group(latency.asc()) for p in LATENCY_PERCENTILES),
+        func.avg(Application.ats_score),
+        func.percentile_cont(0.5).within_group(Application.ats_score.asc()),
+        func.count(Application.ats_score),
+    ).group_by(Application.model_used).all()
+
+    results = []
+    for model, count, tokens, total_time, p50, p90, p95, ats_mean, ats_median, scored in rows:
+        results.append({
+            "model": model,
+            "generations": count,
+            "tokens": tokens or 0,
+            "generation_time": float(total_time or 0),
+            "latency": {"p50": p50, "p90": p90, "p95": p95},
+            "ats_mean": float(ats_mean) if ats_mean is not None else None,
+            "ats_median": ats_median,
+            "ats_scored": scored,
+        })
+    return results
+
+
+def _stats_python(db: Session, since: Optional[datetime]) -> List[Dict]:
+    by_model: Dict[str, Dict[str, list]] = {}
+    rows = _base_query(
+        db, since,
+        Application.model_used,
+        Application.model_generation_time,
+        Application.model_tokens_used,
+        Application.ats_score,
+    )
+    for model, latency, tokens, ats_score in rows:
+        entry = by_model.setdefault(model, {"latency": [], "tokens": [], "ats": []})
+        entry["latency"].append(float(latency))
+        entry["tokens"].append(tokens or 0)
+        if ats_score is not None:
+            entry["ats"].append(float(ats_score))
+
+    results = []
+    for model, entry in by_model.items():
+        latencies = sorted(entry["latency"])
+        ats = sorted(entry["ats"])
+        results.append({
+            "model": model,
+            "generations": len(latencies),
+            "tokens": sum(entry["tokens"]),
+            "generation_time": sum(latencies),
+            "latency": {f"p{int(p * 100)}": _percentile(latencies, p) for p in LATENCY_PERCENTILES},
+            "ats_mean": sum(ats) / len(ats) if ats else None,
+            "ats_median": _percentile(ats, 0.5),
+            "ats_scored": len(ats),
+        })
+    return results
+
+
+def model_leaderboard(db: Session, window: Optional[str] = "7d") -> List[Dict]:
+    """
+    Per-model throughput, latency percentiles and ATS scores, best ATS first.
+    """
+    since = parse_window(window)
+    if db.bind.dialect.name == "postgresql":
+        stats = _stats_sql(db, since)
+    else:
+        stats = _stats_python(db, since)
+
+    leaderboard = []
+    for entry in stats:
+        latency = {key: round(float(value), 2) if value is not None else None for key, value in entry["latency"].items()}
+        leaderboard.append({
+            "model": entry["model"],
+            "available": entry["model"] in AVAILABLE_MODELS,
+            "generations": entry["generations"],
+            "tokens_per_second": round(entry["tokens"] / entry["generation_time"], 2) if entry["generation_time"] else None,
+            "latency_seconds": latency,
+            "ats_mean": round(entry["ats_mean"], 1) if entry["ats_mean"] is not None else None,
+            "ats_median": round(float(entry["ats_median"]), 1) if entry["ats_median"] is not None else None,
+            "ats_scored": entry["ats_scored"],
+        })
+    leaderboard.sort(key=lambda e: (e["ats_mean"] is None, -(e["ats_mean"] or 0), e["latency_seconds"]["p50"] or 0))
+    return leaderboard
+
+
+def _cached_leaderboard(db: Session, window: str) -> List[Dict]:
+    with _cache_lock:
+        cached = _cache.get(window)
+        if cached and time.monotonic() - cached[0] < ROUTING_CACHE_SECONDS:
+            return cached[1]
+    leaderboard = model_leaderboard(db, window)
+    with _cache_lock:
+        _cache[window] = (time.monotonic(), leaderboard)
+    return leaderboard
+
+
+def route_model(db: Session, latency_budget: Optional[float] = None, window: str = ROUTING_WINDOW) -> Dict:
+    """
+    Choose a model for model="auto" and explain why.
+
+    Among available models with at least ROUTING_MIN_SAMPLES generations in the
+    window, pick the best mean ATS score whose p90 latency fits the budget. If
+    none fit, pick the lowest p90 latency; with no history use DEFAULT_MODEL.
+    """
+    budget = latency_budget if latency_budget is not None else ROUTING_LATENCY_BUDGET
+    candidates = [
+        entry for entry in _cached_leaderboard(db, window)
+        if entry["available"] and entry["generations"] >= ROUTING_MIN_SAMPLES
+        and entry["latency_seconds"]["p90"] is not None
+    ]
+    if not candidates:
+        return {"model": DEFAULT_MODEL, "reason": "no history", "latency_budget": budget}
+
+    within_budget = [entry for entry in candidates if entry["latency_seconds"]["p90"] <= budget]
+    if within_budget:
+        best = max(within_budget, key=lambda e: (e["ats_mean"] or 0, -e["latency_seconds"]["p90"]))
+        reason = "best ATS within latency budget"
+    else:
+        best = min(candidates, key=lambda e: e["latency_seconds"]["p90"])
+        reason = "no model within budget, fastest p90"
+
+    return {
+        "model": best["model"],
+        "reason": reason,
+        "latency_budget": budget,
+        "p90_latency": best["latency_seconds"]["p90"],
+        "ats_mean": best["ats_mean"],
+    }
+
+
+def pick_model(db: Session, model: Optional[str], latency_budget: Optional[float] = None) -> Optional[str]:
+    """Resolve model="auto" to a concrete model; other values pass through."""
+    if model != AUTO_MODEL:
+        return model
+    return route_model(db, latency_budget)["model"]
@@ -0,0 +1,201 @@
+"""
+Model Store
+
+Local, verified copies of the HuggingFace models the backend loads, so no
+user request ever waits on (or fails because of) a hub download.
+
+Models are prefetched into MODEL_STORE_DIR, one directory per model
+("owner/name" becomes "owner--name") with a manifest recording the hub
+revision and a sha256 per file. Loaders resolve a model name through
+model_source(): the local copy when present, the hub name otherwise, and
+None when MODEL_OFFLINE is set and there is no local copy (the caller then
+falls back instead of trying the network).
+
+Usage (from src/backend, with network access):
+    python model_store.py prefetch                       # the ATS model
+    python model_store.py prefetch --model owner/name --revision main
+    python model_store.py verify                         # re-hash every stored file
+    python model_store.py list
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from datetime import datetime
+from typing import Dict, List, Optional
+
+MODEL_STORE_DIR = os.getenv("MODEL_STORE_DIR", "/app/data/models/hf")
+# Never contact the hub; also honours the standard HF_HUB_OFFLINE switch
+MODEL_OFFLINE = (
+    os.getenv("MODEL_OFFLINE", "false").lower() == "true"
+    or os.getenv("HF_HUB_OFFLINE", "0").lower() in ("1", "true")
+)
+
+MANIFEST_FILE = "store.json"
+# Weights, config and tokenizer; skips other frameworks' weights and docs
+ALLOW_PATTERNS = ["*.json", "*.safetensors", "*.bin", "*.model", "*.txt", "*.py"]
+IGNORE_PATTERNS = ["*.msgpack", "*.h5", "*.ot", "tf_model*", "flax_model*", "rust_model*", "onnx/*"]
+
+
+def model_path(model_name: str) -> str:
+    return os.path.join(MODEL_STORE_DIR, model_name.replace("/", "--"))
+
+
+def read_manifest(model_name: str) -> Optional[Dict]:
+    path = os.path.join(model_path(model_name), MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def is_stored(model_name: str) -> bool:
+    return read_manifest(model_name) is not None
+
+
+def model_source(model_name: str) -> Optional[str]:
+    """Path or hub name to load model_name from; None if offline and not stored."""
+    if is_stored(model_name):
+        return model_path(model_name)
+    if MODEL_OFFLINE:
+        return None
+    return model_name
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stored_files(directory: str) -> List[str]:
+    files = []
+    for root, dirs, names in os.walk(directory):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]  # hub download metadata
+        for name in names:
+            relative = os.path.relpath(os.path.join(root, name), directory)
+            if relative != MANIFEST_FILE:
+                files.append(relative)
+    return sorted(files)
+
+
+def prefetch(model_name: str, revision: Optional[str] = None) -> Dict:
+    """Download model_name into the store and write its manifest."""
+    from huggingface_hub import HfApi, snapshot_download
+
+    directory = model_path(model_name)
+    resolved = HfApi().model_info(model_name, revision=revision).sha
+    snapshot_download(
+        repo_id=model_name,
+        revision=resolved,
+        local_dir=directory,
+        allow_patterns=ALLOW_PATTERNS,
+        ignore_patterns=IGNORE_PATTERNS,
+    )
+    manifest = {
+        "model_name": model_name,
+        "revision": resolved,
+        "fetched_at": datetime.utcnow().isoformat(),
+        "files": {
+            name: {"sha256": _sha256(os.path.join(directory, name)), "size": os.path.getsize(os.path.join(directory, name))}
+            for name in _stored_files(directory)
+        },
+    }
+    with open(os.path.join(directory, MANIFEST_FILE), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def verify(model_name: str) -> Dict:
+    """Re-hash a stored model against its manifest."""
+    manifest = read_manifest(model_name)
+    if manifest is None:
+        return {"model_name": model_name, "ok": False, "error": "not stored"}
+    directory = model_path(model_name)
+    missing, mismatched = [], []
+    for name, expected in manifest["files"].items():
+        path = os.path.join(directory, name)
+        if not os.path.exists(path):
+            missing.append(name)
+        elif _sha256(path) != expected["sha256"]:
+            mismatched.append(name)
+    return {
+        "model_name": model_name,
+        "revision": manifest["revision"],
+        "ok": not missing and not mismatched,
+        "files": len(manifest["files"]),
+        "missing": missing,
+        "mismatched": mismatched,
+    }
+
+
+def stored_models() -> List[Dict]:
+    if not os.path.isdir(MODEL_STORE_DIR):
+        return []
+    models = []
+    for entry in sorted(os.listdir(MODEL_STORE_DIR)):
+        manifest_path = os.path.join(MODEL_STORE_DIR, entry, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                manifest = json.load(f)
+            models.append({
+                "model_name": manifest["model_name"],
+                "revision": manifest["revision"],
+                "fetched_at": manifest["fetched_at"],
+                "bytes": sum(f["size"] for f in manifest["files"].values()),
+            })
+    return models
+
+
+def main():
+    from ats_service import ATS_MODEL_NAME
+
+    parser = argparse.ArgumentParser(description="Prefetch and verify local model copies")
+    commands = parser.add_subparsers(dest="command", required=True)
+    prefetch_parser = commands.add_parser("prefetch", help="Download a model into the store")
+    prefetch_parser.add_argument("--model", default=ATS_MODEL_NAME)
+    prefetch_parser.add_argument("--revision", default=None, help="Branch, tag or commit (default: main)")
+    verify_parser = commands.add_parser("verify", help="Check stored files against their manifests")
+    verify_parser.add_argument("--model", default=None, help="One model (default: all stored)")
+    commands.add_parser("list", help="Stored models")
+    args = parser.parse_args()
+
+    if args.command == "prefetch":
+        if MODEL_OFFLINE:
+            print("✗ MODEL_OFFLINE / HF_HUB_OFFLINE is set; prefetch needs network access")
+            sys.exit(1)
+        manifest = prefetch(args.model, args.revision)
+        size = sum(f["size"] for f in manifest["files"].values())
+        print(f"✓ Stored {args.model}@{manifest['revision'][:12]} in {model_path(args.model)}")
+        print(f"  - {len(manifest['files'])} files, {size / 1e6:.1f} MB")
+        return
+
+    if args.command == "verify":
+        names = [args.model] if args.model else [m["model_name"] for m in stored_models()]
+        if not names:
+            print(f"✗ No models stored in {MODEL_STORE_DIR}")
+            sys.exit(1)
+        reports = [verify(name) for name in names]
+        for report in reports:
+            if report["ok"]:
+                print(f"✓ {report['model_name']}@{report['revision'][:12]}: {report['files']} files verified")
+            else:
+                problems = [report["error"]] if "error" in report else []
+                if report.get("missing"):
+                    problems.append("missing " + ", ".join(report["missing"]))
+                if report.get("mismatched"):
+                    problems.append("mismatched " + ", ".join(report["mismatched"]))
+                print(f"✗ {report['model_name']}: {'; '.join(problems)}")
+        sys.exit(0 if all(r["ok"] for r in reports) else 1)
+
+    if args.command == "list":
+        for model in stored_models():
+            print(f"{model['model_name']:<45} {model['revision'][:12]}  {model['bytes'] / 1e6:8.1f} MB  {model['fetched_at']}")
+
+
+if __name__ == "__main__":
+    main()
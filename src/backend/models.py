@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, UniqueConstraint, Float, LargeBinary, Index
+from sqlalchemy.orm import relationship, deferred
 from sqlalchemy.ext.declarative import declarative_base
 from datetime import datetime
 
@@ -10,47 +10,221 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True)
     hashed_password = Column(String)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    daily_generation_quota = Column(Integer, nullable=True)  # Overrides DAILY_GENERATION_QUOTA; 0 = unlimited
+    auto_tailor = Column(Boolean, default=False)  # Opt-in to auto-tailoring new jobs against their base resumes
 
 class Resume(Base):
     __tablename__ = "resumes"
+    __table_args__ = (Index("ix_resumes_user_created", "user_id", "created_at"),)
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
     name = Column(String)
     file_path = Column(String) # Path to encrypted file
     content_text = Column(Text) # Extracted text for AI
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # HTTP cache validator
     is_base = Column(Boolean, default=False)
+    
+    # ATS score of the resume itself, computed in the background after upload
+    ats_score = Column(Integer, nullable=True)
+    ats_grade = Column(String, nullable=True)
+    ats_analyzed_at = Column(DateTime, nullable=True)
 
 class JobPosting(Base):
     __tablename__ = "job_postings"
+    __table_args__ = (Index("ix_job_postings_user_fetched", "user_id", "fetched_at"),)
     id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=True)  # NULL: shared (harvested/searched) posting
     title = Column(String)
     company = Column(String)
     description = Column(Text)
     url = Column(String)
     source = Column(String) # e.g., "JobSpy", "Manual"
-    fetched_at = Column(DateTime, default=datetime.utcnow)
+    fetched_at = Column(DateTime, default=datetime.utcnow, index=True)  # Retention age
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # HTTP cache validator
+    fingerprint = Column(String, nullable=True, index=True)  # md5 of normalized title|company
+    keywords = Column(Text, nullable=True)  # Comma-separated skills found in the description
 
 class Application(Base):
     __tablename__ = "applications"
+    __table_args__ = (
+        Index("ix_applications_user_created", "user_id", "created_at"),
+        Index("ix_applications_user_status", "user_id", "status"),
+    )
     id = Column(Integer, primary_key=True, index=True)
-    job_id = Column(Integer, ForeignKey("job_postings.id"))
+    user_id = Column(Integer, ForeignKey("users.id"))  # Owner; same as the resume's
+    job_id = Column(Integer, ForeignKey("job_postings.id"), index=True)
     resume_id = Column(Integer, ForeignKey("resumes.id"))
     status = Column(String, default="Draft") # Draft, Generated, Applied, Rejected
-    generated_content = Column(Text) # The tailored resume content
+    generated_content = deferred(Column(Text)) # Legacy inline content; new content lives in content_blobs
+    content_hash = Column(String, ForeignKey("content_blobs.hash"), nullable=True, index=True)  # Tailored resume (see content_store)
     pdf_path = Column(String, nullable=True) # Path to generated PDF
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # HTTP cache validator
     
     # Multi-model tracking
     model_used = Column(String, nullable=True, default="llama3")  # AI model name
     model_generation_time = Column(Integer, nullable=True)  # Generation time in seconds
     model_tokens_used = Column(Integer, nullable=True)  # Number of tokens used
+    model_prompt_tokens = Column(Integer, nullable=True)  # Prompt tokens evaluated
     
     # ATS Score tracking
     ats_score = Column(Integer, nullable=True)  # Score 0-100
     ats_grade = Column(String, nullable=True)  # excellent/good/fair/poor
     ats_feedback = Column(Text, nullable=True)  # JSON string with suggestions
     ats_analyzed_at = Column(DateTime, nullable=True)  # When analysis was performed
+    ats_score_delta = Column(Integer, nullable=True)  # ats_score minus the base resume's score
     
     job = relationship("JobPosting")
     resume = relationship("Resume")
+    revisions = relationship("ApplicationRevision", cascade="all, delete-orphan", passive_deletes=True)
+
+class ApplicationRevision(Base):
+    __tablename__ = "application_revisions"
+    __table_args__ = (UniqueConstraint("application_id", "revision"),)
+    id = Column(Integer, primary_key=True, index=True)
+    application_id = Column(Integer, ForeignKey("applications.id", ondelete="CASCADE"), index=True)
+    revision = Column(Integer)  # 1, 2, ... per application
+    source = Column(String)  # generate, manual, restore
+    content_hash = Column(String, ForeignKey("content_blobs.hash"), nullable=True)  # Stored as a delta against the previous revision when smaller
+    created_at = Column(DateTime, default=datetime.utcnow)
+    generations = Column(Integer, default=1)  # LLM generations it took (best-of-N candidates)
+    
+    # Snapshot of the generation and its ATS result
+    model_used = Column(String, nullable=True)
+    model_generation_time = Column(Integer, nullable=True)
+    model_tokens_used = Column(Integer, nullable=True)
+    model_prompt_tokens = Column(Integer, nullable=True)
+    ats_score = Column(Integer, nullable=True)
+    ats_grade = Column(String, nullable=True)
+    ats_feedback = Column(Text, nullable=True)
+    ats_analyzed_at = Column(DateTime, nullable=True)
+    ats_score_delta = Column(Integer, nullable=True)
+
+class GenerationUsage(Base):
+    """Generations charged against a user's daily quota; never deleted, so usage survives deleting the applications."""
+    __tablename__ = "generation_usage"
+    __table_args__ = (Index("ix_generation_usage_user_created", "user_id", "created_at"),)
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    generations = Column(Integer, default=1)
+    source = Column(String)  # endpoint that charged it, e.g. generate, generate-batch
+
+class ContentBlob(Base):
+    __tablename__ = "content_blobs"
+    hash = Column(String, primary_key=True)  # sha256 of the uncompressed text
+    codec = Column(String)  # zstd or zlib
+    base_hash = Column(String, ForeignKey("content_blobs.hash"), nullable=True)  # Compressed as a delta against this blob
+    data = Column(LargeBinary)
+    size = Column(Integer)  # Uncompressed bytes
+    stored_size = Column(Integer)  # Compressed bytes
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+class AtsResult(Base):
+    __tablename__ = "ats_results"
+    content_hash = Column(String, primary_key=True)  # sha256 of the scored text
+    version = Column(String, primary_key=True)  # ATS_CACHE_VERSION:runtime:model (see ats_cache.scorer_version)
+    score = Column(Integer)
+    grade = Column(String)
+    feedback = Column(Text)  # JSON: suggestions, strengths, missing_keywords
+    method = Column(String)  # ml-model or rule-based
+    analyzed_at = Column(DateTime, default=datetime.utcnow)
+
+class SavedSearch(Base):
+    __tablename__ = "saved_searches"
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
+    name = Column(String)
+    search_term = Column(String)
+    location = Column(String, default="Remote")
+    sites = Column(String, default="indeed,linkedin,zip_recruiter")  # Comma-separated JobSpy sites
+    results_wanted = Column(Integer, default=20)
+    max_hours_old = Column(Integer, default=72)  # Look-back window for the first run
+    interval_minutes = Column(Integer, default=1440)
+    enabled = Column(Boolean, default=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Incremental harvesting state
+    watermark_at = Column(DateTime, nullable=True)  # Start of the last successful run
+    last_run_at = Column(DateTime, nullable=True)
+    next_run_at = Column(DateTime, nullable=True, index=True)
+
+class SavedSearchSeenUrl(Base):
+    __tablename__ = "saved_search_seen_urls"
+    __table_args__ = (UniqueConstraint("saved_search_id", "url"),)
+    id = Column(Integer, primary_key=True, index=True)
+    saved_search_id = Column(Integer, ForeignKey("saved_searches.id", ondelete="CASCADE"), index=True)
+    url = Column(String)
+    seen_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class HarvestRun(Base):
+    __tablename__ = "harvest_runs"
+    id = Column(Integer, primary_key=True, index=True)
+    saved_search_id = Column(Integer, ForeignKey("saved_searches.id", ondelete="CASCADE"), index=True)
+    status = Column(String, default="running")  # running, success, partial (some boards failed), error
+    started_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+    hours_old = Column(Integer)  # Look-back window actually requested
+    fetched = Column(Integer, default=0)  # Postings returned by the job boards
+    already_seen = Column(Integer, default=0)  # Skipped via the saved search's URL set
+    already_stored = Column(Integer, default=0)  # New to this search but a duplicate or already in job_postings
+    inserted = Column(Integer, default=0)
+    duration_seconds = Column(Float, nullable=True)
+    error = Column(Text, nullable=True)
+
+class StatsSummary(Base):
+    __tablename__ = "stats_summary"
+    __table_args__ = (UniqueConstraint("dimension", "key"),)
+    id = Column(Integer, primary_key=True, index=True)
+    dimension = Column(String)  # e.g. "jobs_by_source", "applications_by_model"
+    key = Column(String)
+    count = Column(Integer, default=0)
+    # Sums over rows where the value is set, for per-model averages
+    timed_count = Column(Integer, default=0)
+    total_generation_time = Column(Float, default=0.0)
+    total_tokens = Column(Float, default=0.0)
+    total_prompt_tokens = Column(Float, default=0.0)
+    scored_count = Column(Integer, default=0)
+    total_ats_score = Column(Float, default=0.0)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+
+class StatsWatermark(Base):
+    __tablename__ = "stats_watermarks"
+    name = Column(String, primary_key=True)  # Table the watermark tracks
+    last_id = Column(Integer, default=0)
+    refreshed_at = Column(DateTime, default=datetime.utcnow)
+
+class JobPostingArchive(Base):
+    """Cold copy of a posting removed by retention (see retention.py)."""
+    __tablename__ = "job_postings_archive"
+    id = Column(Integer, primary_key=True)  # The posting's original id
+    user_id = Column(Integer, nullable=True)
+    title = Column(String)
+    company = Column(String)
+    url = Column(String)
+    source = Column(String)
+    fingerprint = Column(String, nullable=True, index=True)
+    description = Column(LargeBinary)  # zlib-compressed
+    fetched_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+class ApplicationArchive(Base):
+    """Cold copy of an application removed by retention, with its current content."""
+    __tablename__ = "applications_archive"
+    id = Column(Integer, primary_key=True)  # The application's original id
+    user_id = Column(Integer, nullable=True, index=True)
+    job_id = Column(Integer)
+    job_title = Column(String)  # Denormalized: the posting may be archived too
+    job_company = Column(String)
+    resume_id = Column(Integer)
+    status = Column(String)
+    model_used = Column(String, nullable=True)
+    ats_score = Column(Integer, nullable=True)
+    ats_grade = Column(String, nullable=True)
+    revisions = Column(Integer, default=0)  # Revisions dropped with it
+    content = Column(LargeBinary, nullable=True)  # zlib-compressed current text
+    created_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    archived_at = Column(DateTime, default=datetime.utcnow)
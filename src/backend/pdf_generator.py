@@ -10,8 +10,12 @@ from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
 from reportlab.lib.enums import TA_LEFT, TA_CENTER
 from reportlab.pdfgen import canvas
 import os
+import time
+from metrics import PDF_RENDER_SECONDS
+from tracing import traced
 
 
+@traced("pdf.render")
 def generate_resume_pdf(resume_text: str, output_path: str) -> str:
     """
     Generate a PDF from resume text
@@ -23,6 +27,8 @@ def generate_resume_pdf(resume_text: str, output_path: str) -> str:
     Returns:
         Path to the generated PDF file
     """
+    start_time = time.perf_counter()
+    
     # Create output directory if it doesn't exist
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     
@@ -125,4 +131,17 @@ def generate_resume_pdf(resume_text: str, output_path: str) -> str:
     # Build PDF
     doc.build(story)
     
+    PDF_RENDER_SECONDS.observe(time.perf_counter() - start_time)
     return output_path
+
+
+def remove_pdf(path: str):
+    """Delete a rendered PDF that nothing points at any more (missing files are fine)."""
+    if not path:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Warning: Could not delete PDF {path}: {e}")
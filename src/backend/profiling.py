@@ -0,0 +1,317 @@
+"""
+Live Profiling
+
+Opt-in sampling profiler and tracemalloc snapshots for diagnosing CPU and
+memory hot spots (ATS scoring, PDF rendering) on a running container.
+
+The sampler reads every thread's stack via sys._current_frames() at a fixed
+interval, so it needs no tracing hooks and costs nothing when idle. Output is
+in collapsed-stack format (one "frame;frame;frame count" line per stack, as
+consumed by flamegraph.pl and speedscope) or rendered as an SVG flame graph.
+
+Disabled unless PROFILING_ENABLED=true; every call must carry PROFILING_TOKEN
+in the X-Profiling-Token header.
+"""
+
+import hmac
+import html
+import itertools
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+# Seconds between stack samples (default 100 Hz)
+PROFILING_INTERVAL = float(os.getenv("PROFILING_INTERVAL", "0.01"))
+MAX_PROFILE_SECONDS = 120
+# Per-request profiles kept in memory for download
+MAX_STORED_PROFILES = 20
+
+TOKEN_HEADER = "X-Profiling-Token"
+PROFILE_HEADER = "X-Profile"
+
+# Innermost frames of threads that are parked rather than working
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("socket.py", "accept"),
+    ("thread.py", "_worker"),
+    ("base_events.py", "_run_once"),
+}
+
+_session_lock = threading.Lock()
+_profile_ids = itertools.count(1)
+_stored_profiles: "OrderedDict[str, Dict]" = OrderedDict()
+_previous_snapshot: Optional[tracemalloc.Snapshot] = None
+
+
+def is_authorized(token: Optional[str]) -> bool:
+    """Profiling must be enabled and the caller must present the configured token."""
+    if not PROFILING_ENABLED or not PROFILING_TOKEN or not token:
+        return False
+    return hmac.compare_digest(token, PROFILING_TOKEN)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class Sampler:
+    """
+    Background thread that samples all other threads' stacks until stopped.
+    """
+
+    def __init__(self, interval: float = PROFILING_INTERVAL, include_idle: bool = False,
+                 exclude_threads: Optional[set] = None):
+        self.interval = max(interval, 0.001)
+        self.include_idle = include_idle
+        self.exclude_threads = set(exclude_threads or ())
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profiler-sampler", daemon=True)
+
+    def start(self) -> "Sampler":
+        self.started_at = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self) -> "Sampler":
+        self._stop.set()
+        self._thread.join()
+        self.duration = time.perf_counter() - self.started_at
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own or ident in self.exclude_threads:
+                    continue
+                code = frame.f_code
+                if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def top_functions(self, limit: int = 25) -> List[Dict]:
+        """Functions by self samples (innermost frame) and total samples."""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")[1:]
+            if not frames:
+                continue
+            self_counts[frames[-1]] += count
+            for name in set(frames):
+                total_counts[name] += count
+        total = sum(self.stacks.values()) or 1
+        return [
+            {
+                "function": name,
+                "self_samples": self_counts[name],
+                "total_samples": total_counts[name],
+                "self_percent": round(self_counts[name] * 100 / total, 1),
+                "total_percent": round(total_counts[name] * 100 / total, 1),
+            }
+            for name, _ in total_counts.most_common()
+            if self_counts[name]
+        ][:limit]
+
+    def summary(self) -> Dict:
+        return {
+            "duration_seconds": round(self.duration, 3),
+            "samples": self.samples,
+            "interval_seconds": self.interval,
+            "stacks": len(self.stacks),
+            "top_functions": self.top_functions(),
+        }
+
+
+def sample(seconds: float, interval: float = PROFILING_INTERVAL, include_idle: bool = False,
+           exclude_threads: Optional[set] = None) -> Optional[Sampler]:
+    """
+    Sample all threads for the given number of seconds.
+
+    Returns None if another sampling session is already running.
+    """
+    if not _session_lock.acquire(blocking=False):
+        return None
+    try:
+        sampler = Sampler(interval, include_idle, exclude_threads).start()
+        time.sleep(min(max(seconds, 0.1), MAX_PROFILE_SECONDS))
+        return sampler.stop()
+    finally:
+        _session_lock.release()
+
+
+class RequestProfile:
+    """
+    Samples the process for the duration of one request.
+
+    Stacks from every busy thread are recorded, so profile requests on a
+    quiet instance (or compare against the baseline of an on-demand sample).
+    """
+
+    def __init__(self, method: str, path: str):
+        self.id = str(next(_profile_ids))
+        self.method = method
+        self.path = path
+        self.sampler = Sampler()
+
+    def __enter__(self) -> "RequestProfile":
+        self.sampler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.sampler.stop()
+        _stored_profiles[self.id] = {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "sampler": self.sampler,
+        }
+        while len(_stored_profiles) > MAX_STORED_PROFILES:
+            _stored_profiles.popitem(last=False)
+        return False
+
+
+def get_request_profile(profile_id: str) -> Optional[Dict]:
+    return _stored_profiles.get(profile_id)
+
+
+def list_request_profiles() -> List[Dict]:
+    return [
+        {"id": p["id"], "method": p["method"], "path": p["path"], **p["sampler"].summary()}
+        for p in reversed(_stored_profiles.values())
+    ]
+
+
+def render_flamegraph(stacks: Counter, title: str = "CPU samples", width: int = 1200) -> str:
+    """Render collapsed stacks as a self-contained SVG flame graph (root at the bottom)."""
+    tree: Dict = {"count": 0, "children": {}}
+    for stack, count in stacks.items():
+        node = tree
+        node["count"] += count
+        for name in stack.split(";"):
+            node = node["children"].setdefault(name, {"count": 0, "children": {}})
+            node["count"] += count
+
+    def depth(node) -> int:
+        return 1 + max((depth(child) for child in node["children"].values()), default=0)
+
+    frame_height = 16
+    levels = depth(tree) - 1
+    height = (levels + 2) * frame_height
+    total = tree["count"] or 1
+    rects = []
+
+    def draw(node, x: float, level: int):
+        for name, child in sorted(node["children"].items()):
+            w = child["count"] * width / total
+            if w >= 0.5:
+                y = height - (level + 2) * frame_height
+                hue = 10 + (hash(name) % 40)
+                label = html.escape(name)
+                pct = child["count"] * 100 / total
+                text = label if w > 40 else ""
+                rects.append(
+                    f'<g><title>{label} ({child["count"]} samples, {pct:.1f}%)</title>'
+                    f'<rect x="{x:.1f}" y="{y}" width="{w:.1f}" height="{frame_height - 1}" '
+                    f'fill="hsl({hue},85%,60%)"/>'
+                    f'<text x="{x + 3:.1f}" y="{y + 11}" font-size="11" font-family="monospace" '
+                    f'textLength="{max(w - 6, 0):.1f}" lengthAdjust="spacingAndGlyphs">{text[:int(w / 7)]}</text></g>'
+                )
+                draw(child, x, level + 1)
+            x += w
+
+    draw(tree, 0.0, 0)
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+        f'viewBox="0 0 {width} {height}">'
+        f'<text x="{width / 2}" y="12" font-size="12" text-anchor="middle">'
+        f'{html.escape(title)} ({tree["count"]} samples)</text>'
+        + "".join(rects)
+        + "</svg>"
+    )
+
+
+def start_tracemalloc(frames: int = 25) -> Dict:
+    global _previous_snapshot
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+        _previous_snapshot = None
+    return tracemalloc_status()
+
+
+def stop_tracemalloc() -> Dict:
+    global _previous_snapshot
+    tracemalloc.stop()
+    _previous_snapshot = None
+    return tracemalloc_status()
+
+
+def tracemalloc_status() -> Dict:
+    current, peak = tracemalloc.get_traced_memory() if tracemalloc.is_tracing() else (0, 0)
+    return {
+        "tracing": tracemalloc.is_tracing(),
+        "frames": tracemalloc.get_traceback_limit(),
+        "current_bytes": current,
+        "peak_bytes": peak,
+    }
+
+
+def tracemalloc_snapshot(limit: int = 25, group_by: str = "lineno") -> Optional[Dict]:
+    """
+    Top allocation sites, plus growth since the previous snapshot.
+
+    Returns None if tracemalloc is not running.
+    """
+    global _previous_snapshot
+    if not tracemalloc.is_tracing():
+        return None
+
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+
+    def describe(stat) -> Dict:
+        return {
+            "location": [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback],
+            "size_bytes": stat.size,
+            "count": stat.count,
+        }
+
+    top = [describe(stat) for stat in snapshot.statistics(group_by)[:limit]]
+    growth = []
+    if _previous_snapshot is not None:
+        for diff in snapshot.compare_to(_previous_snapshot, group_by)[:limit]:
+            growth.append({
+                "location": [f"{frame.filename}:{frame.lineno}" for frame in diff.traceback],
+                "size_diff_bytes": diff.size_diff,
+                "count_diff": diff.count_diff,
+                "size_bytes": diff.size,
+            })
+    _previous_snapshot = snapshot
+
+    return {**tracemalloc_status(), "group_by": group_by, "top": top, "growth_since_last": growth}
@@ -0,0 +1,230 @@
+"""
+Prompt Builder Utility
+Estimates prompt size per model and fits resume + job description into the
+model's context budget before anything is sent to Ollama.
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+# Tokens reserved on top of the output budget for the chat template, BOS/EOS
+# and tokenizer estimation error.
+SAFETY_MARGIN_TOKENS = 64
+
+# Share of the prompt budget reserved for the job description; the resume is
+# capped at the remainder.
+MIN_JOB_DESCRIPTION_SHARE = 0.25
+
+# Phrasings of whole EEO, legal and benefits sentences, which carry no signal
+# for tailoring a resume. Only applied to the prompt copy of a description.
+BOILERPLATE_PATTERNS = [
+    r"(is|are) an? (proud )?equal (employment )?opportunity( and affirmative action)? employer",
+    r"(is|are) an? affirmative action employer",
+    r"applicants will receive consideration for employment without regard to",
+    r"we (do not|don't) discriminate (on the basis of|based on)",
+    r"(request|need|require) an? reasonable accommodation (to|during|in) (apply|the application)",
+    r"participates in e-verify",
+    r"(is|are) a drug[- ]free workplace",
+    r"(medical|health), dental,? (and|&) vision (insurance|coverage|benefits|plans?)",
+    r"401\(?k\)? (plan|match|matching) (with|and|for)",
+    r"(generous|unlimited|flexible) (paid time off|pto|vacation)( policy)?",
+    r"paid parental leave",
+    r"tuition reimbursement (program|benefits?)",
+    r"employee assistance program",
+    r"(equity|stock option|rsu) (package|grants?|program)s?\b",
+    r"wellness (program|stipend)s?\b",
+    r"(see|read|review) our privacy (policy|notice)",
+]
+_BOILERPLATE_RE = re.compile("|".join(BOILERPLATE_PATTERNS), re.IGNORECASE)
+# A sentence stating a requirement is kept even if it also matches boilerplate
+_REQUIREMENT_RE = re.compile(
+    r"\b(required|requires?|requirements?|must|qualifications?|experience|years?)\b", re.IGNORECASE
+)
+
+# Section headings whose entire body can be dropped.
+_BOILERPLATE_HEADING_RE = re.compile(
+    r"^\W*(benefits|perks|what we offer|compensation( and|&)? benefits|"
+    r"equal (employment )?opportunity( statement| employer)?|eeo statement|"
+    r"disclaimer|legal notice)\W*$",
+    re.IGNORECASE,
+)
+_HEADING_RE = re.compile(r"^\W*[A-Za-z][A-Za-z &/'-]{1,60}:?\W*$")
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9•\-*])")
+
+# Static instructions and the resume come first so every generation for the
+# same resume shares a prompt prefix Ollama can keep in its KV cache; only
+# the job description at the end changes between jobs.
+PROMPT_TEMPLATE = """
+    You are an expert resume writer.
+
+    TASK:
+    Rewrite the candidate's resume below to specifically target the job description that follows it.
+    - Highlight relevant skills and experience.
+    - Use keywords from the job description.
+    - Maintain a professional tone.
+    - Do not invent false information.
+
+    OUTPUT:
+    Provide ONLY the markdown content of the new resume.
+
+    CANDIDATE RESUME:
+    {resume}
+
+    JOB DESCRIPTION:
+    {job_description}
+
+    TAILORED RESUME:
+    """
+
+
+def estimate_tokens(text: str, model_config: Optional[Dict] = None) -> int:
+    """
+    Estimate the number of tokens in text for a given model.
+
+    Uses the model's average characters-per-token ratio; good enough for
+    budgeting without pulling a tokenizer into the API process.
+    """
+    if not text:
+        return 0
+    chars_per_token = (model_config or {}).get("chars_per_token", 4.0)
+    return int(len(text) / chars_per_token) + 1
+
+
+def get_prompt_budget(model_config: Dict) -> int:
+    """
+    Tokens available for the prompt once the output budget is reserved.
+    """
+    context_window = model_config.get("context_window", 2048)
+    output_tokens = model_config.get("recommended_tokens", 1000)
+    return max(context_window - output_tokens - SAFETY_MARGIN_TOKENS, 256)
+
+
+def _split_sentences(paragraph: str) -> List[str]:
+    return [s for s in _SENTENCE_SPLIT_RE.split(paragraph) if s.strip()]
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\W+", " ", text).strip().lower()
+
+
+def compress_job_description(description: str) -> str:
+    """
+    Strip boilerplate that does not help tailoring a resume.
+
+    Removes EEO/legal statements, benefits sections and duplicated
+    paragraphs or sentences while keeping line structure intact. Lossy, so
+    only used on the copy of a description that goes into a prompt.
+    """
+    if not description:
+        return ""
+
+    kept_lines = []
+    seen = set()
+    skipping_section = False
+
+    for raw_line in description.splitlines():
+        line = raw_line.strip()
+        if not line:
+            if kept_lines and kept_lines[-1] != "":
+                kept_lines.append("")
+            continue
+
+        # Drop everything under a boilerplate heading until the next heading
+        if _BOILERPLATE_HEADING_RE.match(line):
+            skipping_section = True
+            continue
+        if skipping_section:
+            if _HEADING_RE.match(line) and not line.startswith(("-", "*", "•")):
+                skipping_section = False
+            else:
+                continue
+
+        sentences = []
+        for sentence in _split_sentences(line):
+            key = _normalize(sentence)
+            if not key or key in seen:
+                continue
+            if _BOILERPLATE_RE.search(sentence) and not _REQUIREMENT_RE.search(sentence):
+                continue
+            seen.add(key)
+            sentences.append(sentence.strip())
+
+        if sentences:
+            kept_lines.append(" ".join(sentences))
+
+    return "\n".join(kept_lines).strip()
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model_config: Optional[Dict] = None) -> str:
+    """
+    Truncate text to roughly max_tokens, cutting at a word boundary.
+    """
+    if estimate_tokens(text, model_config) <= max_tokens:
+        return text
+
+    chars_per_token = (model_config or {}).get("chars_per_token", 4.0)
+    max_chars = max(int(max_tokens * chars_per_token), 0)
+    cut = text[:max_chars]
+    last_space = cut.rfind(" ")
+    if last_space > max_chars * 0.8:
+        cut = cut[:last_space]
+    return cut.rstrip(" ,;:-") + "..."
+
+
+def build_prompt(
+    base_resume_text: str,
+    job_description: str,
+    model_config: Dict
+) -> Tuple[str, Dict]:
+    """
+    Build the generation prompt and fit it into the model's prompt budget.
+
+    Args:
+        base_resume_text: The candidate's base resume content
+        job_description: The job posting description
+        model_config: Entry from AVAILABLE_MODELS
+
+    Returns:
+        Tuple of (prompt, stats_dict)
+        stats include: prompt_tokens_estimate, prompt_budget,
+        job_description_tokens, resume_tokens, compressed_chars, truncated,
+        prefix_tokens (the job-independent part reusable from Ollama's KV cache)
+    """
+    budget = get_prompt_budget(model_config)
+    template_tokens = estimate_tokens(PROMPT_TEMPLATE.format(job_description="", resume=""), model_config)
+    available = max(budget - template_tokens, 0)
+
+    original_length = len(job_description or "")
+    job_text = compress_job_description(job_description or "")
+    resume_text = (base_resume_text or "").strip()
+
+    job_tokens = estimate_tokens(job_text, model_config)
+    resume_tokens = estimate_tokens(resume_text, model_config)
+    truncated = False
+
+    # The resume cap depends only on the model, never on the job, so the
+    # resume part of the prompt stays byte-identical across jobs.
+    resume_cap = available - int(available * MIN_JOB_DESCRIPTION_SHARE)
+    if resume_tokens > resume_cap:
+        truncated = True
+        resume_text = truncate_to_tokens(resume_text, resume_cap, model_config)
+        resume_tokens = estimate_tokens(resume_text, model_config)
+
+    if job_tokens + resume_tokens > available:
+        truncated = True
+        job_text = truncate_to_tokens(job_text, max(available - resume_tokens, 0), model_config)
+        job_tokens = estimate_tokens(job_text, model_config)
+
+    prompt = PROMPT_TEMPLATE.format(job_description=job_text, resume=resume_text)
+    prefix = PROMPT_TEMPLATE.split("{job_description}")[0].format(resume=resume_text)
+
+    stats = {
+        "prompt_tokens_estimate": estimate_tokens(prompt, model_config),
+        "prompt_budget": budget,
+        "job_description_tokens": job_tokens,
+        "resume_tokens": resume_tokens,
+        "compressed_chars": max(original_length - len(job_text), 0),
+        "truncated": truncated,
+        "prefix_tokens": estimate_tokens(prefix, model_config),
+    }
+    return prompt, stats
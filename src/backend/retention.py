@@ -0,0 +1,330 @@
+"""
+Retention
+
+Keeps the hot tables and the data directory from growing forever:
+
+- job postings older than JOB_RETENTION_DAYS that no application refers to
+- applications in a status listed in APPLICATION_RETENTION (status=days,
+  counted from their last change), with their revisions and PDF
+- content blobs nothing refers to any more once those are gone
+- orphaned files: PDFs under PDF_DIR and uploads under UPLOAD_DIR that no
+  row points at (older than ORPHAN_GRACE_MINUTES, so files of a render or
+  upload still in flight are left alone)
+
+With RETENTION_MODE=archive (the default) removed rows are first copied to
+cold storage: the job_postings_archive / applications_archive tables with
+the text zlib-compressed, or with ARCHIVE_FORMAT=parquet one Parquet file
+per batch under ARCHIVE_DIR (needs pyarrow). RETENTION_MODE=delete drops
+them outright. Rows move in batches of RETENTION_BATCH_SIZE, each its own
+transaction, so a run never holds long locks.
+
+A posting that is archived and later scraped again is ingested as new.
+Dashboard stats and cached list responses pick up the deletes through the
+usual session events.
+
+Usage (from src/backend):
+    python retention.py run --dry-run   # what a run would remove
+    python retention.py run
+"""
+
+import argparse
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import exists, func
+from sqlalchemy.orm import Session
+
+from application_service import PDF_DIR
+from content_store import application_content, delete_unreferenced
+from database import SessionLocal, UPLOAD_DIR
+from models import Application, ApplicationArchive, ApplicationRevision, JobPosting, JobPostingArchive, Resume
+from pdf_generator import remove_pdf
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+RETENTION_ENABLED = os.getenv("RETENTION_ENABLED", "true").lower() == "true"
+RETENTION_INTERVAL_HOURS = float(os.getenv("RETENTION_INTERVAL_HOURS", "24"))
+RETENTION_MODE = os.getenv("RETENTION_MODE", "archive")  # archive or delete
+ARCHIVE_FORMAT = os.getenv("ARCHIVE_FORMAT", "table")  # table or parquet
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "/app/data/archive")
+# 0 keeps postings forever
+JOB_RETENTION_DAYS = int(os.getenv("JOB_RETENTION_DAYS", "90"))
+# e.g. "Rejected=180,Draft=60"; empty keeps every application
+APPLICATION_RETENTION = os.getenv("APPLICATION_RETENTION", "")
+RETENTION_BATCH_SIZE = int(os.getenv("RETENTION_BATCH_SIZE", "500"))
+ORPHAN_GRACE_MINUTES = int(os.getenv("ORPHAN_GRACE_MINUTES", "60"))
+
+if RETENTION_MODE == "archive" and ARCHIVE_FORMAT == "parquet" and not PARQUET_AVAILABLE:
+    print("Warning: pyarrow not installed. Archiving to tables instead of Parquet.")
+    ARCHIVE_FORMAT = "table"
+
+_last_run: Optional[Dict] = None
+
+
+def parse_status_policy(value: str) -> Dict[str, int]:
+    """'Rejected=180,Draft=60' -> {"Rejected": 180, "Draft": 60}"""
+    policy = {}
+    for item in value.split(","):
+        if "=" in item:
+            status, days = item.split("=", 1)
+            policy[status.strip()] = int(days)
+    return policy
+
+
+def pack_text(text: Optional[str]) -> Optional[bytes]:
+    return zlib.compress(text.encode("utf-8"), 9) if text else None
+
+
+def unpack_text(data: Optional[bytes]) -> Optional[str]:
+    return zlib.decompress(data).decode("utf-8") if data else None
+
+
+def _write_parquet(table: str, records: List[Dict]):
+    """One file per batch, written under a temporary name and renamed, so rows
+    are only deleted once their archive file is complete."""
+    directory = os.path.join(ARCHIVE_DIR, table)
+    os.makedirs(directory, exist_ok=True)
+    name = f"{table}-{datetime.utcnow():%Y%m%dT%H%M%S}-{records[0]['id']}.parquet"
+    tmp_path = os.path.join(directory, f".{name}.tmp")
+    pyarrow.parquet.write_table(pyarrow.Table.from_pylist(records), tmp_path, compression="zstd")
+    os.replace(tmp_path, os.path.join(directory, name))
+
+
+def _archive(db: Session, model, records: List[Dict], packed_field: str):
+    if ARCHIVE_FORMAT == "parquet":
+        _write_parquet(model.__tablename__, records)
+        return
+    for record in records:
+        record[packed_field] = pack_text(record[packed_field])
+    # Replaces copies left by an earlier batch whose rows then stayed (see expire_jobs)
+    db.query(model).filter(model.id.in_([record["id"] for record in records])).delete(synchronize_session=False)
+    db.bulk_insert_mappings(model, records)
+
+
+def _stale_jobs(db: Session, cutoff: datetime):
+    return db.query(JobPosting).filter(
+        JobPosting.fetched_at < cutoff,
+        ~exists().where(Application.job_id == JobPosting.id)
+    )
+
+
+def _expired_applications(db: Session, status: str, cutoff: datetime):
+    return db.query(Application).filter(
+        Application.status == status,
+        func.coalesce(Application.updated_at, Application.created_at) < cutoff
+    )
+
+
+def expire_jobs(db: Session, dry_run: bool = False) -> Dict:
+    """Archive (or delete) stale, unreferenced job postings in batches."""
+    if JOB_RETENTION_DAYS <= 0:
+        return {"removed": 0}
+    cutoff = datetime.utcnow() - timedelta(days=JOB_RETENTION_DAYS)
+    if dry_run:
+        return {"removed": _stale_jobs(db, cutoff).count()}
+
+    removed = 0
+    while True:
+        jobs = _stale_jobs(db, cutoff).order_by(JobPosting.id).limit(RETENTION_BATCH_SIZE).all()
+        if not jobs:
+            return {"removed": removed}
+        ids = [job.id for job in jobs]
+        if RETENTION_MODE == "archive":
+            now = datetime.utcnow()
+            _archive(db, JobPostingArchive, [
+                {
+                    "id": job.id, "user_id": job.user_id, "title": job.title, "company": job.company,
+                    "url": job.url, "source": job.source, "fingerprint": job.fingerprint,
+                    "description": job.description, "fetched_at": job.fetched_at, "archived_at": now,
+                }
+                for job in jobs
+            ], "description")
+        # Re-checked: an application may have been created for one of them meanwhile
+        removed += db.query(JobPosting).filter(
+            JobPosting.id.in_(ids),
+            ~exists().where(Application.job_id == JobPosting.id)
+        ).delete(synchronize_session=False)
+        db.commit()
+
+
+def expire_applications(db: Session, dry_run: bool = False) -> Dict:
+    """Archive (or delete) applications past their status's retention, with revisions and PDFs."""
+    removed = {}
+    for status, days in parse_status_policy(APPLICATION_RETENTION).items():
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        if dry_run:
+            removed[status] = _expired_applications(db, status, cutoff).count()
+            continue
+        removed[status] = 0
+        while True:
+            apps = _expired_applications(db, status, cutoff).order_by(Application.id).limit(RETENTION_BATCH_SIZE).all()
+            if not apps:
+                break
+            ids = [app.id for app in apps]
+            pdf_paths = [app.pdf_path for app in apps if app.pdf_path]
+            if RETENTION_MODE == "archive":
+                jobs = {job.id: job for job in db.query(JobPosting.id, JobPosting.title, JobPosting.company).filter(
+                    JobPosting.id.in_({app.job_id for app in apps})
+                )}
+                revision_counts = dict(db.query(ApplicationRevision.application_id, func.count(ApplicationRevision.id)).filter(
+                    ApplicationRevision.application_id.in_(ids)
+                ).group_by(ApplicationRevision.application_id))
+                now = datetime.utcnow()
+                _archive(db, ApplicationArchive, [
+                    {
+                        "id": app.id, "user_id": app.user_id, "job_id": app.job_id,
+                        "job_title": jobs[app.job_id].title if app.job_id in jobs else None,
+                        "job_company": jobs[app.job_id].company if app.job_id in jobs else None,
+                        "resume_id": app.resume_id, "status": app.status, "model_used": app.model_used,
+                        "ats_score": app.ats_score, "ats_grade": app.ats_grade,
+                        "revisions": revision_counts.get(app.id, 0),
+                        "content": application_content(db, app),
+                        "created_at": app.created_at, "updated_at": app.updated_at, "archived_at": now,
+                    }
+                    for app in apps
+                ], "content")
+            db.query(ApplicationRevision).filter(ApplicationRevision.application_id.in_(ids)).delete(synchronize_session=False)
+            db.query(Application).filter(Application.id.in_(ids)).delete(synchronize_session=False)
+            db.commit()
+            for pdf_path in pdf_paths:
+                remove_pdf(pdf_path)
+            removed[status] += len(ids)
+    return {"removed": sum(removed.values()), "by_status": removed}
+
+
+def sweep_orphan_files(db: Session, dry_run: bool = False) -> Dict:
+    """Delete PDFs and uploads that no application or resume points at."""
+    referenced = {
+        os.path.realpath(path)
+        for (path,) in db.query(Application.pdf_path).filter(Application.pdf_path.isnot(None)).union(
+            db.query(Resume.file_path).filter(Resume.file_path.isnot(None))
+        )
+    }
+    grace_cutoff = time.time() - ORPHAN_GRACE_MINUTES * 60
+    report = {}
+    for label, directory in (("pdfs", PDF_DIR), ("uploads", UPLOAD_DIR)):
+        files = freed = 0
+        if os.path.isdir(directory):
+            for entry in os.scandir(directory):
+                if not entry.is_file() or os.path.realpath(entry.path) in referenced:
+                    continue
+                stat = entry.stat()
+                if stat.st_mtime > grace_cutoff:
+                    continue
+                if not dry_run:
+                    try:
+                        os.remove(entry.path)
+                    except OSError as e:
+                        print(f"Warning: Could not delete orphaned file {entry.path}: {e}")
+                        continue
+                files += 1
+                freed += stat.st_size
+        report[label] = {"files": files, "bytes": freed}
+    return report
+
+
+def run_retention(dry_run: bool = False) -> Dict:
+    """One pass of every policy; dry_run only counts."""
+    global _last_run
+    started = time.monotonic()
+    db = SessionLocal()
+    try:
+        report = {
+            "started_at": datetime.utcnow().isoformat(),
+            "dry_run": dry_run,
+            "mode": RETENTION_MODE,
+            "archive_format": ARCHIVE_FORMAT if RETENTION_MODE == "archive" else None,
+        }
+        # Applications first: postings only they referenced can go in the same run
+        report["applications"] = expire_applications(db, dry_run)
+        report["jobs"] = expire_jobs(db, dry_run)
+        if not dry_run:
+            grace_cutoff = datetime.utcnow() - timedelta(minutes=ORPHAN_GRACE_MINUTES)
+            report["content_blobs"] = delete_unreferenced(db, grace_cutoff, RETENTION_BATCH_SIZE)
+        report["files"] = sweep_orphan_files(db, dry_run)
+        report["duration_seconds"] = round(time.monotonic() - started, 2)
+    finally:
+        db.close()
+    if not dry_run:
+        _last_run = report
+        print(
+            f"Retention: {report['jobs']['removed']} jobs and {report['applications']['removed']} applications "
+            f"{'archived' if RETENTION_MODE == 'archive' else 'deleted'}, "
+            f"{report['content_blobs']['blobs']} blobs and "
+            f"{sum(f['files'] for f in report['files'].values())} orphaned files removed"
+        )
+    return report
+
+
+def retention_status() -> Dict:
+    return {
+        "enabled": RETENTION_ENABLED,
+        "interval_hours": RETENTION_INTERVAL_HOURS,
+        "mode": RETENTION_MODE,
+        "archive_format": ARCHIVE_FORMAT,
+        "job_retention_days": JOB_RETENTION_DAYS or None,
+        "application_retention_days": parse_status_policy(APPLICATION_RETENTION),
+        "orphan_grace_minutes": ORPHAN_GRACE_MINUTES,
+        "last_run": _last_run,
+    }
+
+
+class RetentionScheduler:
+    """Background loop running run_retention() every RETENTION_INTERVAL_HOURS."""
+
+    def __init__(self, interval_hours: float = RETENTION_INTERVAL_HOURS):
+        self.interval_seconds = max(interval_hours * 3600, 60)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="retention", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        # Not at startup: spread replicas / restarts over the first interval's first hour
+        self._stop.wait(random.uniform(60, min(3600, self.interval_seconds)))
+        while not self._stop.is_set():
+            try:
+                run_retention()
+            except Exception as e:
+                print(f"Error running retention: {e}")
+            self._stop.wait(self.interval_seconds)
+
+
+retention_scheduler = RetentionScheduler()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive stale rows and delete orphaned files")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="Apply every retention policy once")
+    run_parser.add_argument("--dry-run", action="store_true", help="Only count what would be removed")
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run_retention(dry_run=args.dry_run)
+        if args.dry_run:
+            files = report["files"]
+            print(f"Would remove {report['jobs']['removed']} jobs, {report['applications']['removed']} applications "
+                  f"{report['applications']['by_status']}, {files['pdfs']['files']} PDFs "
+                  f"({files['pdfs']['bytes'] / 1e6:.1f} MB) and {files['uploads']['files']} uploads "
+                  f"({files['uploads']['bytes'] / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""
+Application Revisions
+
+Every generation (and manual content upload) of an application is kept as a
+row in application_revisions with its model metadata and ATS result, so
+regenerating never throws away earlier output.
+
+Revision text goes through the content store. A regeneration is compressed
+against the revision it replaces when that is smaller than against the base
+resume, so keeping history costs roughly the size of what changed. Identical
+outputs share one blob.
+
+Diffs are computed on demand with difflib and cached by the pair of content
+hashes: content is immutable per hash, so a cached diff never goes stale.
+"""
+
+import difflib
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from content_store import get as get_content
+from models import Application, ApplicationRevision
+from pdf_generator import remove_pdf
+
+# Diffs kept in memory, keyed by (from hash, to hash, context lines)
+DIFF_CACHE_SIZE = 128
+
+SNAPSHOT_FIELDS = (
+    "content_hash",
+    "model_used",
+    "model_generation_time",
+    "model_tokens_used",
+    "model_prompt_tokens",
+    "ats_score",
+    "ats_grade",
+    "ats_feedback",
+    "ats_analyzed_at",
+    "ats_score_delta",
+)
+
+_diffs: "OrderedDict[tuple, Dict]" = OrderedDict()
+_diffs_lock = threading.Lock()
+
+
+def latest_revision(db: Session, application_id: int) -> Optional[ApplicationRevision]:
+    return db.query(ApplicationRevision).filter(
+        ApplicationRevision.application_id == application_id
+    ).order_by(ApplicationRevision.revision.desc()).first()
+
+
+def record_revision(db: Session, app: Application, source: str = "generate", generations: int = 1) -> ApplicationRevision:
+    """
+    Snapshot the application's current content and metadata as its next
+    revision (caller commits). Locks the application row until then, so
+    concurrent saves for one application number their revisions in turn.
+    """
+    db.query(Application.id).filter(Application.id == app.id).with_for_update().one()
+    next_number = (db.query(func.max(ApplicationRevision.revision)).filter(
+        ApplicationRevision.application_id == app.id
+    ).scalar() or 0) + 1
+    revision = ApplicationRevision(
+        application_id=app.id,
+        revision=next_number,
+        source=source,
+        generations=generations,
+        **{field: getattr(app, field) for field in SNAPSHOT_FIELDS}
+    )
+    db.add(revision)
+    return revision
+
+
+def sync_revision_ats(db: Session, app: Application):
+    """Copy a re-run ATS analysis onto the revision holding the current content."""
+    revision = latest_revision(db, app.id)
+    if revision is not None and revision.content_hash == app.content_hash:
+        for field in ("ats_score", "ats_grade", "ats_feedback", "ats_analyzed_at", "ats_score_delta"):
+            setattr(revision, field, getattr(app, field))
+
+
+def list_revisions(db: Session, application_id: int) -> List[ApplicationRevision]:
+    return db.query(ApplicationRevision).filter(
+        ApplicationRevision.application_id == application_id
+    ).order_by(ApplicationRevision.revision).all()
+
+
+def get_revision(db: Session, application_id: int, number: int) -> Optional[ApplicationRevision]:
+    return db.query(ApplicationRevision).filter(
+        ApplicationRevision.application_id == application_id,
+        ApplicationRevision.revision == number
+    ).first()
+
+
+def revision_summary(revision: ApplicationRevision, current_hash: Optional[str] = None) -> Dict:
+    return {
+        "revision": revision.revision,
+        "source": revision.source,
+        "created_at": revision.created_at,
+        "content_hash": revision.content_hash,
+        "current": current_hash is not None and revision.content_hash == current_hash,
+        "model_used": revision.model_used,
+        "model_generation_time": revision.model_generation_time,
+        "model_tokens_used": revision.model_tokens_used,
+        "model_prompt_tokens": revision.model_prompt_tokens,
+        "ats_score": revision.ats_score,
+        "ats_grade": revision.ats_grade,
+        "ats_analyzed_at": revision.ats_analyzed_at,
+        "ats_score_delta": revision.ats_score_delta,
+    }
+
+
+def revision_content(db: Session, revision: ApplicationRevision) -> str:
+    return get_content(db, revision.content_hash) if revision.content_hash else ""
+
+
+def diff_contents(db: Session, from_hash: Optional[str], to_hash: Optional[str], context: int = 3) -> Dict:
+    """Unified diff plus line counts between two stored texts (cached per hash pair)."""
+    key = (from_hash, to_hash, context)
+    with _diffs_lock:
+        if key in _diffs:
+            _diffs.move_to_end(key)
+            return _diffs[key]
+
+    old_lines = (get_content(db, from_hash) if from_hash else "").splitlines()
+    new_lines = (get_content(db, to_hash) if to_hash else "").splitlines()
+    diff = list(difflib.unified_diff(old_lines, new_lines, lineterm="", n=context))
+    added = sum(1 for line in diff if line.startswith("+") and not line.startswith("+++"))
+    removed = sum(1 for line in diff if line.startswith("-") and not line.startswith("---"))
+    result = {
+        "identical": from_hash == to_hash,
+        "lines_added": added,
+        "lines_removed": removed,
+        "lines_unchanged": len(new_lines) - added,
+        "diff": "\n".join(diff),
+    }
+
+    with _diffs_lock:
+        _diffs[key] = result
+        while len(_diffs) > DIFF_CACHE_SIZE:
+            _diffs.popitem(last=False)
+    return result
+
+
+def compare_revisions(
+    db: Session,
+    from_revision: ApplicationRevision,
+    to_revision: ApplicationRevision,
+    context: int = 3
+) -> Dict:
+    result = diff_contents(db, from_revision.content_hash, to_revision.content_hash, context)
+    ats_delta = None
+    if from_revision.ats_score is not None and to_revision.ats_score is not None:
+        ats_delta = to_revision.ats_score - from_revision.ats_score
+    return {
+        "from": revision_summary(from_revision),
+        "to": revision_summary(to_revision),
+        "ats_score_delta": ats_delta,
+        **result,
+    }
+
+
+def restore_revision(db: Session, app: Application, revision: ApplicationRevision) -> ApplicationRevision:
+    """
+    Make an earlier revision current again without regenerating. Recorded as
+    a new "restore" revision; its content is shared with the original blob.
+    The PDF is deleted since it was rendered from other content.
+    """
+    for field in SNAPSHOT_FIELDS:
+        setattr(app, field, getattr(revision, field))
+    app.generated_content = None
+    stale_pdf, app.pdf_path = app.pdf_path, None
+    restored = record_revision(db, app, source="restore")
+    db.commit()
+    remove_pdf(stale_pdf)
+    return restored
@@ -1,16 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
-from models import Resume, JobPosting, Application
-from database import get_db
-from ai_service import generate_tailored_resume, get_available_models
-from ats_service import get_ats_score
-from pdf_generator import generate_resume_pdf
-from typing import Optional
+from models import Resume, JobPosting, Application, User
+from database import get_db, SessionLocal
+from ai_service import (
+    generate_tailored_resumes_batch,
+    generate_best_of_n,
+    get_available_models,
+    resolve_model,
+    start_race,
+    submit_with_fallback,
+    AVAILABLE_MODELS,
+    BEST_OF_N_MAX_CANDIDATES,
+    RACE_DRAFT_MODEL,
+)
+from generation_scheduler import scheduler, current_tenant, client_priority, PRIORITY_NORMAL, PRIORITY_LOW
+from ats_cache import base_resume_score, cached_ats_score, feedback_json
+from application_service import postprocess_executor, save_generation, render_application_pdf
+from model_analytics import pick_model, AUTO_MODEL
+from http_cache import cached_json, conditional_json, row_etag
+from content_store import application_content, set_application_content
+from serialization import loads_or_none
+from tenancy import get_current_user, check_rate_limit, enforce_generation_limits, is_admin, visible_jobs
+from revisions import (
+    record_revision,
+    sync_revision_ats,
+    list_revisions,
+    get_revision,
+    latest_revision,
+    revision_summary,
+    revision_content,
+    compare_revisions,
+    restore_revision,
+)
+from typing import List, Optional
+from datetime import datetime
+import asyncio
 import os
-import uuid
-import json
 
 class ApplicationCreate(BaseModel):
     job_id: int
@@ -18,17 +45,34 @@ class ApplicationCreate(BaseModel):
     tailored_content: str
     status: str = "Generated"
 
+class BatchGenerateRequest(BaseModel):
+    resume_id: int
+    job_ids: List[int]
+    models: Optional[List[str]] = None  # Each job is generated with every model listed
+    priority: int = PRIORITY_LOW  # Clamped to normal at most
+    latency_budget: Optional[float] = None  # For "auto" models, seconds (p90)
+
 router = APIRouter(
     prefix="/applications",
     tags=["applications"],
 )
 
+GENERATION_MODES = ("single", "race", "best_of_n")
+
+
 @router.post("/generate", response_model=dict)
 async def generate_application(
     resume_id: int,
     job_id: int,
     model: Optional[str] = None,
-    db: Session = Depends(get_db)
+    priority: int = PRIORITY_NORMAL,
+    mode: str = "single",
+    draft_model: Optional[str] = None,
+    candidates: Optional[str] = None,
+    n: int = 3,
+    latency_budget: Optional[float] = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
 ):
     """
     Generate a tailored resume for a specific job posting using AI.
@@ -36,73 +80,67 @@ async def generate_application(
     Args:
         resume_id: ID of the base resume to use
         job_id: ID of the job posting to target
-        model: Optional AI model to use (defaults to llama3)
+        model: Optional AI model to use (defaults to llama3); "auto" picks the
+               best ATS model from the leaderboard within latency_budget
+        priority: Scheduler priority, lower runs first (defaults to normal;
+                  values above normal are clamped to normal)
+        mode: "single", "race" (fast draft first, replaced by the quality
+              model when it finishes) or "best_of_n" (keep the best ATS score)
+        draft_model: Fast model for race mode (defaults to phi3)
+        candidates: Comma-separated models for best_of_n (defaults to n x model)
+        n: Number of candidates for best_of_n when candidates is not given
+           (at most BEST_OF_N_MAX_CANDIDATES, like candidates)
+        latency_budget: p90 seconds allowed for model="auto" (defaults to ROUTING_LATENCY_BUDGET)
         db: Database session
-    """
-    # Fetch the base resume
-    resume = db.query(Resume).filter(Resume.id == resume_id).first()
-    if not resume:
-        raise HTTPException(status_code=404, detail="Resume not found")
+        user: Calling user (X-User-Id); counts against their rate limit, and every
+              generation the mode starts counts against their quota
     
-    # Fetch the job posting
-    job = db.query(JobPosting).filter(JobPosting.id == job_id).first()
-    if not job:
-        raise HTTPException(status_code=404, detail="Job posting not found")
+    Database work (lookups, quota, saving with ATS scoring) runs in worker
+    threads so it doesn't block the event loop while generations are awaited.
+    """
+    if mode not in GENERATION_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown mode '{mode}', expected one of {GENERATION_MODES}")
     
-    # Extract resume text (in a real scenario, you'd parse the PDF/DOCX)
-    # For now, we'll use a placeholder
-    resume_text = resume.content_text or "Professional with experience in software development"
+    resume_text, job_description, model, models = await asyncio.to_thread(
+        _prepare_generation, db, user, resume_id, job_id, model, mode, draft_model, candidates, n, latency_budget
+    )
+    current_tenant.set(user.id)
+    priority = client_priority(priority)
     
     # Generate tailored resume using AI
     try:
-        tailored_content, metadata = generate_tailored_resume(
-            resume_text, 
-            job.description,
-            model_name=model
-        )
-        
-        # Create or update application record
-        existing_app = db.query(Application).filter(
-            Application.job_id == job_id,
-            Application.resume_id == resume_id
-        ).first()
+        if mode == "race":
+            return await _generate_race(db, resume_id, job_id, resume_text, job_description, model, draft_model, priority)
         
-        if existing_app:
-            existing_app.generated_content = tailored_content
-            existing_app.status = "Generated"
-            existing_app.model_used = metadata["model_used"]
-            existing_app.model_generation_time = int(metadata["generation_time"])
-            existing_app.model_tokens_used = metadata["tokens_used"]
-        else:
-            new_app = Application(
-                job_id=job_id,
-                resume_id=resume_id,
-                generated_content=tailored_content,
-                status="Generated",
-                model_used=metadata["model_used"],
-                model_generation_time=int(metadata["generation_time"]),
-                model_tokens_used=metadata["tokens_used"]
+        if mode == "best_of_n":
+            tailored_content, metadata, summary = await asyncio.to_thread(
+                generate_best_of_n, resume_text, job_description, models, cached_ats_score, priority
+            )
+            if not tailored_content:
+                raise HTTPException(status_code=500, detail="All best-of-N candidates failed")
+            metadata["generations"] = len(models)
+            
+            await asyncio.to_thread(
+                save_generation, db, resume_id, job_id, tailored_content, metadata, ats_result=metadata["ats"]
             )
-            db.add(new_app)
+            
+            return {
+                "status": "success",
+                "message": f"Best of {len(models)} candidates: {metadata['model_used']} scored {metadata['ats']['score']}",
+                "tailored_resume": tailored_content[:500] + "...",  # Preview
+                "metadata": metadata,
+                "candidates": summary
+            }
         
-        db.commit()
+        # Queue behind other generations so models aren't swapped per request
+        tailored_content, metadata = await asyncio.wrap_future(submit_with_fallback(
+            resume_text,
+            job_description,
+            model_name=model,
+            priority=priority
+        ))
         
-        # Auto-run ATS analysis on generated content
-        try:
-            ats_result = get_ats_score(tailored_content)
-            app_to_update = existing_app if existing_app else new_app
-            app_to_update.ats_score = ats_result['score']
-            app_to_update.ats_grade = ats_result['grade']
-            app_to_update.ats_feedback = json.dumps({
-                'suggestions': ats_result.get('suggestions', []),
-                'strengths': ats_result.get('strengths', []),
-                'missing_keywords': ats_result.get('missing_keywords', [])
-            })
-            app_to_update.ats_analyzed_at = db.func.now()
-            db.commit()
-        except Exception as e:
-            print(f"Warning: ATS analysis failed: {e}")
-            # Continue even if ATS analysis fails
+        await asyncio.to_thread(save_generation, db, resume_id, job_id, tailored_content, metadata)
         
         return {
             "status": "success",
@@ -111,18 +149,266 @@ async def generate_application(
             "metadata": metadata
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate resume: {str(e)}")
 
 
+def _prepare_generation(
+    db: Session,
+    user: User,
+    resume_id: int,
+    job_id: int,
+    model: Optional[str],
+    mode: str,
+    draft_model: Optional[str],
+    candidates: Optional[str],
+    n: int,
+    latency_budget: Optional[float]
+):
+    """
+    Look up the resume and job, pick the model(s) and charge the generations.
+    
+    Returns (resume_text, job_description, model, best_of_n models).
+    """
+    # Fetch the base resume
+    resume = _get_resume(db, resume_id, user)
+    
+    # Fetch the job posting
+    job = _get_job(db, job_id, user)
+    
+    model = pick_model(db, model, latency_budget)
+    
+    # Every LLM generation the call starts counts against the quota
+    models = []
+    generations = 1
+    if mode == "best_of_n":
+        names = [m.strip() for m in candidates.split(",") if m.strip()] if candidates else []
+        unknown = [name for name in names if name not in AVAILABLE_MODELS and name != AUTO_MODEL]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown candidate models: {', '.join(unknown)}")
+        count = len(names) if names else max(n, 1)
+        if count > BEST_OF_N_MAX_CANDIDATES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"best_of_n allows at most {BEST_OF_N_MAX_CANDIDATES} candidates, got {count}"
+            )
+        models = [pick_model(db, name, latency_budget) for name in names] if names else [resolve_model(model)] * count
+        generations = len(models)
+    elif mode == "race":
+        generations = 2 if resolve_model(draft_model or RACE_DRAFT_MODEL) != resolve_model(model) else 1
+    
+    enforce_generation_limits(db, user, generations)
+    
+    # Extract resume text (in a real scenario, you'd parse the PDF/DOCX)
+    # For now, we'll use a placeholder
+    resume_text = resume.content_text or "Professional with experience in software development"
+    return resume_text, job.description, model, models
+
+
+def _save_generation_id(db: Session, *args, **kwargs) -> int:
+    """save_generation returning the application id, read before leaving the worker thread."""
+    return save_generation(db, *args, **kwargs).id
+
+
+async def _generate_race(
+    db: Session,
+    resume_id: int,
+    job_id: int,
+    resume_text: str,
+    job_description: str,
+    model: Optional[str],
+    draft_model: Optional[str],
+    priority: int
+) -> dict:
+    """
+    Race a fast draft model against the quality model.
+    
+    Returns the draft as soon as it is ready (status "Draft") and lets the
+    quality generation overwrite it in the background. If the quality model
+    finishes first the draft is cancelled. The background save (with its ATS
+    scoring) runs on the post-processing executor, not in the LLM slot.
+    """
+    quality, draft = start_race(resume_text, job_description, model, draft_model, priority)
+    quality_waiter = asyncio.wrap_future(quality.future)
+    
+    if draft is not None:
+        draft_waiter = asyncio.wrap_future(draft.future)
+        await asyncio.wait([quality_waiter, draft_waiter], return_when=asyncio.FIRST_COMPLETED)
+        
+        if draft_waiter.done() and not quality_waiter.done():
+            try:
+                draft_content, draft_metadata = draft_waiter.result()
+            except Exception as e:
+                print(f"Warning: race draft with {draft.model_name} failed: {e}")
+                draft_content, draft_metadata = "", {}
+            
+            if draft_content:
+                app_id = await asyncio.to_thread(
+                    _save_generation_id, db, resume_id, job_id, draft_content, draft_metadata, status="Draft"
+                )
+                
+                def save_quality(content, metadata):
+                    session = SessionLocal()
+                    try:
+                        save_generation(session, resume_id, job_id, content, metadata)
+                    except Exception as e:
+                        print(f"Warning: saving race result from {quality.model_name} failed: {e}")
+                    finally:
+                        session.close()
+                
+                def finish_race(future):
+                    # Runs on the scheduler's thread; hand off so the slot is freed
+                    if future.cancelled():
+                        return
+                    try:
+                        content, metadata = future.result()
+                    except Exception as e:
+                        print(f"Warning: race quality generation with {quality.model_name} failed: {e}")
+                        return
+                    if content:
+                        postprocess_executor.submit(save_quality, content, metadata)
+                
+                quality.future.add_done_callback(finish_race)
+                
+                return {
+                    "status": "success",
+                    "message": f"Draft ready from {draft.model_name}; {quality.model_name} will replace it when done",
+                    "application_id": app_id,
+                    "final": False,
+                    "pending_model": quality.model_name,
+                    "tailored_resume": draft_content[:500] + "...",  # Preview
+                    "metadata": draft_metadata
+                }
+        
+        # Quality won (or the draft failed): stop the draft to free Ollama
+        draft.cancel()
+    
+    tailored_content, metadata = await quality_waiter
+    if not tailored_content:
+        raise HTTPException(status_code=500, detail=f"Generation with {quality.model_name} failed")
+    
+    app_id = await asyncio.to_thread(_save_generation_id, db, resume_id, job_id, tailored_content, metadata)
+    
+    return {
+        "status": "success",
+        "message": f"Resume tailored successfully using {metadata['model_used']}",
+        "application_id": app_id,
+        "final": True,
+        "tailored_resume": tailored_content[:500] + "...",  # Preview
+        "metadata": metadata
+    }
+
+
+@router.get("/queue", response_model=dict)
+def get_generation_queue(user: User = Depends(get_current_user)):
+    """
+    Generation queue depth, running work per model and recent wait times.
+    
+    The per-user breakdown only lists the caller, unless they are an admin.
+    """
+    stats = scheduler.stats()
+    if not is_admin(user):
+        own = str(user.id)
+        for key in ("queued_by_user", "running_by_user"):
+            stats[key] = {own: stats[key][own]} if own in stats[key] else {}
+    return {
+        "status": "success",
+        "queue": stats
+    }
+
+
+@router.post("/generate-batch", response_model=dict)
+def generate_applications_batch(
+    request: BatchGenerateRequest,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    """
+    Generate tailored resumes for several jobs (and optionally several models).
+    
+    Generations are grouped by model so each model is loaded once and the
+    resume prefix of the prompt is reused from Ollama's KV cache.
+    
+    With several models, every model's output is kept as its own revision of
+    the job's application and returned as a separate result; the one with the
+    best ATS score is made the application's current content.
+    """
+    resume = _get_resume(db, request.resume_id, user)
+    
+    jobs = db.query(JobPosting).filter(visible_jobs(user), JobPosting.id.in_(request.job_ids)).all()
+    jobs_by_id = {job.id: job for job in jobs}
+    missing = [job_id for job_id in request.job_ids if job_id not in jobs_by_id]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Job postings not found: {missing}")
+    
+    resume_text = resume.content_text or "Professional with experience in software development"
+    models = [pick_model(db, model, request.latency_budget) for model in request.models or [None]]
+    
+    pairs = [(job_id, model) for model in models for job_id in request.job_ids]
+    enforce_generation_limits(db, user, len(pairs), source="generate-batch")
+    current_tenant.set(user.id)
+    items = [
+        {
+            "base_resume_text": resume_text,
+            "job_description": jobs_by_id[job_id].description,
+            "model_name": model
+        }
+        for job_id, model in pairs
+    ]
+    
+    try:
+        results, batch_stats = generate_tailored_resumes_batch(items, priority=client_priority(request.priority))
+        
+        generated = []
+        revisions_by_job = {}
+        for (job_id, _), (tailored_content, metadata) in zip(pairs, results):
+            app = save_generation(db, request.resume_id, job_id, tailored_content, metadata)
+            revision = latest_revision(db, app.id)
+            revisions_by_job.setdefault(job_id, []).append(revision)
+            generated.append({
+                "application_id": app.id,
+                "job_id": job_id,
+                "model": metadata["model_used"],
+                "revision": revision.revision,
+                "ats_score": revision.ats_score,
+                "metadata": metadata
+            })
+        
+        # Each save replaced the application's content; keep the best model's current
+        current = {}
+        for job_id, job_revisions in revisions_by_job.items():
+            best = max(job_revisions, key=lambda r: r.ats_score if r.ats_score is not None else -1)
+            if best is not job_revisions[-1]:
+                restore_revision(db, db.get(Application, best.application_id), best)
+            current[job_id] = best.revision
+        for result in generated:
+            result["current"] = result["revision"] == current[result["job_id"]]
+        
+        return {
+            "status": "success",
+            "message": f"Generated {len(generated)} tailored resumes",
+            "applications": generated,
+            "batch": batch_stats
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to generate resumes: {str(e)}")
+
+
 @router.post("/", response_model=dict)
 def create_application(
     app_data: ApplicationCreate,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
 ):
     """
     Create a new application with pre-generated content (e.g., from N8N workflow).
     """
+    _get_resume(db, app_data.resume_id, user)
+    _get_job(db, app_data.job_id, user)
+    
     # Check if application already exists
     existing_app = db.query(Application).filter(
         Application.job_id == app_data.job_id,
@@ -131,20 +417,24 @@ def create_application(
     
     if existing_app:
         # Update existing
-        existing_app.generated_content = app_data.tailored_content
+        set_application_content(db, existing_app, app_data.tailored_content)
         existing_app.status = app_data.status
+        record_revision(db, existing_app, source="manual")
         db.commit()
         db.refresh(existing_app)
         return {"id": existing_app.id, "status": "updated", "message": "Application updated"}
     else:
         # Create new
         new_app = Application(
+            user_id=user.id,
             job_id=app_data.job_id,
             resume_id=app_data.resume_id,
-            generated_content=app_data.tailored_content,
             status=app_data.status
         )
+        set_application_content(db, new_app, app_data.tailored_content)
         db.add(new_app)
+        db.flush()
+        record_revision(db, new_app, source="manual")
         db.commit()
         db.refresh(new_app)
         return {"id": new_app.id, "status": "created", "message": "Application created"}
@@ -152,62 +442,66 @@ def create_application(
 
 
 @router.get("/", response_model=list)
-def list_applications(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def list_applications(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
     """
-    List all applications with model and ATS metadata.
+    List the user's applications with model and ATS metadata, oldest first,
+    optionally filtered by status (both served by the per-user indexes).
+    
+    The resume text is left out (has_content says whether there is any);
+    fetch it from GET /applications/{id}.
     """
-    apps = db.query(Application).offset(skip).limit(limit).all()
-    return [
-        {
-            "id": app.id,
-            "job_id": app.job_id,
-            "resume_id": app.resume_id,
-            "status": app.status,
-            "created_at": app.created_at,
-            "generated_content": app.generated_content,
-            "model_used": app.model_used,
-            "model_generation_time": app.model_generation_time,
-            "model_tokens_used": app.model_tokens_used,
-            "ats_score": app.ats_score,
-            "ats_grade": app.ats_grade,
-            "ats_feedback": app.ats_feedback,
-            "ats_analyzed_at": app.ats_analyzed_at
-        }
-        for app in apps
-    ]
+    def build():
+        query = db.query(Application).filter(Application.user_id == user.id)
+        if status:
+            query = query.filter(Application.status == status)
+        apps = query.order_by(Application.created_at, Application.id).offset(skip).limit(limit).all()
+        return [
+            {
+                "id": app.id,
+                "job_id": app.job_id,
+                "resume_id": app.resume_id,
+                "status": app.status,
+                "created_at": app.created_at,
+                "has_content": app.content_hash is not None,
+                "model_used": app.model_used,
+                "model_generation_time": app.model_generation_time,
+                "model_tokens_used": app.model_tokens_used,
+                "model_prompt_tokens": app.model_prompt_tokens,
+                "ats_score": app.ats_score,
+                "ats_grade": app.ats_grade,
+                "ats_feedback": loads_or_none(app.ats_feedback),
+                "ats_analyzed_at": app.ats_analyzed_at,
+                "ats_score_delta": app.ats_score_delta
+            }
+            for app in apps
+        ]
+    return cached_json(request, f"applications:{user.id}", build, tables=("applications",))
 
 
 @router.post("/{application_id}/generate-pdf", response_model=dict)
 def generate_application_pdf(
     application_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
 ):
     """
     Generate a PDF for an existing application.
     """
     # Get the application
-    app = db.query(Application).filter(Application.id == application_id).first()
-    if not app:
-        raise HTTPException(status_code=404, detail="Application not found")
+    app = _get_application(db, application_id, user)
     
-    if not app.generated_content:
+    if not app.content_hash and not app.generated_content:
         raise HTTPException(status_code=400, detail="No resume content to generate PDF from")
     
     try:
-        # Create PDFs directory if it doesn't exist
-        pdf_dir = "/app/data/pdfs"
-        os.makedirs(pdf_dir, exist_ok=True)
-        
-        # Generate unique filename
-        filename = f"resume_{app.id}_{uuid.uuid4().hex[:8]}.pdf"
-        pdf_path = os.path.join(pdf_dir, filename)
-        
-        # Generate the PDF
-        generate_resume_pdf(app.generated_content, pdf_path)
-        
-        # Update application with PDF path
-        app.pdf_path = pdf_path
-        db.commit()
+        pdf_path = render_application_pdf(db, app)
         
         return {
             "status": "success",
@@ -223,15 +517,14 @@ def generate_application_pdf(
 @router.get("/{application_id}/download-pdf")
 def download_application_pdf(
     application_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
 ):
     """
     Download the PDF for an application.
     """
     # Get the application
-    app = db.query(Application).filter(Application.id == application_id).first()
-    if not app:
-        raise HTTPException(status_code=404, detail="Application not found")
+    app = _get_application(db, application_id, user)
     
     if not app.pdf_path or not os.path.exists(app.pdf_path):
         raise HTTPException(status_code=404, detail="PDF not found. Generate it first.")
@@ -245,47 +538,49 @@ def download_application_pdf(
 
 
 @router.get("/models", response_model=dict)
-def get_models():
+def get_models(request: Request):
     """
     Get list of available AI models for resume generation.
     """
-    return {
+    return cached_json(request, "models", lambda: {
         "status": "success",
         "models": get_available_models()
-    }
+    })
 
 
 @router.post("/{application_id}/analyze-ats", response_model=dict)
 def analyze_ats_score(
     application_id: int,
-    db: Session = Depends(get_db)
+    refresh: bool = False,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
 ):
     """
     Manually trigger ATS analysis for an existing application.
-    """
-    from datetime import datetime
     
+    Results are cached by content hash, so re-analyzing unchanged content is
+    free; refresh=true forces a new scoring run.
+    """
     # Get the application
-    app = db.query(Application).filter(Application.id == application_id).first()
-    if not app:
-        raise HTTPException(status_code=404, detail="Application not found")
+    app = _get_application(db, application_id, user)
     
-    if not app.generated_content:
+    content = application_content(db, app)
+    if not content:
         raise HTTPException(status_code=400, detail="No resume content to analyze")
+    check_rate_limit(user, "ats")
     
     try:
         # Run ATS analysis
-        ats_result = get_ats_score(app.generated_content)
+        ats_result = cached_ats_score(content, db, refresh)
+        base_score = base_resume_score(db, app.resume_id)
         
         # Update application with ATS data
         app.ats_score = ats_result['score']
         app.ats_grade = ats_result['grade']
-        app.ats_feedback = json.dumps({
-            'suggestions': ats_result.get('suggestions', []),
-            'strengths': ats_result.get('strengths', []),
-            'missing_keywords': ats_result.get('missing_keywords', [])
-        })
+        app.ats_feedback = feedback_json(ats_result)
         app.ats_analyzed_at = datetime.utcnow()
+        app.ats_score_delta = app.ats_score - base_score if base_score is not None else None
+        sync_revision_ats(db, app)
         
         db.commit()
         
@@ -296,9 +591,163 @@ def analyze_ats_score(
             "suggestions": ats_result.get('suggestions', []),
             "strengths": ats_result.get('strengths', []),
             "missing_keywords": ats_result.get('missing_keywords', []),
-            "analyzed_at": ats_result['analyzed_at']
+            "analyzed_at": ats_result['analyzed_at'],
+            "cached": ats_result['cached'],
+            "base_resume_score": base_score,
+            "ats_score_delta": app.ats_score_delta
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to analyze ATS score: {str(e)}")
 
+
+def _get_resume(db: Session, resume_id: int, user: User) -> Resume:
+    resume = db.query(Resume).filter(Resume.id == resume_id, Resume.user_id == user.id).first()
+    if not resume:
+        raise HTTPException(status_code=404, detail="Resume not found")
+    return resume
+
+
+def _get_job(db: Session, job_id: int, user: User) -> JobPosting:
+    job = db.query(JobPosting).filter(JobPosting.id == job_id, visible_jobs(user)).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job posting not found")
+    return job
+
+
+def _get_application(db: Session, application_id: int, user: User) -> Application:
+    # Other users' applications are reported as missing rather than forbidden
+    app = db.query(Application).filter(
+        Application.id == application_id, Application.user_id == user.id
+    ).first()
+    if not app:
+        raise HTTPException(status_code=404, detail="Application not found")
+    return app
+
+
+def _get_revision(db: Session, application_id: int, number: int):
+    revision = get_revision(db, application_id, number)
+    if not revision:
+        raise HTTPException(status_code=404, detail=f"Revision {number} not found")
+    return revision
+
+
+@router.get("/{application_id}/revisions", response_model=list)
+def list_application_revisions(
+    application_id: int,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    """
+    Every generation of this application, oldest first, with model metadata
+    and ATS result (without the text).
+    """
+    app = _get_application(db, application_id, user)
+    return [revision_summary(revision, app.content_hash) for revision in list_revisions(db, application_id)]
+
+
+@router.get("/{application_id}/revisions/compare", response_model=dict)
+def compare_application_revisions(
+    application_id: int,
+    from_revision: Optional[int] = None,
+    to_revision: Optional[int] = None,
+    context: int = 3,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    """
+    Unified diff between two revisions (defaults: the previous revision vs
+    the latest), with added/removed line counts and the ATS score change.
+    """
+    _get_application(db, application_id, user)
+    latest = latest_revision(db, application_id)
+    if not latest:
+        raise HTTPException(status_code=404, detail="Application has no revisions")
+    
+    to_rev = _get_revision(db, application_id, to_revision) if to_revision else latest
+    from_number = from_revision if from_revision else to_rev.revision - 1
+    if from_number < 1:
+        raise HTTPException(status_code=400, detail="Nothing to compare against the first revision")
+    from_rev = _get_revision(db, application_id, from_number)
+    
+    return compare_revisions(db, from_rev, to_rev, context=max(context, 0))
+
+
+@router.get("/{application_id}/revisions/{revision_number}", response_model=dict)
+def get_application_revision(
+    application_id: int,
+    revision_number: int,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    app = _get_application(db, application_id, user)
+    revision = _get_revision(db, application_id, revision_number)
+    return {
+        **revision_summary(revision, app.content_hash),
+        "ats_feedback": loads_or_none(revision.ats_feedback),
+        "generated_content": revision_content(db, revision)
+    }
+
+
+@router.post("/{application_id}/revisions/{revision_number}/restore", response_model=dict)
+def restore_application_revision(
+    application_id: int,
+    revision_number: int,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    """
+    Make an earlier revision current again (content, model metadata and ATS
+    result) without generating. The PDF has to be regenerated afterwards.
+    """
+    app = _get_application(db, application_id, user)
+    revision = _get_revision(db, application_id, revision_number)
+    restored = restore_revision(db, app, revision)
+    return {
+        "status": "success",
+        "message": f"Restored revision {revision_number} as revision {restored.revision}",
+        "revision": revision_summary(restored, app.content_hash)
+    }
+
+
+@router.get("/{application_id}")
+def get_application(
+    application_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    """
+    Get one application including its tailored resume text (304 when unchanged).
+    
+    Declared last so /queue and /models aren't captured by the id.
+    """
+    version = db.query(Application.updated_at).filter(
+        Application.id == application_id, Application.user_id == user.id
+    ).first()
+    if not version:
+        raise HTTPException(status_code=404, detail="Application not found")
+    
+    def build():
+        app = db.query(Application).filter(Application.id == application_id).first()
+        return {
+            "id": app.id,
+            "job_id": app.job_id,
+            "resume_id": app.resume_id,
+            "status": app.status,
+            "created_at": app.created_at,
+            "generated_content": application_content(db, app),
+            "content_hash": app.content_hash,
+            "pdf_path": app.pdf_path,
+            "model_used": app.model_used,
+            "model_generation_time": app.model_generation_time,
+            "model_tokens_used": app.model_tokens_used,
+            "model_prompt_tokens": app.model_prompt_tokens,
+            "ats_score": app.ats_score,
+            "ats_grade": app.ats_grade,
+            "ats_feedback": loads_or_none(app.ats_feedback),
+            "ats_analyzed_at": app.ats_analyzed_at,
+            "ats_score_delta": app.ats_score_delta
+        }
+    
+    return conditional_json(request, row_etag("applications", application_id, version.updated_at), version.updated_at, build)
@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+
+from data_transfer import DATASETS, PARQUET_AVAILABLE, PARQUET_MEDIA_TYPE, stream_parquet
+from models import User
+from tenancy import get_current_user
+
+router = APIRouter(
+    prefix="/data",
+    tags=["data"],
+)
+
+
+@router.get("/export/{dataset}")
+def export_dataset(
+    dataset: str,
+    since: Optional[datetime] = None,
+    include_content: bool = False,
+    user: User = Depends(get_current_user)
+):
+    """
+    Stream the caller's user row, resumes, jobs, applications or ats_metrics
+    as a Parquet file, one row group at a time. since filters on fetched_at
+    (jobs) or created_at; include_content adds the tailored resume text to
+    applications.
+    """
+    if dataset not in DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset; available: {', '.join(DATASETS)}")
+    if not PARQUET_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Parquet export needs pyarrow")
+    filename = f"{dataset}-{datetime.utcnow():%Y%m%d-%H%M%S}.parquet"
+    return StreamingResponse(
+        stream_parquet(dataset, user, since, include_content and dataset == "applications"),
+        media_type=PARQUET_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
@@ -0,0 +1,93 @@
+import threading
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse, Response
+import profiling
+
+PROFILE_FORMATS = ("json", "collapsed", "svg")
+
+
+def require_profiling(x_profiling_token: Optional[str] = Header(None)):
+    if not profiling.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiling.is_authorized(x_profiling_token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+
+
+router = APIRouter(
+    prefix="/debug",
+    tags=["debug"],
+    dependencies=[Depends(require_profiling)],
+    include_in_schema=False,
+)
+
+
+def _render(sampler: profiling.Sampler, format: str, title: str):
+    if format == "collapsed":
+        return PlainTextResponse(sampler.collapsed())
+    if format == "svg":
+        return Response(profiling.render_flamegraph(sampler.stacks, title), media_type="image/svg+xml")
+    return sampler.summary()
+
+
+@router.get("/profile")
+def sample_profile(
+    seconds: float = 10.0,
+    format: str = "json",
+    interval: float = profiling.PROFILING_INTERVAL,
+    include_idle: bool = False
+):
+    """
+    Sample all threads for `seconds` and return the hot spots.
+    format: json (top functions), collapsed (flamegraph.pl / speedscope input) or svg.
+    """
+    if format not in PROFILE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(PROFILE_FORMATS)}")
+    if seconds <= 0 or seconds > profiling.MAX_PROFILE_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be between 0 and {profiling.MAX_PROFILE_SECONDS}")
+
+    # This worker thread only sleeps while sampling; leave it out of the profile
+    sampler = profiling.sample(seconds, interval, include_idle, exclude_threads={threading.get_ident()})
+    if sampler is None:
+        raise HTTPException(status_code=409, detail="A profiling session is already running")
+    return _render(sampler, format, f"{seconds:g}s sample")
+
+
+@router.get("/profile/requests")
+def list_request_profiles():
+    """Profiles captured from requests sent with the X-Profile header."""
+    return profiling.list_request_profiles()
+
+
+@router.get("/profile/requests/{profile_id}")
+def get_request_profile(profile_id: str, format: str = "json"):
+    if format not in PROFILE_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(PROFILE_FORMATS)}")
+    profile = profiling.get_request_profile(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return _render(profile["sampler"], format, f"{profile['method']} {profile['path']}")
+
+
+@router.post("/tracemalloc/start")
+def start_tracemalloc(frames: int = 25):
+    return profiling.start_tracemalloc(max(frames, 1))
+
+
+@router.post("/tracemalloc/stop")
+def stop_tracemalloc():
+    return profiling.stop_tracemalloc()
+
+
+@router.get("/tracemalloc/snapshot")
+def tracemalloc_snapshot(limit: int = 25, group_by: str = "lineno"):
+    """
+    Top allocation sites and growth since the previous snapshot.
+    group_by: lineno, filename or traceback.
+    """
+    if group_by not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=400, detail="group_by must be lineno, filename or traceback")
+    snapshot = profiling.tracemalloc_snapshot(limit, group_by)
+    if snapshot is None:
+        raise HTTPException(status_code=409, detail="tracemalloc is not running; POST /debug/tracemalloc/start first")
+    return snapshot
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from database import get_db
+from ats_service import ats_status
+import migrate
+
+router = APIRouter(tags=["health"])
+
+
+@router.get("/health")
+def health(db: Session = Depends(get_db)):
+    """
+    Liveness plus which ATS scorer is active and the schema version. 503 only
+    when the database is unreachable; a rule-based ATS fallback, pending
+    migrations or a failed migration-status check are reported as "degraded".
+    """
+    try:
+        db.execute(text("SELECT 1"))
+        database = "ok"
+    except Exception as e:
+        database = f"error: {e}"
+
+    schema = None
+    if database == "ok":
+        try:
+            report = migrate.status(db.get_bind())
+            schema = {key: report[key] for key in ("current", "head", "up_to_date")}
+        except Exception as e:
+            schema = {"error": str(e), "up_to_date": None}
+
+    ats = ats_status()
+    if database != "ok":
+        status = "error"
+    elif ats["state"] == "fallback" or ats["state"] == "loading" or not schema["up_to_date"]:
+        status = "degraded"
+    else:
+        status = "ok"
+    return JSONResponse(
+        status_code=503 if status == "error" else 200,
+        content={"status": status, "database": database, "ats": ats, "schema": schema}
+    )
+
+
+@router.get("/health/migrations")
+def migration_status(db: Session = Depends(get_db)):
+    """Applied (with timings) and pending schema migrations."""
+    return migrate.status(db.get_bind())
@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pydantic import BaseModel
-from models import JobPosting
+from models import JobPosting, User
 from database import get_db
-from job_search import search_jobs, deduplicate_jobs, format_job_description
+from ingest import ingest_search, job_fingerprint, extract_keywords
+from http_cache import cached_json, conditional_json, row_etag
+from tenancy import get_current_user, visible_jobs
 
 router = APIRouter(
     prefix="/jobs",
@@ -12,13 +14,23 @@ router = APIRouter(
 )
 
 @router.post("/", response_model=dict)
-def create_job(title: str, company: str, description: str, url: str, db: Session = Depends(get_db)):
+def create_job(
+    title: str,
+    company: str,
+    description: str,
+    url: str,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
     db_job = JobPosting(
+        user_id=user.id,
         title=title,
         company=company,
         description=description,
         url=url,
-        source="Manual"
+        source="Manual",
+        fingerprint=job_fingerprint(title, company),
+        keywords=",".join(extract_keywords(f"{title} {description}"))
     )
     db.add(db_job)
     db.commit()
@@ -26,27 +38,41 @@ def create_job(title: str, company: str, description: str, url: str, db: Session
     return {"id": db_job.id, "title": db_job.title}
 
 @router.get("/", response_model=List[dict])
-def read_jobs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    jobs = db.query(JobPosting).offset(skip).limit(limit).all()
-    return [{"id": j.id, "title": j.title, "company": j.company, "fetched_at": j.fetched_at} for j in jobs]
+def read_jobs(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    def build():
+        jobs = db.query(JobPosting).filter(visible_jobs(user)).order_by(
+            JobPosting.fetched_at, JobPosting.id
+        ).offset(skip).limit(limit).all()
+        return [{"id": j.id, "title": j.title, "company": j.company, "fetched_at": j.fetched_at} for j in jobs]
+    return cached_json(request, f"jobs:{user.id}", build, tables=("job_postings",))
 
 @router.get("/{job_id}")
-def get_job(job_id: int, db: Session = Depends(get_db)):
-    """Get a single job by ID"""
-    job = db.query(JobPosting).filter(JobPosting.id == job_id).first()
+def get_job(job_id: int, request: Request, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    """Get a single job by ID (ETag / Last-Modified, 304 when unchanged)"""
+    version = db.query(JobPosting.updated_at).filter(JobPosting.id == job_id, visible_jobs(user)).first()
     
-    if not job:
+    if not version:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return {
-        "id": job.id,
-        "title": job.title,
-        "company": job.company,
-        "description": job.description,
-        "url": job.url,
-        "source": job.source,
-        "fetched_at": job.fetched_at
-    }
+    def build():
+        job = db.query(JobPosting).filter(JobPosting.id == job_id).first()
+        return {
+            "id": job.id,
+            "title": job.title,
+            "company": job.company,
+            "description": job.description,
+            "url": job.url,
+            "source": job.source,
+            "fetched_at": job.fetched_at
+        }
+    
+    return conditional_json(request, row_etag("job_postings", job_id, version.updated_at), version.updated_at, build)
 
 
 class JobSearchRequest(BaseModel):
@@ -64,14 +90,14 @@ def search_and_store_jobs(
     Search for jobs using JobSpy and store them in the database
     """
     try:
-        # Search for jobs
-        jobs = search_jobs(
+        result = ingest_search(
+            db,
             search_term=request.search_term,
             location=request.location,
             results_wanted=request.results_wanted
         )
         
-        if not jobs:
+        if not result["fetched"]:
             return {
                 "status": "success",
                 "message": "No jobs found",
@@ -79,43 +105,13 @@ def search_and_store_jobs(
                 "jobs": []
             }
         
-        # Deduplicate
-        unique_jobs = deduplicate_jobs(jobs)
-        
-        # Store in database
-        stored_jobs = []
-        for job_data in unique_jobs:
-            # Check if job already exists (by title and company)
-            existing = db.query(JobPosting).filter(
-                JobPosting.title == job_data["title"],
-                JobPosting.company == job_data["company"]
-            ).first()
-            
-            if not existing:
-                # Create new job posting
-                new_job = JobPosting(
-                    title=job_data["title"],
-                    company=job_data["company"],
-                    description=format_job_description(job_data["description"]),
-                    url=job_data["url"],
-                    source=job_data["source"]
-                )
-                db.add(new_job)
-                db.commit()
-                db.refresh(new_job)
-                stored_jobs.append({
-                    "id": new_job.id,
-                    "title": new_job.title,
-                    "company": new_job.company
-                })
-        
+        unique_count = result["fetched"] - result["duplicates"]
         return {
             "status": "success",
-            "message": f"Found {len(unique_jobs)} jobs, added {len(stored_jobs)} new jobs",
-            "jobs_added": len(stored_jobs),
-            "jobs": stored_jobs
+            "message": f"Found {unique_count} jobs, added {result['inserted']} new jobs",
+            "jobs_added": result["inserted"],
+            "jobs": result["jobs"]
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Job search failed: {str(e)}")
-
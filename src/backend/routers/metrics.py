@@ -0,0 +1,14 @@
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import Response
+from metrics import render_metrics, CONTENT_TYPE_LATEST
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+def get_metrics():
+    """Prometheus scrape endpoint."""
+    payload = render_metrics()
+    if payload is None:
+        raise HTTPException(status_code=503, detail="Metrics disabled: prometheus_client is not installed")
+    return Response(content=payload, media_type=CONTENT_TYPE_LATEST)
@@ -1,19 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form, Request
 from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
 from typing import List
 import shutil
 import os
 import uuid
-from models import Resume
-from database import get_db
+from models import Resume, User
+from database import get_db, UPLOAD_DIR
+from http_cache import cached_json, conditional_json, row_etag
+from ats_cache import score_resume_background
+from tenancy import get_current_user
+from pdf_generator import remove_pdf
 
 router = APIRouter(
     prefix="/resumes",
     tags=["resumes"],
 )
 
-UPLOAD_DIR = "data/resumes"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 def extract_text_from_file(file_path: str) -> str:
@@ -58,9 +61,11 @@ def extract_text_from_file(file_path: str) -> str:
 
 @router.post("/upload")
 async def upload_resume(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     name: str = Form(...),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
 ):
     # Generate unique filename
     file_id = str(uuid.uuid4())
@@ -76,6 +81,7 @@ async def upload_resume(
     
     # Create DB entry with extracted text
     db_resume = Resume(
+        user_id=user.id,
         name=name,
         file_path=file_path,
         content_text=text_content,  # Store extracted text!
@@ -85,38 +91,61 @@ async def upload_resume(
     db.commit()
     db.refresh(db_resume)
     
+    # Score the base resume once so tailored versions can report their delta
+    background_tasks.add_task(score_resume_background, db_resume.id)
+    
     return db_resume
 
 @router.get("/", response_model=List[dict]) # Simplified response model for now
-def read_resumes(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    resumes = db.query(Resume).offset(skip).limit(limit).all()
-    return [{"id": r.id, "name": r.name, "created_at": r.created_at} for r in resumes]
+def read_resumes(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    def build():
+        resumes = db.query(Resume).filter(Resume.user_id == user.id).order_by(
+            Resume.created_at, Resume.id
+        ).offset(skip).limit(limit).all()
+        return [
+            {"id": r.id, "name": r.name, "created_at": r.created_at, "ats_score": r.ats_score, "ats_grade": r.ats_grade}
+            for r in resumes
+        ]
+    return cached_json(request, f"resumes:{user.id}", build, tables=("resumes",))
 
 @router.get("/{resume_id}")
-def get_resume(resume_id: int, db: Session = Depends(get_db)):
-    """Get a single resume by ID with extracted text content"""
-    resume = db.query(Resume).filter(Resume.id == resume_id).first()
+def get_resume(resume_id: int, request: Request, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    """Get a single resume by ID with extracted text content (304 when unchanged)"""
+    version = db.query(Resume.updated_at).filter(Resume.id == resume_id, Resume.user_id == user.id).first()
     
-    if not resume:
+    if not version:
         raise HTTPException(status_code=404, detail="Resume not found")
     
-    # Return the extracted text from database, not the binary file!
-    return {
-        "id": resume.id,
-        "name": resume.name,
-        "file_path": resume.file_path,
-        "content": resume.content_text or "[No text extracted]",  # Use database field!
-        "is_base": resume.is_base,
-        "created_at": resume.created_at
-    }
+    def build():
+        resume = db.query(Resume).filter(Resume.id == resume_id).first()
+        # Return the extracted text from database, not the binary file!
+        return {
+            "id": resume.id,
+            "name": resume.name,
+            "file_path": resume.file_path,
+            "content": resume.content_text or "[No text extracted]",  # Use database field!
+            "is_base": resume.is_base,
+            "created_at": resume.created_at,
+            "ats_score": resume.ats_score,
+            "ats_grade": resume.ats_grade,
+            "ats_analyzed_at": resume.ats_analyzed_at
+        }
+    
+    return conditional_json(request, row_etag("resumes", resume_id, version.updated_at), version.updated_at, build)
 
 
 @router.get("/{resume_id}/download")
-def download_resume(resume_id: int, db: Session = Depends(get_db)):
+def download_resume(resume_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
     """
     Download a resume file by ID.
     """
-    resume = db.query(Resume).filter(Resume.id == resume_id).first()
+    resume = db.query(Resume).filter(Resume.id == resume_id, Resume.user_id == user.id).first()
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
     
@@ -132,19 +161,20 @@ def download_resume(resume_id: int, db: Session = Depends(get_db)):
 
 
 @router.delete("/{resume_id}", response_model=dict)
-def delete_resume(resume_id: int, db: Session = Depends(get_db)):
+def delete_resume(resume_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
     """
     Delete a resume by ID (removes from database and filesystem).
     Also deletes any applications that reference this resume.
     """
     from models import Application  # Import here to avoid circular import
     
-    resume = db.query(Resume).filter(Resume.id == resume_id).first()
+    resume = db.query(Resume).filter(Resume.id == resume_id, Resume.user_id == user.id).first()
     if not resume:
         raise HTTPException(status_code=404, detail="Resume not found")
     
     # Delete any applications that reference this resume
     applications = db.query(Application).filter(Application.resume_id == resume_id).all()
+    pdf_paths = [app.pdf_path for app in applications if app.pdf_path]
     for app in applications:
         db.delete(app)
     
@@ -159,6 +189,8 @@ def delete_resume(resume_id: int, db: Session = Depends(get_db)):
     # Delete from database
     db.delete(resume)
     db.commit()
+    for pdf_path in pdf_paths:
+        remove_pdf(pdf_path)
     
     deleted_apps_count = len(applications)
     return {
@@ -0,0 +1,180 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from pydantic import BaseModel
+from datetime import datetime
+from models import SavedSearch, HarvestRun, SavedSearchSeenUrl, User
+from database import get_db
+from harvester import harvest_scheduler, run_stats, parse_sites
+from tenancy import get_current_user
+
+router = APIRouter(
+    prefix="/saved-searches",
+    tags=["saved-searches"],
+)
+
+
+class SavedSearchRequest(BaseModel):
+    name: str
+    search_term: str
+    location: str = "Remote"
+    sites: List[str] = ["indeed", "linkedin", "zip_recruiter"]
+    results_wanted: int = 20
+    max_hours_old: int = 72
+    interval_minutes: int = 1440
+    enabled: bool = True
+
+
+class SavedSearchUpdate(BaseModel):
+    name: Optional[str] = None
+    search_term: Optional[str] = None
+    location: Optional[str] = None
+    sites: Optional[List[str]] = None
+    results_wanted: Optional[int] = None
+    max_hours_old: Optional[int] = None
+    interval_minutes: Optional[int] = None
+    enabled: Optional[bool] = None
+
+
+def _latest_run(db: Session, search_id: int) -> Optional[HarvestRun]:
+    return db.query(HarvestRun).filter(
+        HarvestRun.saved_search_id == search_id
+    ).order_by(HarvestRun.started_at.desc()).first()
+
+
+def _serialize(db: Session, search: SavedSearch) -> dict:
+    return {
+        "id": search.id,
+        "name": search.name,
+        "search_term": search.search_term,
+        "location": search.location,
+        "sites": parse_sites(search.sites),
+        "results_wanted": search.results_wanted,
+        "max_hours_old": search.max_hours_old,
+        "interval_minutes": search.interval_minutes,
+        "enabled": search.enabled,
+        "watermark_at": search.watermark_at,
+        "last_run_at": search.last_run_at,
+        "next_run_at": search.next_run_at,
+        "running": harvest_scheduler.is_running(search.id),
+        "last_run": run_stats(_latest_run(db, search.id)),
+    }
+
+
+def _get_search(db: Session, search_id: int, user: User) -> SavedSearch:
+    search = db.query(SavedSearch).filter(
+        SavedSearch.id == search_id, SavedSearch.user_id == user.id
+    ).first()
+    if not search:
+        raise HTTPException(status_code=404, detail="Saved search not found")
+    return search
+
+
+@router.post("/", response_model=dict)
+def create_saved_search(
+    request: SavedSearchRequest,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    """Create a saved search; the harvester runs it on its next check."""
+    if not request.sites:
+        raise HTTPException(status_code=400, detail="At least one site is required")
+    search = SavedSearch(
+        user_id=user.id,
+        name=request.name,
+        search_term=request.search_term,
+        location=request.location,
+        sites=",".join(request.sites),
+        results_wanted=request.results_wanted,
+        max_hours_old=request.max_hours_old,
+        interval_minutes=max(request.interval_minutes, 1),
+        enabled=request.enabled,
+        next_run_at=datetime.utcnow()
+    )
+    db.add(search)
+    db.commit()
+    db.refresh(search)
+    return _serialize(db, search)
+
+
+@router.get("/", response_model=List[dict])
+def list_saved_searches(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    searches = db.query(SavedSearch).filter(SavedSearch.user_id == user.id).order_by(SavedSearch.id).all()
+    return [_serialize(db, s) for s in searches]
+
+
+@router.get("/{search_id}")
+def get_saved_search(search_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    return _serialize(db, _get_search(db, search_id, user))
+
+
+@router.patch("/{search_id}")
+def update_saved_search(
+    search_id: int,
+    request: SavedSearchUpdate,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    """
+    Update a saved search. Changing the query, location or sites resets its
+    watermark and seen URLs so the next run does a full look-back.
+    """
+    search = _get_search(db, search_id, user)
+    changes = request.dict(exclude_unset=True)
+    if "sites" in changes:
+        if not changes["sites"]:
+            raise HTTPException(status_code=400, detail="At least one site is required")
+        changes["sites"] = ",".join(changes["sites"])
+    if "interval_minutes" in changes:
+        changes["interval_minutes"] = max(changes["interval_minutes"], 1)
+
+    query_changed = any(
+        key in changes and changes[key] != getattr(search, key)
+        for key in ("search_term", "location", "sites")
+    )
+    for key, value in changes.items():
+        setattr(search, key, value)
+    if query_changed:
+        search.watermark_at = None
+        search.next_run_at = datetime.utcnow()
+        db.query(SavedSearchSeenUrl).filter(
+            SavedSearchSeenUrl.saved_search_id == search.id
+        ).delete(synchronize_session=False)
+
+    db.commit()
+    db.refresh(search)
+    return _serialize(db, search)
+
+
+@router.delete("/{search_id}")
+def delete_saved_search(search_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    search = _get_search(db, search_id, user)
+    db.query(SavedSearchSeenUrl).filter(SavedSearchSeenUrl.saved_search_id == search_id).delete(synchronize_session=False)
+    db.query(HarvestRun).filter(HarvestRun.saved_search_id == search_id).delete(synchronize_session=False)
+    db.delete(search)
+    db.commit()
+    return {"status": "deleted", "id": search_id}
+
+
+@router.post("/{search_id}/run")
+def run_saved_search_now(search_id: int, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    """Run a saved search immediately (incrementally) and return the run stats."""
+    _get_search(db, search_id, user)
+    run = harvest_scheduler.run_now(search_id)
+    if run is None:
+        raise HTTPException(status_code=409, detail="Saved search is already running")
+    return run_stats(run)
+
+
+@router.get("/{search_id}/runs", response_model=List[dict])
+def list_harvest_runs(
+    search_id: int,
+    limit: int = 20,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    _get_search(db, search_id, user)
+    runs = db.query(HarvestRun).filter(
+        HarvestRun.saved_search_id == search_id
+    ).order_by(HarvestRun.started_at.desc()).limit(limit).all()
+    return [run_stats(run) for run in runs]
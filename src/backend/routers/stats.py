@@ -0,0 +1,71 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+from typing import Optional
+from database import get_db
+from models import User
+from stats_service import get_stats, get_user_stats
+from tenancy import get_current_user, is_admin, require_admin
+from model_analytics import model_leaderboard, route_model
+from content_store import storage_report
+from retention import retention_status, run_retention
+
+router = APIRouter(
+    prefix="/stats",
+    tags=["stats"],
+)
+
+
+@router.get("/")
+def read_stats(
+    full_refresh: bool = False,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    """
+    Dashboard counts by status, model, ATS grade and source, plus per-model
+    averages. Admins get the whole deployment, served from the incrementally
+    refreshed stats_summary table; everyone else gets their own data.
+    """
+    if not is_admin(user):
+        return get_user_stats(db, user.id)
+    return get_stats(db, full_refresh=full_refresh)
+
+
+@router.get("/models")
+def read_model_leaderboard(window: str = "7d", db: Session = Depends(get_db)):
+    """
+    Per-model leaderboard over a time window (24h, 7d, 30d, all): tokens/sec,
+    latency p50/p90/p95 and mean/median ATS score, best ATS first.
+    """
+    try:
+        leaderboard = model_leaderboard(db, window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"window": window, "models": leaderboard}
+
+
+@router.get("/models/route")
+def read_model_route(latency_budget: Optional[float] = None, db: Session = Depends(get_db)):
+    """Which model model="auto" would pick right now, and why."""
+    return route_model(db, latency_budget)
+
+
+@router.get("/storage", dependencies=[Depends(require_admin)])
+def read_storage_report(db: Session = Depends(get_db)):
+    """
+    Generated-content storage: bytes the applications reference vs unique
+    bytes after dedup vs bytes stored after compression.
+    """
+    return storage_report(db)
+
+
+@router.get("/retention", dependencies=[Depends(require_admin)])
+def read_retention(preview: bool = False):
+    """
+    Retention policies and the last run's result. preview=true also counts
+    what a run would remove right now (nothing is deleted).
+    """
+    status = retention_status()
+    if preview:
+        status["preview"] = run_retention(dry_run=True)
+    return status
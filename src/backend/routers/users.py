@@ -0,0 +1,78 @@
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from typing import Optional
+from models import User
+from database import get_db
+from tenancy import get_current_user, require_admin, usage_report
+
+router = APIRouter(
+    prefix="/users",
+    tags=["users"],
+)
+
+
+class UserCreate(BaseModel):
+    email: str
+
+
+class UserSettings(BaseModel):
+    auto_tailor: Optional[bool] = None
+
+
+class QuotaUpdate(BaseModel):
+    daily_generation_quota: Optional[int] = None
+
+
+@router.post("/", response_model=dict)
+def create_user(request: UserCreate, db: Session = Depends(get_db)):
+    """
+    Register a user. The returned id is what the auth proxy sends as X-User-Id.
+    New users get DAILY_GENERATION_QUOTA; an admin can change it per user.
+    """
+    if db.query(User).filter(User.email == request.email).first():
+        raise HTTPException(status_code=409, detail="A user with this email already exists")
+    user = User(email=request.email)
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return {"id": user.id, "email": user.email, "daily_generation_quota": user.daily_generation_quota}
+
+
+@router.get("/me")
+def read_current_user(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
+    """The calling user with today's generation usage and rate limits."""
+    return usage_report(db, user)
+
+
+@router.patch("/me")
+def update_current_user(
+    request: UserSettings,
+    db: Session = Depends(get_db),
+    user: User = Depends(get_current_user)
+):
+    """
+    Change the calling user's settings. auto_tailor opts in to generating
+    applications for newly ingested jobs that match a base resume; they are
+    charged to the daily generation quota like any other generation.
+    """
+    if request.auto_tailor is not None:
+        user.auto_tailor = request.auto_tailor
+    db.commit()
+    return usage_report(db, user)
+
+
+@router.put("/{user_id}/quota", response_model=dict, dependencies=[Depends(require_admin)])
+def set_user_quota(user_id: int, request: QuotaUpdate, db: Session = Depends(get_db)):
+    """
+    Admin only: override DAILY_GENERATION_QUOTA for a user (0 = unlimited,
+    null = back to the default).
+    """
+    user = db.get(User, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if request.daily_generation_quota is not None and request.daily_generation_quota < 0:
+        raise HTTPException(status_code=400, detail="daily_generation_quota must be 0 or more")
+    user.daily_generation_quota = request.daily_generation_quota
+    db.commit()
+    return {"id": user.id, "email": user.email, "daily_generation_quota": user.daily_generation_quota}
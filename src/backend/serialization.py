@@ -0,0 +1,52 @@
+"""
+JSON Serialization
+
+orjson when it is installed (several times faster than the stdlib encoder
+and natively handles datetimes), stdlib json otherwise.
+
+- JSONResponseClass is the app's default response class
+- dumps() is for routes that build their Response body themselves (the
+  response cache), which also skips FastAPI's jsonable_encoder pass; types
+  orjson doesn't know (Decimal from Postgres aggregates, ...) fall back to
+  jsonable_encoder per value
+"""
+
+import json
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps(content: Any) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, default=jsonable_encoder, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(jsonable_encoder(content)).encode()
+
+
+class OrjsonResponse(JSONResponse):
+    """JSONResponse rendered with dumps() (fastapi.responses.ORJSONResponse is deprecated upstream)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+JSONResponseClass = OrjsonResponse if ORJSON_AVAILABLE else JSONResponse
+
+
+def loads_or_none(raw: Any) -> Any:
+    """Parse a JSON string column; None (rather than an error) when empty or invalid."""
+    if not raw:
+        return None
+    if not isinstance(raw, (str, bytes)):
+        return raw
+    try:
+        return orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+    except ValueError:
+        return None
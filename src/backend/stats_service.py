@@ -0,0 +1,238 @@
+"""
+Dashboard Statistics
+
+Counts by status, model, ATS grade and job source, plus per-model generation
+averages, kept in the stats_summary table so /stats is one small read no
+matter how many rows (or generated_content blobs) exist.
+
+Refresh is incremental:
+- job postings are only ever inserted between retention runs, so only rows
+  past the last counted id are aggregated and added to the running counts;
+  a commit that deletes postings triggers a rebuild of the job counts
+- applications and resumes are re-aggregated with GROUP BY only after a
+  commit actually touched them (tracked via session events, including bulk
+  query().update() / delete())
+- every STATS_RECONCILE_SECONDS everything is rebuilt from scratch, which
+  also picks up rows committed out of id order by concurrent ingests
+
+Per-user stats (get_user_stats) are aggregated live with the same queries
+filtered to the user, since one user's rows are few.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import event, func, or_
+from sqlalchemy.orm import Session
+
+from models import Application, JobPosting, Resume, StatsSummary, StatsWatermark
+
+STATS_RECONCILE_SECONDS = int(os.getenv("STATS_RECONCILE_SECONDS", "3600"))
+
+JOB_DIMENSIONS = ("totals.jobs", "jobs_by_source")
+APPLICATION_DIMENSIONS = ("totals.applications", "applications_by_status", "applications_by_model", "applications_by_ats_grade")
+RESUME_DIMENSIONS = ("totals.resumes",)
+
+_refresh_lock = threading.Lock()
+# Tables changed by committed transactions since the last refresh
+_dirty = {"applications", "resumes"}
+_last_reconcile = 0.0
+
+
+@event.listens_for(Session, "after_flush")
+def _track_changes(session, flush_context):
+    touched = session.info.setdefault("stats_touched", set())
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Application):
+            touched.add("applications")
+        elif isinstance(obj, Resume):
+            touched.add("resumes")
+    if any(isinstance(obj, JobPosting) for obj in session.deleted):
+        touched.add("job_postings")
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_writes(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete) or orm_execute_state.bind_mapper is None:
+        return
+    table = orm_execute_state.bind_mapper.local_table.name
+    if table in ("applications", "resumes") or (table == "job_postings" and orm_execute_state.is_delete):
+        orm_execute_state.session.info.setdefault("stats_touched", set()).add(table)
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_dirty(session):
+    touched = session.info.pop("stats_touched", None)
+    if touched:
+        _dirty.update(touched)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_changes(session):
+    session.info.pop("stats_touched", None)
+
+
+def mark_dirty(*tables: str):
+    """For writes that bypass the ORM session (e.g. COPY): re-aggregate these tables on the next refresh."""
+    _dirty.update(tables)
+
+
+def _replace(db: Session, dimensions: Iterable[str], rows: Iterable[Tuple[str, str, Dict]]):
+    """Swap the stored rows of the given dimensions for freshly aggregated ones."""
+    now = datetime.utcnow()
+    db.query(StatsSummary).filter(StatsSummary.dimension.in_(list(dimensions))).delete(synchronize_session=False)
+    db.add_all(StatsSummary(dimension=dimension, key=key, updated_at=now, **values) for dimension, key, values in rows)
+
+
+def _label(value) -> str:
+    return "unknown" if value is None or value == "" else str(value)
+
+
+def _application_rows(db: Session, *criteria) -> List[Tuple[str, str, Dict]]:
+    rows = [("totals.applications", "all", {"count": db.query(func.count(Application.id)).filter(*criteria).scalar() or 0})]
+
+    by_status = db.query(Application.status, func.count(Application.id)).filter(*criteria).group_by(Application.status)
+    for status, count in by_status:
+        rows.append(("applications_by_status", _label(status), {"count": count}))
+
+    by_grade = db.query(Application.ats_grade, func.count(Application.id)).filter(*criteria).group_by(Application.ats_grade)
+    for grade, count in by_grade:
+        rows.append(("applications_by_ats_grade", _label(grade), {"count": count}))
+
+    per_model = db.query(
+        Application.model_used,
+        func.count(Application.id),
+        func.count(Application.model_generation_time),
+        func.coalesce(func.sum(Application.model_generation_time), 0),
+        func.coalesce(func.sum(Application.model_tokens_used), 0),
+        func.coalesce(func.sum(Application.model_prompt_tokens), 0),
+        func.count(Application.ats_score),
+        func.coalesce(func.sum(Application.ats_score), 0),
+    ).filter(*criteria).group_by(Application.model_used)
+    for model, count, timed, gen_time, tokens, prompt_tokens, scored, ats_total in per_model:
+        rows.append(("applications_by_model", _label(model), {
+            "count": count,
+            "timed_count": timed,
+            "total_generation_time": float(gen_time),
+            "total_tokens": float(tokens),
+            "total_prompt_tokens": float(prompt_tokens),
+            "scored_count": scored,
+            "total_ats_score": float(ats_total),
+        }))
+    return rows
+
+
+def _aggregate_applications(db: Session):
+    _replace(db, APPLICATION_DIMENSIONS, _application_rows(db))
+
+
+def _aggregate_resumes(db: Session):
+    _replace(db, RESUME_DIMENSIONS, [("totals.resumes", "all", {"count": db.query(func.count(Resume.id)).scalar() or 0})])
+
+
+def _refresh_jobs(db: Session, full: bool):
+    """Add postings past the watermark to the running counts (or rebuild them)."""
+    watermark = db.query(StatsWatermark).filter(StatsWatermark.name == "job_postings").first()
+    if watermark is None:
+        watermark = StatsWatermark(name="job_postings", last_id=0)
+        db.add(watermark)
+    if full:
+        db.query(StatsSummary).filter(StatsSummary.dimension.in_(JOB_DIMENSIONS)).delete(synchronize_session=False)
+        watermark.last_id = 0
+
+    new_rows = db.query(JobPosting.source, func.count(JobPosting.id), func.max(JobPosting.id)).filter(
+        JobPosting.id > watermark.last_id
+    ).group_by(JobPosting.source).all()
+    if not new_rows and not full:
+        return
+
+    existing = {
+        (row.dimension, row.key): row
+        for row in db.query(StatsSummary).filter(StatsSummary.dimension.in_(JOB_DIMENSIONS))
+    }
+    now = datetime.utcnow()
+
+    def add(dimension: str, key: str, count: int):
+        row = existing.get((dimension, key))
+        if row is None:
+            row = existing[(dimension, key)] = StatsSummary(dimension=dimension, key=key, count=0)
+            db.add(row)
+        row.count += count
+        row.updated_at = now
+
+    add("totals.jobs", "all", 0)
+    for source, count, max_id in new_rows:
+        add("jobs_by_source", _label(source), count)
+        add("totals.jobs", "all", count)
+        watermark.last_id = max(watermark.last_id, max_id)
+    watermark.refreshed_at = now
+
+
+def refresh_stats(db: Session, full: bool = False):
+    """Bring stats_summary up to date; full=True rebuilds every dimension."""
+    global _last_reconcile
+    with _refresh_lock:
+        full = full or time.monotonic() - _last_reconcile >= STATS_RECONCILE_SECONDS
+        dirty = {"applications", "resumes", "job_postings"} if full else set(_dirty)
+        _dirty.difference_update(dirty)
+        try:
+            _refresh_jobs(db, "job_postings" in dirty)
+            if "applications" in dirty:
+                _aggregate_applications(db)
+            if "resumes" in dirty:
+                _aggregate_resumes(db)
+            db.commit()
+        except Exception:
+            db.rollback()
+            _dirty.update(dirty)
+            raise
+        if full:
+            _last_reconcile = time.monotonic()
+
+
+def get_stats(db: Session, full_refresh: bool = False) -> Dict:
+    refresh_stats(db, full=full_refresh)
+    return _format_stats(db.query(StatsSummary).all())
+
+
+def get_user_stats(db: Session, user_id: int) -> Dict:
+    """get_stats for one user: their resumes and applications, and the jobs they can see."""
+    rows = _application_rows(db, Application.user_id == user_id)
+    resumes = db.query(func.count(Resume.id)).filter(Resume.user_id == user_id).scalar() or 0
+    rows.append(("totals.resumes", "all", {"count": resumes}))
+    by_source = db.query(JobPosting.source, func.count(JobPosting.id)).filter(
+        or_(JobPosting.user_id == user_id, JobPosting.user_id.is_(None))
+    ).group_by(JobPosting.source).all()
+    rows.append(("totals.jobs", "all", {"count": sum(count for _, count in by_source)}))
+    rows.extend(("jobs_by_source", _label(source), {"count": count}) for source, count in by_source)
+
+    now = datetime.utcnow()
+    return _format_stats([StatsSummary(dimension=dimension, key=key, updated_at=now, **values) for dimension, key, values in rows])
+
+
+def _format_stats(rows: List[StatsSummary]) -> Dict:
+    stats = {
+        "totals": {"jobs": 0, "resumes": 0, "applications": 0},
+        "jobs_by_source": {},
+        "applications_by_status": {},
+        "applications_by_ats_grade": {},
+        "applications_by_model": {},
+        "refreshed_at": max((row.updated_at for row in rows), default=None),
+    }
+    for row in rows:
+        if row.dimension.startswith("totals."):
+            stats["totals"][row.dimension.split(".", 1)[1]] = row.count
+        elif row.dimension == "applications_by_model":
+            stats["applications_by_model"][row.key] = {
+                "count": row.count,
+                "avg_generation_time": round(row.total_generation_time / row.timed_count, 2) if row.timed_count else None,
+                "avg_tokens": round(row.total_tokens / row.timed_count, 1) if row.timed_count else None,
+                "avg_prompt_tokens": round(row.total_prompt_tokens / row.timed_count, 1) if row.timed_count else None,
+                "avg_ats_score": round(row.total_ats_score / row.scored_count, 1) if row.scored_count else None,
+            }
+        elif row.dimension in stats:
+            stats[row.dimension][row.key] = row.count
+    return stats
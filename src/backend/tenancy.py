@@ -0,0 +1,213 @@
+"""
+Tenancy
+
+Per-user scoping for hosting several users on one deployment: who is
+calling, plus quotas and rate limits on the expensive LLM and ATS endpoints.
+
+Users are identified by the X-User-Id header, set by the authenticating
+proxy in front of the API (the API trusts it and does not check passwords).
+Requests without the header act as the default user, so a single-user
+deployment keeps working unchanged, unless REQUIRE_USER_HEADER is set.
+
+- Rate limits are per user and per action ("generate", "ats"), as token
+  buckets held in process memory: bursts up to the per-minute limit, then
+  one request per 60/limit seconds. Exceeding one answers 429 with
+  Retry-After.
+- The daily generation quota counts the LLM generations charged to the user
+  since UTC midnight, so a best-of-N call counts every candidate. Charges go
+  to the generation_usage ledger when a request is accepted and are never
+  deleted, so deleting resumes or applications does not give them back.
+  users.daily_generation_quota overrides DAILY_GENERATION_QUOTA (0 means
+  unlimited) and can only be changed by an admin.
+- Admins are the users listed in ADMIN_USER_IDS. When it is empty, the
+  default user is the admin of a deployment that doesn't require the user
+  header (the single-user setup). Admin-only routes answer 403 otherwise.
+
+Fair sharing of the generation queue between users is done by the
+scheduler (see generation_scheduler.current_tenant).
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from fastapi import Depends, Header, HTTPException
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models import GenerationUsage, JobPosting, User
+
+USER_HEADER = "X-User-Id"
+REQUIRE_USER_HEADER = os.getenv("REQUIRE_USER_HEADER", "false").lower() == "true"
+DEFAULT_USER_EMAIL = os.getenv("DEFAULT_USER_EMAIL", "default@localhost")
+# Comma-separated user ids allowed on admin routes (quotas, global stats)
+ADMIN_USER_IDS = {int(v) for v in os.getenv("ADMIN_USER_IDS", "").split(",") if v.strip().isdigit()}
+
+# Requests per minute per user; 0 disables the limit
+RATE_LIMITS = {
+    "generate": int(os.getenv("RATE_LIMIT_GENERATE_PER_MINUTE", "10")),
+    "ats": int(os.getenv("RATE_LIMIT_ATS_PER_MINUTE", "30")),
+}
+# Generations per user per UTC day; 0 = unlimited
+DAILY_GENERATION_QUOTA = int(os.getenv("DAILY_GENERATION_QUOTA", "200"))
+
+_default_user_id: Optional[int] = None
+_buckets: Dict[Tuple[int, str], Tuple[float, float]] = {}  # (user, action) -> (tokens, last refill)
+_buckets_lock = threading.Lock()
+
+
+def default_user(db: Session) -> User:
+    """The user that header-less requests and pre-tenancy data belong to."""
+    global _default_user_id
+    if _default_user_id is not None:
+        user = db.get(User, _default_user_id)
+        if user is not None:
+            return user
+    user = db.query(User).filter(User.email == DEFAULT_USER_EMAIL).first()
+    if user is None:
+        try:
+            with db.begin_nested():
+                user = User(email=DEFAULT_USER_EMAIL)
+                db.add(user)
+            db.commit()
+        except IntegrityError:
+            user = db.query(User).filter(User.email == DEFAULT_USER_EMAIL).first()
+    _default_user_id = user.id
+    return user
+
+
+def get_current_user(
+    x_user_id: Optional[int] = Header(None, alias=USER_HEADER),
+    db: Session = Depends(get_db)
+) -> User:
+    """FastAPI dependency: the calling user."""
+    if x_user_id is None:
+        if REQUIRE_USER_HEADER:
+            raise HTTPException(status_code=401, detail=f"{USER_HEADER} header required")
+        return default_user(db)
+    user = db.get(User, x_user_id)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Unknown user")
+    return user
+
+
+def is_admin(user: User) -> bool:
+    if ADMIN_USER_IDS:
+        return user.id in ADMIN_USER_IDS
+    return not REQUIRE_USER_HEADER and user.email == DEFAULT_USER_EMAIL
+
+
+def require_admin(user: User = Depends(get_current_user)) -> User:
+    """FastAPI dependency: the calling user, who must be an admin."""
+    if not is_admin(user):
+        raise HTTPException(status_code=403, detail="Admin only")
+    return user
+
+
+def visible_jobs(user: User):
+    """Filter for job postings the user can see: their own plus shared (harvested/searched) ones."""
+    return or_(JobPosting.user_id == user.id, JobPosting.user_id.is_(None))
+
+
+def check_rate_limit(user: User, action: str):
+    """Take one token from the user's bucket for action, or raise 429."""
+    per_minute = RATE_LIMITS.get(action, 0)
+    if per_minute <= 0:
+        return
+    refill_per_second = per_minute / 60.0
+    now = time.monotonic()
+    key = (user.id, action)
+    with _buckets_lock:
+        tokens, last = _buckets.get(key, (float(per_minute), now))
+        tokens = min(float(per_minute), tokens + (now - last) * refill_per_second)
+        if tokens < 1:
+            _buckets[key] = (tokens, now)
+            retry_after = max(1, int((1 - tokens) / refill_per_second + 0.999))
+            raise HTTPException(
+                status_code=429,
+                detail=f"Rate limit exceeded for {action}: {per_minute} per minute",
+                headers={"Retry-After": str(retry_after)}
+            )
+        _buckets[key] = (tokens - 1, now)
+
+
+def generation_quota(user: User) -> int:
+    return user.daily_generation_quota if user.daily_generation_quota is not None else DAILY_GENERATION_QUOTA
+
+
+def generations_today(db: Session, user_id: int) -> int:
+    midnight = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    return db.query(func.sum(GenerationUsage.generations)).filter(
+        GenerationUsage.user_id == user_id,
+        GenerationUsage.created_at >= midnight
+    ).scalar() or 0
+
+
+def check_generation_quota(db: Session, user: User, count: int = 1):
+    """Raise 429 if count more generations would exceed the user's daily quota."""
+    quota = generation_quota(user)
+    if quota <= 0:
+        return
+    used = generations_today(db, user.id)
+    if used + count > quota:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Daily generation quota reached: {used} of {quota} used, {count} requested"
+        )
+
+
+def charge_generations(db: Session, user: User, count: int, source: str, check: bool = True):
+    """
+    Record count generations in the usage ledger and commit, checking the
+    quota first unless check=False. The user's row is locked while checking,
+    so concurrent requests can't both take the last of the quota.
+    """
+    db.query(User.id).filter(User.id == user.id).with_for_update().one()
+    try:
+        if check:
+            check_generation_quota(db, user, count)
+        db.add(GenerationUsage(user_id=user.id, generations=count, source=source))
+        db.commit()
+    except HTTPException:
+        db.rollback()
+        raise
+
+
+def reserve_generations(db: Session, user: User, wanted: int, source: str) -> int:
+    """
+    Charge up to wanted generations, as many as the user's quota has left,
+    and commit. Returns how many were charged (0 when the quota is used up).
+    """
+    db.query(User.id).filter(User.id == user.id).with_for_update().one()
+    quota = generation_quota(user)
+    granted = wanted if quota <= 0 else max(min(wanted, quota - generations_today(db, user.id)), 0)
+    if granted:
+        db.add(GenerationUsage(user_id=user.id, generations=granted, source=source))
+    db.commit()
+    return granted
+
+
+def enforce_generation_limits(db: Session, user: User, count: int = 1, source: str = "generate"):
+    """Daily quota (count generations) and rate limit (one request) for a generate call, then charge it."""
+    check_generation_quota(db, user, count)
+    check_rate_limit(user, "generate")
+    charge_generations(db, user, count, source)
+
+
+def usage_report(db: Session, user: User) -> Dict:
+    quota = generation_quota(user)
+    used = generations_today(db, user.id)
+    return {
+        "user_id": user.id,
+        "email": user.email,
+        "is_admin": is_admin(user),
+        "auto_tailor": bool(user.auto_tailor),
+        "generations_today": used,
+        "daily_generation_quota": quota or None,
+        "generations_remaining": max(quota - used, 0) if quota else None,
+        "rate_limits_per_minute": {action: limit or None for action, limit in RATE_LIMITS.items()},
+    }
@@ -0,0 +1,328 @@
+"""
+Request Tracing
+
+Lightweight OpenTelemetry-style spans for following one request through the
+routers, DB, LLM backend (prefill vs decode), ATS scoring and PDF rendering.
+
+Spans nest through a context variable, so they follow asyncio tasks and the
+generation scheduler's worker threads. Finished traces are exported as OTLP
+JSON to a collector (TRACE_OTLP_ENDPOINT) and/or appended to a JSON-lines
+file (TRACE_EXPORT_FILE). TRACE_SAMPLE_RATE controls how many traces are
+exported; any trace slower than TRACE_SLOW_MS is printed as a span tree
+regardless of sampling.
+"""
+
+import contextvars
+import json
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List, Optional
+
+import requests
+
+TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+# Fraction of traces exported (0.0 - 1.0)
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.1"))
+# Traces slower than this are logged as a span tree (0 disables)
+TRACE_SLOW_MS = float(os.getenv("TRACE_SLOW_MS", "30000"))
+# JSON-lines file with one exported span per line
+TRACE_EXPORT_FILE = os.getenv("TRACE_EXPORT_FILE", "")
+# OTLP/HTTP traces endpoint, e.g. http://otel-collector:4318/v1/traces
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "")
+SERVICE_NAME = os.getenv("TRACE_SERVICE_NAME", "autojob-backend")
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class _Trace:
+    __slots__ = ("trace_id", "sampled", "root", "spans")
+
+    def __init__(self, sampled: bool):
+        self.trace_id = os.urandom(16).hex()
+        self.sampled = sampled
+        self.root: Optional["Span"] = None
+        self.spans: List["Span"] = []
+
+
+class Span:
+    """A timed operation within a trace."""
+
+    __slots__ = ("trace", "span_id", "parent", "name", "attributes", "start_time", "end_time", "error")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict] = None,
+                 start_time: Optional[float] = None):
+        self.trace = parent.trace if parent else _Trace(random.random() < TRACE_SAMPLE_RATE)
+        self.span_id = os.urandom(8).hex()
+        self.parent = parent
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.start_time = start_time if start_time is not None else time.time()
+        self.end_time: Optional[float] = None
+        self.error: Optional[str] = None
+        if parent is None:
+            self.trace.root = self
+        self.trace.spans.append(self)
+
+    @property
+    def trace_id(self) -> str:
+        return self.trace.trace_id
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_time if self.end_time is not None else time.time()
+        return (end - self.start_time) * 1000
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def finish(self, end_time: Optional[float] = None):
+        self.end_time = end_time if end_time is not None else time.time()
+        root = self.trace.root
+        if self is root:
+            _on_trace_finished(self.trace)
+        elif root is not None and root.end_time is not None and self.trace.sampled:
+            # Work that outlived its request (e.g. the quality half of a race)
+            _exporter.export([self])
+
+    def to_dict(self) -> Dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent.span_id if self.parent else None,
+            "name": self.name,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": round(self.duration_ms, 2),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _NoopSpan:
+    """Returned when tracing is disabled."""
+
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key, value):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time the with-block as a child of the current span (or as a new trace).
+    """
+    if not TRACING_ENABLED:
+        yield _NOOP_SPAN
+        return
+
+    current = Span(name, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+
+
+def traced(name: Optional[str] = None):
+    """Decorator form of span()."""
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def add_span(name: str, start_time: float, end_time: float, **attributes):
+    """
+    Record an already-finished child of the current span from known timestamps,
+    e.g. the prefill and decode phases reported by the LLM backend.
+    """
+    parent = _current_span.get()
+    if not TRACING_ENABLED or parent is None:
+        return
+    Span(name, parent, attributes, start_time=start_time).end_time = end_time
+
+
+def set_attribute(key: str, value):
+    """Set an attribute on the current span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.set_attribute(key, value)
+
+
+def format_span_tree(trace: _Trace) -> str:
+    """Indented span tree with durations, for the slow-request log."""
+    children: Dict[Optional[str], List[Span]] = {}
+    for s in trace.spans:
+        children.setdefault(s.parent.span_id if s.parent else None, []).append(s)
+
+    lines = []
+
+    def walk(s: Span, depth: int):
+        parts = [s.name, f"{s.duration_ms:.1f}ms"] + [f"{k}={v}" for k, v in s.attributes.items()]
+        if s.error:
+            parts.append(f"ERROR={s.error}")
+        lines.append("  " * depth + " ".join(parts))
+        for child in sorted(children.get(s.span_id, []), key=lambda c: c.start_time):
+            walk(child, depth + 1)
+
+    for root in children.get(None, []):
+        walk(root, 0)
+    return "\n".join(lines)
+
+
+def _on_trace_finished(trace: _Trace):
+    root = trace.root
+    if TRACE_SLOW_MS and root.duration_ms >= TRACE_SLOW_MS:
+        print(f"Slow trace {trace.trace_id} ({root.duration_ms:.0f}ms):\n{format_span_tree(trace)}")
+    if trace.sampled:
+        _exporter.export([s for s in trace.spans if s.end_time is not None])
+
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _to_otlp(spans: List[Span]) -> Dict:
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+            "scopeSpans": [{
+                "scope": {"name": "autojob.tracing"},
+                "spans": [{
+                    "traceId": s.trace_id,
+                    "spanId": s.span_id,
+                    "parentSpanId": s.parent.span_id if s.parent else "",
+                    "name": s.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(int(s.start_time * 1e9)),
+                    "endTimeUnixNano": str(int(s.end_time * 1e9)),
+                    "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                    "status": {"code": 2, "message": s.error} if s.error else {"code": 1},
+                } for s in spans],
+            }],
+        }]
+    }
+
+
+class _Exporter:
+    """Ships finished spans from a background thread so requests never wait on I/O."""
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue(maxsize=1000)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        if not spans or not (TRACE_EXPORT_FILE or TRACE_OTLP_ENDPOINT):
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            print("Trace export queue full, dropping spans")
+
+    def _run(self):
+        while True:
+            spans = self._queue.get()
+            if TRACE_EXPORT_FILE:
+                try:
+                    with open(TRACE_EXPORT_FILE, "a") as f:
+                        for s in spans:
+                            f.write(json.dumps(s.to_dict(), default=str) + "\n")
+                except OSError as e:
+                    print(f"Error writing traces to {TRACE_EXPORT_FILE}: {e}")
+            if TRACE_OTLP_ENDPOINT:
+                try:
+                    requests.post(TRACE_OTLP_ENDPOINT, json=_to_otlp(spans), timeout=5)
+                except requests.exceptions.RequestException as e:
+                    print(f"Error exporting traces to {TRACE_OTLP_ENDPOINT}: {e}")
+
+
+_exporter = _Exporter()
+
+
+def instrument_engine(engine):
+    """Add a span for every statement executed on engine."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        parent = _current_span.get()
+        if not TRACING_ENABLED or parent is None:
+            return
+        words = statement.split(None, 1)
+        operation = words[0].upper() if words else "OTHER"
+        conn.info.setdefault("trace_spans", []).append(
+            Span(f"db.{operation.lower()}", parent, {"db.statement": statement[:200], "db.executemany": executemany})
+        )
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        spans = conn.info.get("trace_spans")
+        if spans:
+            spans.pop().finish()
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("trace_spans") if conn is not None else None
+        if spans:
+            failed = spans.pop()
+            failed.error = str(exception_context.original_exception)
+            failed.finish()
+
+
+def instrument_sessions(session_class):
+    """Add a db.commit span covering each session commit (flush included)."""
+    from sqlalchemy import event
+
+    @event.listens_for(session_class, "before_commit")
+    def before_commit(session):
+        parent = _current_span.get()
+        if TRACING_ENABLED and parent is not None:
+            session.info["trace_commit_span"] = Span("db.commit", parent)
+
+    @event.listens_for(session_class, "after_commit")
+    def after_commit(session):
+        commit_span = session.info.pop("trace_commit_span", None)
+        if commit_span is not None:
+            commit_span.finish()
+
+    @event.listens_for(session_class, "after_rollback")
+    def after_rollback(session):
+        commit_span = session.info.pop("trace_commit_span", None)
+        if commit_span is not None:
+            commit_span.error = "rolled back"
+            commit_span.finish()
@@ -6,7 +6,7 @@ import ErrorMessage from '@/components/ErrorMessage';
 import ResumeDisplay from '@/components/ResumeDisplay';
 import ATSScoreBadge from '@/components/ATSScoreBadge';
 import ATSFeedback from '@/components/ATSFeedback';
-import { fetchApplications, fetchJobDetails } from '@/lib/api';
+import { fetchApplications, fetchApplicationDetails, fetchApplicationRevisions, fetchJobDetails, restoreApplicationRevision } from '@/lib/api';
 
 interface Application {
     id: number;
@@ -14,14 +14,26 @@ interface Application {
     resume_id: number;
     status: string;
     created_at: string;
-    generated_content?: string;
+    has_content?: boolean;
     model_used?: string;
     model_generation_time?: number;
     model_tokens_used?: number;
     ats_score?: number | null;
     ats_grade?: string | null;
-    ats_feedback?: string | null;
+    ats_feedback?: { suggestions?: string[]; strengths?: string[]; missing_keywords?: string[] } | null;
     ats_analyzed_at?: string | null;
+    ats_score_delta?: number | null;
+}
+
+interface Revision {
+    revision: number;
+    source: string;
+    created_at: string;
+    current: boolean;
+    model_used?: string | null;
+    model_generation_time?: number | null;
+    ats_score?: number | null;
+    ats_grade?: string | null;
 }
 
 interface JobDetails {
@@ -41,6 +53,9 @@ export default function ApplicationsPage() {
     const [expandedApp, setExpandedApp] = useState<number | null>(null);
     const [jobDetails, setJobDetails] = useState<Record<number, JobDetails>>({});
     const [loadingJob, setLoadingJob] = useState<number | null>(null);
+    // Resume text is only sent by the detail endpoint, loaded on first expand
+    const [contents, setContents] = useState<Record<number, string>>({});
+    const [revisions, setRevisions] = useState<Record<number, Revision[]>>({});
 
     useEffect(() => {
         loadApplications();
@@ -73,12 +88,44 @@ export default function ApplicationsPage() {
         }
     }
 
+    async function loadContent(app: Application) {
+        if (!app.has_content || contents[app.id] !== undefined) return; // Nothing to load or already loaded
+
+        try {
+            const data = await fetchApplicationDetails(app.id);
+            setContents(prev => ({ ...prev, [app.id]: data.generated_content || '' }));
+        } catch (err) {
+            console.error('Failed to load application content:', err);
+        }
+    }
+
+    async function loadRevisions(applicationId: number) {
+        try {
+            const data = await fetchApplicationRevisions(applicationId);
+            setRevisions(prev => ({ ...prev, [applicationId]: data }));
+        } catch (err) {
+            console.error('Failed to load revisions:', err);
+        }
+    }
+
+    async function restoreRevision(app: Application, revision: number) {
+        try {
+            await restoreApplicationRevision(app.id, revision);
+            const data = await fetchApplicationDetails(app.id);
+            setContents(prev => ({ ...prev, [app.id]: data.generated_content || '' }));
+            await Promise.all([loadRevisions(app.id), loadApplications()]);
+        } catch (err) {
+            console.error('Failed to restore revision:', err);
+            alert('Could not restore this revision.');
+        }
+    }
+
     async function toggleExpand(app: Application) {
         if (expandedApp === app.id) {
             setExpandedApp(null);
         } else {
             setExpandedApp(app.id);
-            await loadJobDetails(app.job_id);
+            await Promise.all([loadJobDetails(app.job_id), loadContent(app), loadRevisions(app.id)]);
         }
     }
 
@@ -340,6 +387,11 @@ export default function ApplicationsPage() {
                                                                         </h4>
                                                                         <div className="flex items-center gap-3">
                                                                             <ATSScoreBadge score={app.ats_score} grade={app.ats_grade} size="lg" />
+                                                                            {app.ats_score_delta !== null && app.ats_score_delta !== undefined && (
+                                                                                <span className={`text-sm font-medium ${app.ats_score_delta >= 0 ? 'text-green-600' : 'text-red-600'}`}>
+                                                                                    {app.ats_score_delta >= 0 ? '+' : ''}{app.ats_score_delta} vs base resume
+                                                                                </span>
+                                                                            )}
                                                                             {app.ats_analyzed_at && (
                                                                                 <span className="text-xs text-slate-500">
                                                                                     Analyzed {new Date(app.ats_analyzed_at).toLocaleString()}
@@ -358,13 +410,13 @@ export default function ApplicationsPage() {
                                                                     />
                                                                 )}
 
-                                                                {app.generated_content && (
+                                                                {contents[app.id] && (
                                                                     <div>
                                                                         <div className="flex justify-between items-center mb-2">
                                                                             <h4 className="text-sm font-semibold text-slate-900">Tailored Resume:</h4>
                                                                             <div className="flex gap-2">
                                                                                 <button
-                                                                                    onClick={() => printResume(app.generated_content || '')}
+                                                                                    onClick={() => printResume(contents[app.id] || '')}
                                                                                     className="text-indigo-600 hover:text-indigo-900 text-sm font-medium flex items-center gap-1"
                                                                                 >
                                                                                     <svg className="h-4 w-4" fill="none" viewBox="0 0 24 24" stroke="currentColor">
@@ -384,10 +436,38 @@ export default function ApplicationsPage() {
                                                                             </div>
                                                                         </div>
                                                                         <div className="bg-white rounded-lg border border-slate-200 overflow-hidden">
-                                                                            <ResumeDisplay content={app.generated_content} />
+                                                                            <ResumeDisplay content={contents[app.id]} />
                                                                         </div>
                                                                     </div>
                                                                 )}
+
+                                                                {/* Revision history */}
+                                                                {(revisions[app.id]?.length ?? 0) > 1 && (
+                                                                    <div className="bg-white rounded-lg border border-slate-200 p-4">
+                                                                        <h4 className="text-sm font-semibold text-slate-900 mb-3">Revisions</h4>
+                                                                        <ul className="divide-y divide-slate-100">
+                                                                            {revisions[app.id].slice().reverse().map((rev) => (
+                                                                                <li key={rev.revision} className="py-2 flex items-center justify-between text-sm">
+                                                                                    <span className="text-slate-700">
+                                                                                        #{rev.revision} · {rev.source} · {rev.model_used || 'unknown model'}
+                                                                                        {rev.ats_score !== null && rev.ats_score !== undefined && ` · ATS ${rev.ats_score}`}
+                                                                                        <span className="text-xs text-slate-500 ml-2">{new Date(rev.created_at).toLocaleString()}</span>
+                                                                                    </span>
+                                                                                    {rev.current ? (
+                                                                                        <span className="text-xs font-medium text-green-700">Current</span>
+                                                                                    ) : (
+                                                                                        <button
+                                                                                            onClick={() => restoreRevision(app, rev.revision)}
+                                                                                            className="text-indigo-600 hover:text-indigo-900 text-sm font-medium"
+                                                                                        >
+                                                                                            Restore
+                                                                                        </button>
+                                                                                    )}
+                                                                                </li>
+                                                                            ))}
+                                                                        </ul>
+                                                                    </div>
+                                                                )}
                                                             </div>
                                                         )}
                                                     </td>
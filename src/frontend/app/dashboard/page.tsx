@@ -3,10 +3,27 @@
 import React, { useEffect, useState } from 'react';
 import Link from 'next/link';
 import LoadingSpinner from '@/components/LoadingSpinner';
-import { fetchJobs, fetchResumes, fetchApplications } from '@/lib/api';
+import { fetchStats } from '@/lib/api';
+
+interface ModelStats {
+    count: number;
+    avg_generation_time: number | null;
+    avg_tokens: number | null;
+    avg_ats_score: number | null;
+}
+
+interface DashboardStats {
+    totals: { jobs: number; resumes: number; applications: number };
+    applications_by_status: Record<string, number>;
+    applications_by_model: Record<string, ModelStats>;
+}
 
 export default function DashboardPage() {
-    const [stats, setStats] = useState({ jobs: 0, resumes: 0, applications: 0 });
+    const [stats, setStats] = useState<DashboardStats>({
+        totals: { jobs: 0, resumes: 0, applications: 0 },
+        applications_by_status: {},
+        applications_by_model: {},
+    });
     const [loading, setLoading] = useState(true);
 
     useEffect(() => {
@@ -15,16 +32,7 @@ export default function DashboardPage() {
 
     async function loadStats() {
         try {
-            const [jobs, resumes, applications] = await Promise.all([
-                fetchJobs(),
-                fetchResumes(),
-                fetchApplications(),
-            ]);
-            setStats({
-                jobs: jobs.length,
-                resumes: resumes.length,
-                applications: applications.length,
-            });
+            setStats(await fetchStats());
         } catch (error) {
             console.error('Failed to load stats:', error);
         } finally {
@@ -56,7 +64,7 @@ export default function DashboardPage() {
                     <div className="grid grid-cols-1 gap-6 sm:grid-cols-3">
                         <StatsCard
                             title="Jobs Found"
-                            value={stats.jobs}
+                            value={stats.totals.jobs}
                             icon={
                                 <svg className="h-6 w-6 text-white" fill="none" viewBox="0 0 24 24" stroke="currentColor">
                                     <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M21 13.255A23.931 23.931 0 0112 15c-3.183 0-6.22-.62-9-1.745M16 6V4a2 2 0 00-2-2h-4a2 2 0 00-2 2v2m4 6h.01M5 20h14a2 2 0 002-2V8a2 2 0 00-2-2H5a2 2 0 00-2 2v10a2 2 0 002 2z" />
@@ -67,7 +75,7 @@ export default function DashboardPage() {
                         />
                         <StatsCard
                             title="Resumes Uploaded"
-                            value={stats.resumes}
+                            value={stats.totals.resumes}
                             icon={
                                 <svg className="h-6 w-6 text-white" fill="none" viewBox="0 0 24 24" stroke="currentColor">
                                     <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M9 12h6m-6 4h6m2 5H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z" />
@@ -78,7 +86,7 @@ export default function DashboardPage() {
                         />
                         <StatsCard
                             title="Applications Generated"
-                            value={stats.applications}
+                            value={stats.totals.applications}
                             icon={
                                 <svg className="h-6 w-6 text-white" fill="none" viewBox="0 0 24 24" stroke="currentColor">
                                     <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M9 5H7a2 2 0 00-2 2v12a2 2 0 002 2h10a2 2 0 002-2V7a2 2 0 00-2-2h-2M9 5a2 2 0 002 2h2a2 2 0 002-2M9 5a2 2 0 012-2h2a2 2 0 012 2m-6 9l2 2 4-4" />
@@ -89,6 +97,47 @@ export default function DashboardPage() {
                         />
                     </div>
 
+                    {stats.totals.applications > 0 && (
+                        <div className="grid grid-cols-1 lg:grid-cols-2 gap-8">
+                            <div className="bg-white rounded-xl shadow-sm border border-slate-200 overflow-hidden p-6">
+                                <h2 className="text-lg font-semibold text-slate-900 mb-4">Applications by Status</h2>
+                                <ul className="space-y-2">
+                                    {Object.entries(stats.applications_by_status).map(([status, count]) => (
+                                        <li key={status} className="flex justify-between text-sm">
+                                            <span className="text-slate-600">{status}</span>
+                                            <span className="font-medium text-slate-900">{count}</span>
+                                        </li>
+                                    ))}
+                                </ul>
+                            </div>
+                            <div className="bg-white rounded-xl shadow-sm border border-slate-200 overflow-hidden p-6">
+                                <h2 className="text-lg font-semibold text-slate-900 mb-4">Models</h2>
+                                <table className="w-full text-sm">
+                                    <thead>
+                                        <tr className="text-left text-slate-500">
+                                            <th className="font-medium pb-2">Model</th>
+                                            <th className="font-medium pb-2 text-right">Resumes</th>
+                                            <th className="font-medium pb-2 text-right">Avg time</th>
+                                            <th className="font-medium pb-2 text-right">Avg tokens</th>
+                                            <th className="font-medium pb-2 text-right">Avg ATS</th>
+                                        </tr>
+                                    </thead>
+                                    <tbody>
+                                        {Object.entries(stats.applications_by_model).map(([model, m]) => (
+                                            <tr key={model} className="border-t border-slate-100">
+                                                <td className="py-2 text-slate-900">{model}</td>
+                                                <td className="py-2 text-right">{m.count}</td>
+                                                <td className="py-2 text-right">{m.avg_generation_time != null ? `${m.avg_generation_time}s` : '-'}</td>
+                                                <td className="py-2 text-right">{m.avg_tokens ?? '-'}</td>
+                                                <td className="py-2 text-right">{m.avg_ats_score ?? '-'}</td>
+                                            </tr>
+                                        ))}
+                                    </tbody>
+                                </table>
+                            </div>
+                        </div>
+                    )}
+
                     <div className="grid grid-cols-1 lg:grid-cols-2 gap-8">
                         <div className="bg-white rounded-xl shadow-sm border border-slate-200 overflow-hidden p-6">
                             <h2 className="text-lg font-semibold text-slate-900 mb-4 flex items-center gap-2">
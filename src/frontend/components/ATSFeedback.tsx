@@ -2,8 +2,14 @@
 
 import React, { useState } from 'react';
 
+interface ATSFeedbackData {
+    suggestions?: string[];
+    strengths?: string[];
+    missing_keywords?: string[];
+}
+
 interface ATSFeedbackProps {
-    feedback?: string | null;
+    feedback?: ATSFeedbackData | string | null;  // Parsed by the API; strings still accepted
     score?: number | null;
     grade?: string | null;
 }
@@ -15,7 +21,7 @@ export default function ATSFeedback({ feedback, score, grade }: ATSFeedbackProps
         return null;
     }
 
-    let parsedFeedback;
+    let parsedFeedback: ATSFeedbackData;
     try {
         parsedFeedback = typeof feedback === 'string' ? JSON.parse(feedback) : feedback;
     } catch (e) {
@@ -1,13 +1,22 @@
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8005';
+// Set when the API is shared between users and no auth proxy adds the header
+const USER_ID = process.env.NEXT_PUBLIC_USER_ID;
+
+function apiFetch(url: string, init: RequestInit = {}) {
+    if (!USER_ID) return fetch(url, init);
+    const headers = new Headers(init.headers);
+    headers.set('X-User-Id', USER_ID);
+    return fetch(url, { ...init, headers });
+}
 
 export async function fetchJobs() {
-    const res = await fetch(`${API_URL}/jobs/`);
+    const res = await apiFetch(`${API_URL}/jobs/`);
     if (!res.ok) throw new Error('Failed to fetch jobs');
     return res.json();
 }
 
 export async function fetchResumes() {
-    const res = await fetch(`${API_URL}/resumes/`);
+    const res = await apiFetch(`${API_URL}/resumes/`);
     if (!res.ok) throw new Error('Failed to fetch resumes');
     return res.json();
 }
@@ -17,7 +26,7 @@ export async function uploadResume(file: File, name: string) {
     formData.append('file', file);
     formData.append('name', name);
 
-    const res = await fetch(`${API_URL}/resumes/upload`, {
+    const res = await apiFetch(`${API_URL}/resumes/upload`, {
         method: 'POST',
         body: formData,
     });
@@ -32,7 +41,7 @@ export async function generateTailoredResume(resumeId: number, jobId: number, mo
         url += `&model=${encodeURIComponent(model)}`;
     }
 
-    const res = await fetch(url, {
+    const res = await apiFetch(url, {
         method: 'POST',
     });
 
@@ -41,26 +50,46 @@ export async function generateTailoredResume(resumeId: number, jobId: number, mo
 }
 
 export async function fetchApplications() {
-    const res = await fetch(`${API_URL}/applications/`);
+    const res = await apiFetch(`${API_URL}/applications/`);
     if (!res.ok) throw new Error('Failed to fetch applications');
     return res.json();
 }
 
+export async function fetchStats() {
+    const res = await apiFetch(`${API_URL}/stats/`);
+    if (!res.ok) throw new Error('Failed to fetch stats');
+    return res.json();
+}
+
 export async function fetchJobDetails(jobId: number) {
-    const res = await fetch(`${API_URL}/jobs/${jobId}`);
+    const res = await apiFetch(`${API_URL}/jobs/${jobId}`);
     if (!res.ok) throw new Error('Failed to fetch job details');
     return res.json();
 }
 
 
 export async function fetchApplicationDetails(applicationId: number) {
-    const res = await fetch(`${API_URL}/applications/${applicationId}`);
+    const res = await apiFetch(`${API_URL}/applications/${applicationId}`);
     if (!res.ok) throw new Error('Failed to fetch application details');
     return res.json();
 }
 
+export async function fetchApplicationRevisions(applicationId: number) {
+    const res = await apiFetch(`${API_URL}/applications/${applicationId}/revisions`);
+    if (!res.ok) throw new Error('Failed to fetch revisions');
+    return res.json();
+}
+
+export async function restoreApplicationRevision(applicationId: number, revision: number) {
+    const res = await apiFetch(`${API_URL}/applications/${applicationId}/revisions/${revision}/restore`, {
+        method: 'POST',
+    });
+    if (!res.ok) throw new Error('Failed to restore revision');
+    return res.json();
+}
+
 export async function deleteResume(resumeId: number) {
-    const res = await fetch(`${API_URL}/resumes/${resumeId}`, {
+    const res = await apiFetch(`${API_URL}/resumes/${resumeId}`, {
         method: 'DELETE',
     });
     if (!res.ok) throw new Error('Failed to delete resume');
@@ -68,13 +97,13 @@ export async function deleteResume(resumeId: number) {
 }
 
 export async function getAvailableModels() {
-    const res = await fetch(`${API_URL}/applications/models`);
+    const res = await apiFetch(`${API_URL}/applications/models`);
     if (!res.ok) throw new Error('Failed to fetch models');
     return res.json();
 }
 
 export async function analyzeATS(applicationId: number) {
-    const res = await fetch(`${API_URL}/applications/${applicationId}/analyze-ats`, {
+    const res = await apiFetch(`${API_URL}/applications/${applicationId}/analyze-ats`, {
         method: 'POST',
     });
     if (!res.ok) throw new Error('Failed to analyze ATS');